@@ -0,0 +1,221 @@
+"""
+Measure how the costs of the tap grow with the number of repositories, against the local stand-in for GitHub:
+the extraction of the repositories from the config, the listing and verification of the repositories of an
+organization, the translation of the state and the STATE messages of the bookmarks of all the repositories.
+
+Each step runs in its own process for each number of repositories, reporting its wall time, requests, state size and
+peak RSS. The steps without requests are repeated, and report the average time of a call. The growth exponent between two numbers of repositories, 1 for a linear cost, flags the superlinear steps.
+
+Usage: python -m benchmarks.bench_scale [--repos 10 1000 10000 50000] [--steps get_all_repos ...]
+                                        [--output results.json] [--chart chart.png]
+"""
+import argparse
+import contextlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+import singer
+from tap_github.client import GithubClient
+from tap_github.state import StateWriter
+from tap_github.streams import STREAMS
+from tap_github.sync import translate_state
+from benchmarks.mock_github import MockGithub, format_time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot
+except ImportError:
+    pyplot = None
+
+DEFAULT_REPOS = [10, 1000, 10000, 50000]
+STEPS = ['extract_repos_from_config', 'get_all_repos', 'translate_state', 'write_state', 'write_state_entries']
+# The growth exponent above which a step is flagged.
+SUPERLINEAR_EXPONENT = 1.2
+# The minimum time of the repeated calls of a step without requests, to time its average call.
+MIN_SECONDS = 0.2
+
+def get_repositories(repo_count):
+    """
+    Return the repositories of the stand-in.
+    """
+    return ['org0/repo{}'.format(index) for index in range(repo_count)]
+
+def time_calls(function):
+    """
+    Call the function until the minimum time elapsed, and return the average seconds of a call.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function(calls)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return elapsed / calls
+
+def get_state(repo_count):
+    """
+    Return a state with the bookmarks of the incremental streams and the activity of every repository.
+    """
+    incremental_streams = [stream_id for stream_id, stream in STREAMS.items() if stream.replication_method == 'INCREMENTAL']
+    repositories = get_repositories(repo_count)
+    return {
+        'bookmarks': {repo: {stream_id: {'since': format_time(index)} for stream_id in incremental_streams}
+                      for index, repo in enumerate(repositories)},
+        'repo_activity': {repo: {'pushed_at': format_time(index), 'updated_at': format_time(index), 'archived': False}
+                          for index, repo in enumerate(repositories)},
+    }
+
+def step_extract_repos_from_config(base_url, repo_count):
+    """
+    Extract the repositories listed in the config.
+    """
+    client = GithubClient({'access_token': 'TOKEN', 'base_url': base_url, 'repository': ' '.join(get_repositories(repo_count))})
+    return time_calls(lambda call: client.extract_repos_from_config()), None
+
+def step_get_all_repos(base_url, repo_count):
+    """
+    List and verify the repositories of the organization of the config.
+    """
+    client = GithubClient({'access_token': 'TOKEN', 'base_url': base_url, 'repository': 'org0/*'})
+    start = time.perf_counter()
+    repositories, _ = client.extract_repos_from_config()
+    elapsed = time.perf_counter() - start
+    assert len(repositories) == repo_count
+    return elapsed, None
+
+def step_translate_state(base_url, repo_count):
+    """
+    Translate the state for a catalog of all the streams.
+    """
+    state = get_state(repo_count)
+    catalog = {'streams': [{'tap_stream_id': stream_id} for stream_id in STREAMS]}
+    repositories = get_repositories(repo_count)
+    return time_calls(lambda call: translate_state(state, catalog, repositories)), len(json.dumps(state))
+
+def step_write_state(base_url, repo_count):
+    """
+    Write the STATE message of the whole state after the bookmark of a repository moved, as singer does.
+    """
+    state = get_state(repo_count)
+    def write_state(call):
+        state['bookmarks']['org0/repo{}'.format(call % repo_count)]['commits']['since'] = format_time(repo_count + call)
+        singer.write_state(state)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return time_calls(write_state), len(json.dumps(state))
+
+def step_write_state_entries(base_url, repo_count):
+    """
+    Write the STATE messages as the `StateWriter` does, serializing only the entries which changed.
+    """
+    state = get_state(repo_count)
+    state_writer = StateWriter()
+    def write_state(call):
+        state['bookmarks']['org0/repo{}'.format(call % repo_count)]['commits']['since'] = format_time(repo_count + call)
+        state_writer.write(state)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        # The first message serializes every entry.
+        state_writer.write(state)
+        return time_calls(write_state), len(json.dumps(state))
+
+def run_step(step, base_url, repo_count):
+    """
+    Run the step, without the INFO logs of each repository, and return its seconds, state size and peak RSS.
+    """
+    logging.disable(logging.INFO)
+    seconds, state_bytes = globals()['step_' + step](base_url, repo_count)
+    # The peak RSS is in kilobytes on Linux and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    if peak_rss and sys.platform == 'darwin':
+        peak_rss //= 1024
+    return {'seconds': round(seconds, 6), 'state_bytes': state_bytes, 'peak_rss_kb': peak_rss}
+
+def get_exponent(results, step, repos, index):
+    """
+    Return the growth exponent of the time of the step from the previous number of repositories.
+    """
+    if index == 0:
+        return None
+    previous = results[repos[index - 1]][step]['seconds']
+    current = results[repos[index]][step]['seconds']
+    if not previous or not current:
+        return None
+    return math.log(current / previous) / math.log(repos[index] / repos[index - 1])
+
+def print_results(results, repos, steps):
+    """
+    Print the results of each step by number of repositories, with the growth exponents.
+    """
+    for step in steps:
+        print(step)
+        print('  {:>8} {:>12} {:>10} {:>14} {:>10} {:>9}'.format('repos', 'seconds', 'requests', 'state bytes', 'RSS MB', 'exponent'))
+        for index, repo_count in enumerate(repos):
+            result = results[repo_count][step]
+            exponent = get_exponent(results, step, repos, index)
+            print('  {:>8} {:>12.6f} {:>10} {:>14} {:>10} {:>9}{}'.format(
+                repo_count, result['seconds'], result['requests'], result['state_bytes'] or '-',
+                result['peak_rss_kb'] // 1024 if result['peak_rss_kb'] else '-',
+                '{:.2f}'.format(exponent) if exponent is not None else '-',
+                '  SUPERLINEAR' if exponent is not None and exponent > SUPERLINEAR_EXPONENT else ''))
+
+def save_chart(results, repos, steps, path):
+    """
+    Save the charts of the time, requests, state size and memory by number of repositories.
+    """
+    figure, axes = pyplot.subplots(2, 2, figsize=(12, 9))
+    for axis, (key, label) in zip(axes.flat, [('seconds', 'Wall time (s)'), ('requests', 'Requests'),
+                                              ('state_bytes', 'State size (bytes)'), ('peak_rss_kb', 'Peak RSS (KB)')]):
+        for step in steps:
+            values = [results[repo_count][step][key] for repo_count in repos]
+            if any(values):
+                axis.plot(repos, [value or 0 for value in values], marker='o', label=step)
+        axis.set_xscale('log')
+        axis.set_yscale('symlog')
+        axis.set_xlabel('Repositories')
+        axis.set_title(label)
+        axis.legend(fontsize='small')
+    figure.tight_layout()
+    figure.savefig(path)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repos', type=int, nargs='+', default=DEFAULT_REPOS)
+    parser.add_argument('--steps', nargs='+', choices=STEPS, default=STEPS)
+    parser.add_argument('--output', help='Save the results as JSON')
+    parser.add_argument('--chart', help='Save the charts as an image, if matplotlib is installed')
+    args = parser.parse_args()
+
+    results = {}
+    for repo_count in args.repos:
+        results[repo_count] = {}
+        with MockGithub(orgs=1, repos=repo_count, rate_limit=10 ** 9) as mock_github:
+            for step in args.steps:
+                requests = mock_github.stats['requests']
+                with multiprocessing.get_context('spawn').Pool(1) as pool:
+                    result = pool.apply(run_step, (step, mock_github.base_url, repo_count))
+                result['requests'] = mock_github.stats['requests'] - requests
+                results[repo_count][step] = result
+                print('{:>8} repos {:<28} {:.3f}s'.format(repo_count, step, result['seconds']), file=sys.stderr)
+
+    print_results(results, args.repos, args.steps)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'parameters': vars(args), 'results': results}, output_file, indent=2)
+    if args.chart:
+        if pyplot:
+            save_chart(results, args.repos, args.steps, args.chart)
+        else:
+            print('matplotlib is not installed, the chart is not saved.', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare the throughput of the record transformation with a transformer and a metadata map built for each record,
+as done before the sync context, and with the context of the stream built once.
+
+Usage: python -m benchmarks.bench_stream_context [--records 100000]
+"""
+import argparse
+import time
+import singer
+from singer import metadata
+from tap_github.schema import get_schemas, load_schema_references
+from tap_github.streams import StreamContext
+
+STREAM = 'pull_requests'
+
+def get_stream_catalog():
+    """
+    Return the catalog entry of the pull requests with all fields selected.
+    """
+    schemas, field_metadata = get_schemas()
+    schema = singer.resolve_schema_references(schemas[STREAM], load_schema_references())
+    mdata = metadata.to_map(field_metadata[STREAM])
+    for breadcrumb in mdata:
+        mdata[breadcrumb]['selected'] = True
+    return {'tap_stream_id': STREAM, 'schema': schema, 'metadata': metadata.to_list(mdata)}
+
+def get_records(count):
+    """
+    Return synthetic pull requests.
+    """
+    return [{
+        'id': index, 'number': index, 'state': 'open', 'title': 'Pull request {}'.format(index),
+        'created_at': '2022-01-01T00:00:00Z', 'updated_at': '2022-01-02T00:00:00Z',
+        'user': {'login': 'user', 'id': 1, 'type': 'User', 'site_admin': False},
+        'labels': [{'id': 1, 'name': 'bug', 'default': False}],
+        '_sdc_repository': 'org/repo',
+    } for index in range(count)]
+
+def transform_per_record(stream_catalog, records):
+    """
+    Transform each record with its own transformer and metadata map.
+    """
+    for record in records:
+        with singer.Transformer() as transformer:
+            transformer.transform(record, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
+
+def transform_with_context(stream_catalog, records):
+    """
+    Transform the records with the context of the stream.
+    """
+    stream_context = StreamContext(stream_catalog)
+    for record in records:
+        stream_context.transform(record)
+
+def run(name, function, stream_catalog, records):
+    """
+    Run the benchmark and print the throughput.
+    """
+    start = time.perf_counter()
+    function(stream_catalog, records)
+    elapsed = time.perf_counter() - start
+    print('{:<24} {:>10.0f} records/sec ({:.2f}s)'.format(name, len(records) / elapsed, elapsed))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    stream_catalog = get_stream_catalog()
+    records = get_records(args.records)
+    run('transformer per record', transform_per_record, stream_catalog, records)
+    run('stream context', transform_with_context, stream_catalog, records)
+
+if __name__ == '__main__':
+    main()
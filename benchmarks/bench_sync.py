@@ -0,0 +1,262 @@
+"""
+Measure the throughput of the sync paths of the tap with a fake client serving synthetic pages built from the schemas:
+the sync of a full table, an incremental and an incremental ordered stream, the child records of the pull requests,
+the translation of the state, the loading of the schemas and the discovery.
+
+Each benchmark runs in its own process, to report its peak RSS, and the results are saved as JSON with the commit,
+so that the results of two commits can be compared.
+
+Usage: python -m benchmarks.bench_sync [--pages 20] [--per-page 100] [--parents 200] [--child-records 10]
+                                       [--repositories 1000] [--iterations 5] [--config compiled_transform=true ...]
+                                       [--benchmarks full_table incremental ...] [--output results.json]
+                                       [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import singer
+from singer import metadata
+from tap_github.client import GithubClient, set_query_param, get_page_number
+from tap_github.discover import discover
+from tap_github.schema import get_schemas, load_schema_references
+from tap_github.streams import STREAMS, SyncContext
+from tap_github.sync import translate_state
+from benchmarks.bench_transform import get_value
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPO_PATH = 'org/repo'
+START_DATE = '2021-01-01T00:00:00Z'
+# The stream synced by the benchmark of each type of stream.
+SYNC_BENCHMARKS = {
+    'full_table': 'releases',
+    'incremental': 'commits',
+    'incremental_ordered': 'issues',
+}
+BENCHMARKS = [*SYNC_BENCHMARKS, 'child_records', 'translate_state', 'get_schemas', 'discover']
+
+class FakeResponse:
+    """
+    A page of records, parsed from its body like the responses of requests.
+    """
+    def __init__(self, url, body, links):
+        self.url = url
+        self.status_code = 200
+        self.headers = {}
+        self.body = body
+        self.links = links
+
+    def json(self):
+        return json.loads(self.body)
+
+class FakeClient(GithubClient):
+    """
+    A client serving the pages of each stream from the schema of the stream, counting the requests and the records.
+    """
+    def __init__(self, config, page_count, per_page):
+        super().__init__(dict(config, access_token='TOKEN'))
+        self.page_count = page_count
+        self.per_page = per_page
+        self.pages = {}
+        self.requests = 0
+        self.records = 0
+
+    def build_pages(self, stream_catalog):
+        """
+        Build the serialized pages of the stream, before the benchmark.
+        """
+        for page in range(1, self.page_count + 1):
+            start = (page - 1) * self.per_page
+            self.pages[stream_catalog['tap_stream_id'], page] = json.dumps(
+                [get_value(stream_catalog['schema'], index) for index in range(start, start + self.per_page)])
+
+    def authed_get(self, source, url, headers={}, stream="", should_skip_404=True):
+        self.requests += 1
+        if source not in STREAMS:
+            return FakeResponse(url, '[]', {})
+        page = get_page_number(url) or 1
+        links = {'last': {'url': set_query_param(url, 'page', self.page_count)}}
+        if page < self.page_count:
+            links['next'] = {'url': set_query_param(url, 'page', page + 1)}
+        self.records += self.per_page
+        return FakeResponse(url, self.pages[source, page], links)
+
+def get_stream_catalog(stream):
+    """
+    Return the catalog entry of the stream with all the fields selected.
+    """
+    schemas, field_metadata = get_schemas()
+    schema = singer.resolve_schema_references(schemas[stream], load_schema_references())
+    mdata = metadata.to_map(field_metadata[stream])
+    for breadcrumb in mdata:
+        mdata[breadcrumb]['selected'] = True
+    return {'tap_stream_id': stream, 'schema': schema, 'metadata': metadata.to_list(mdata)}
+
+def bench_sync(args, stream):
+    """
+    Sync all the pages of the stream, and return the records synced, the seconds and the requests.
+    """
+    config = parse_config(args.config)
+    client = FakeClient(config, args.pages, args.per_page)
+    stream_catalog = get_stream_catalog(stream)
+    client.build_pages(stream_catalog)
+    context = SyncContext([stream_catalog], config)
+
+    start = time.perf_counter()
+    STREAMS[stream]().sync_endpoint(client, {}, context, REPO_PATH, START_DATE, [stream], [stream])
+    return client.records, 'records', time.perf_counter() - start, client.requests
+
+def bench_child_records(args):
+    """
+    Sync the reviews of the pull requests, and return the records synced, the seconds and the requests.
+    """
+    config = parse_config(args.config)
+    client = FakeClient(config, 1, args.child_records)
+    stream_catalog = get_stream_catalog('reviews')
+    client.build_pages(stream_catalog)
+    context = SyncContext([get_stream_catalog('pull_requests'), stream_catalog], config)
+    parent = STREAMS['pull_requests']()
+
+    start = time.perf_counter()
+    for index in range(args.parents):
+        parent_record = {'id': index, 'number': index + 1, 'updated_at': START_DATE}
+        parent.get_child_records(client, context, 'reviews', (index + 1,), REPO_PATH, {}, START_DATE, START_DATE,
+                                 ['pull_requests', 'reviews'], ['pull_requests', 'reviews'], parent_record = parent_record)
+    return client.records, 'records', time.perf_counter() - start, client.requests
+
+def bench_translate_state(args):
+    """
+    Translate a state with the bookmarks of all the streams of many repositories, and return the repositories and
+    the seconds.
+    """
+    catalog = {'streams': [{'tap_stream_id': stream} for stream in STREAMS]}
+    repositories = ['org/repo{}'.format(index) for index in range(args.repositories)]
+    state = {'bookmarks': {repository: {stream: {'since': START_DATE} for stream in STREAMS} for repository in repositories}}
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        translate_state(state, catalog, repositories)
+    return args.repositories * args.iterations, 'repositories', time.perf_counter() - start, 0
+
+def bench_get_schemas(args):
+    """
+    Load the schemas and their metadata, and return the calls and the seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        get_schemas()
+    return args.iterations, 'calls', time.perf_counter() - start, 0
+
+def bench_discover(args):
+    """
+    Run the discovery, and return the calls, the seconds and the requests.
+    """
+    client = FakeClient({'repository': REPO_PATH}, 1, 0)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        discover(client)
+    return args.iterations, 'calls', time.perf_counter() - start, client.requests
+
+def parse_config(values):
+    """
+    Return the config of the tap from the `key=value` values.
+    """
+    return dict(value.split('=', 1) for value in values or [])
+
+def run_benchmark(name, args):
+    """
+    Run the benchmark, with the output of the tap discarded, and return its result.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if name in SYNC_BENCHMARKS:
+            count, unit, elapsed, requests = bench_sync(args, SYNC_BENCHMARKS[name])
+        else:
+            count, unit, elapsed, requests = globals()['bench_' + name](args)
+    # The peak RSS is in kilobytes on Linux and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    if peak_rss and sys.platform == 'darwin':
+        peak_rss //= 1024
+    return {'count': count, 'unit': unit, 'seconds': round(elapsed, 4), 'per_second': round(count / elapsed, 1),
+            'requests': requests, 'peak_rss_kb': peak_rss}
+
+def run_in_process(name, args):
+    """
+    Run the benchmark in a new process, so the peak RSS is its own, and return its result.
+    """
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_benchmark, (name, args))
+
+def get_commit():
+    """
+    Return the commit of the tree, if it is a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, check=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of the throughput of each benchmark from the baseline, and return the benchmarks slower by more
+    than the threshold.
+    """
+    regressions = []
+    print('Compared to {}:'.format(baseline.get('commit')))
+    for name, result in results.items():
+        baseline_result = baseline['results'].get(name)
+        if not baseline_result:
+            continue
+        change = result['per_second'] / baseline_result['per_second'] - 1
+        regression = change < -threshold
+        if regression:
+            regressions.append(name)
+        print('  {:<20} {:>+8.1%}{}'.format(name, change, '  REGRESSION' if regression else ''))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--parents', type=int, default=200)
+    parser.add_argument('--child-records', type=int, default=10)
+    parser.add_argument('--repositories', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--config', nargs='*', help='Config of the tap, e.g. compiled_transform=true')
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument('--output', help='Save the results as JSON')
+    parser.add_argument('--compare', help='Compare the results with the JSON results of another run')
+    parser.add_argument('--threshold', type=float, default=0.1, help='The slowdown reported as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.benchmarks:
+        result = results[name] = run_in_process(name, args)
+        print('{:<20} {:>10.0f} {}/sec ({:.2f}s, {} requests, peak RSS {} MB)'.format(
+            name, result['per_second'], result['unit'], result['seconds'], result['requests'],
+            result['peak_rss_kb'] // 1024 if result['peak_rss_kb'] else '-'))
+
+    run = {'commit': get_commit(), 'python': platform.python_version(), 'created_at': datetime.datetime.now().isoformat(),
+           'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'threshold')},
+           'results': results}
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(run, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if compare(results, json.load(baseline_file), args.threshold):
+                sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the throughput of the transformer of singer and of the transforms compiled from the schemas,
+on synthetic records with all the fields of the schema, and with the records projected on a few selected fields.
+
+Usage: python -m benchmarks.bench_transform [--records 20000] [--streams pull_requests issue_events] [--selected-fields 5]
+"""
+import argparse
+import time
+from singer import metadata
+from tap_github.schema import get_schemas
+from tap_github.streams import StreamContext, STREAMS
+
+DEFAULT_STREAMS = ['pull_requests', 'issue_events']
+
+def get_value(schema, index):
+    """
+    Return a value with every field of the schema.
+    """
+    if 'anyOf' in schema:
+        return get_value(schema['anyOf'][0], index)
+    types = schema.get('type', ['string'])
+    types = types if isinstance(types, list) else [types]
+    typ = ([typ for typ in types if typ != 'null'] or ['null'])[0]
+
+    if schema.get('format') == 'date-time':
+        return '2022-01-{:02d}T00:00:00Z'.format(index % 28 + 1)
+    if typ == 'object':
+        return {key: get_value(subschema, index) for key, subschema in schema.get('properties', {}).items()}
+    if typ == 'array':
+        return [get_value(schema.get('items', {}), index) for _ in range(2)]
+    return {'string': 'https://api.github.com/repos/org/repo/{}'.format(index), 'integer': index, 'number': index / 2,
+            'boolean': index % 2 == 0, 'null': None}.get(typ)
+
+def run(name, stream_context, records):
+    """
+    Transform copies of the records and return the throughput.
+    """
+    records = [dict(record) for record in records]
+    start = time.perf_counter()
+    for record in records:
+        stream_context.transform(stream_context.project(record))
+    elapsed = time.perf_counter() - start
+    print('  {:<14} {:>10.0f} records/sec ({:.2f}s)'.format(name, len(records) / elapsed, elapsed))
+    return len(records) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--streams', nargs='+', default=DEFAULT_STREAMS)
+    parser.add_argument('--selected-fields', type=int, default=5)
+    args = parser.parse_args()
+
+    schemas, field_metadata = get_schemas()
+    for stream_name in args.streams:
+        stream_catalog = {'schema': schemas[stream_name], 'metadata': field_metadata[stream_name]}
+        mdata = metadata.to_map(field_metadata[stream_name])
+        records = [get_value(schemas[stream_name], index) for index in range(args.records)]
+
+        start = time.perf_counter()
+        compiled_context = StreamContext(stream_catalog, {'compiled_transform': 'true'})
+        print('{} ({} fields, compiled in {:.3f}s)'.format(stream_name, len(mdata) - 1, time.perf_counter() - start))
+
+        singer_throughput = run('singer', StreamContext(stream_catalog), records)
+        compiled_throughput = run('compiled', compiled_context, records)
+        print('  speedup        {:>10.1f}x'.format(compiled_throughput / singer_throughput))
+
+        # Deselect all but the first fields of the schema.
+        for breadcrumb in list(mdata)[args.selected_fields + 1:]:
+            mdata[breadcrumb]['selected'] = False
+        projected_catalog = {'schema': schemas[stream_name], 'metadata': metadata.to_list(mdata)}
+        internal_fields = STREAMS[stream_name]().get_internal_fields()
+        singer_projected_throughput = run('singer+proj', StreamContext(projected_catalog, {}, internal_fields), records)
+        projected_throughput = run('compiled+proj', StreamContext(projected_catalog, {'compiled_transform': 'true'}, internal_fields), records)
+        print('  speedup        {:>10.1f}x with {} selected fields'.format(projected_throughput / singer_throughput, args.selected_fields))
+
+if __name__ == '__main__':
+    main()
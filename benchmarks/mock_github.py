@@ -0,0 +1,543 @@
+"""
+A local stand-in for the REST API of GitHub, serving synthetic organizations, repositories and their records in
+configurable volumes, to benchmark the tap offline by pointing its `base_url` at it.
+
+It emulates the pagination with `per_page`, `page` and the `Link` header, the `since` filter, the `X-RateLimit-*`
+headers with a budget per token, the `ETag` validators with 304 responses, and can inject latency, 5xx errors and
+secondary rate limits. The records are generated from their index, so large volumes don't use any memory.
+
+Usage: python -m benchmarks.mock_github [--port 8000] [--orgs 1] [--repos 10] [--volume stargazers=400 ...]
+                                         [--latency-ms 0] [--error-rate 0] [--secondary-rate-limit-rate 0]
+
+The counts of the requests served are available at `/_mock/stats`.
+"""
+import argparse
+import collections
+import datetime
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+BASE_TIME = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+# The records of a listing are created one minute apart, the last one being the most recent.
+RECORD_INTERVAL = datetime.timedelta(minutes=1)
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+# The number of records of each listing, by repository, pull request, organization or team.
+DEFAULT_VOLUMES = {
+    'pull_requests': 20,
+    'reviews': 2,
+    'review_comments': 2,
+    'pr_commits': 3,
+    'commits': 50,
+    'issues': 20,
+    'issue_comments': 20,
+    'issue_events': 20,
+    'events': 20,
+    'commit_comments': 5,
+    'stargazers': 50,
+    'collaborators': 5,
+    'assignees': 5,
+    'releases': 5,
+    'labels': 10,
+    'milestones': 3,
+    'projects': 1,
+    'project_columns': 3,
+    'project_cards': 5,
+    'teams': 3,
+    'team_members': 5,
+}
+
+def format_time(index):
+    """
+    Return the date-time of the record created at the index of its listing.
+    """
+    return (BASE_TIME + index * RECORD_INTERVAL).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def get_first_index(since):
+    """
+    Return the index of the first record created at or after `since`.
+    """
+    if not since:
+        return 0
+    since_time = datetime.datetime.strptime(since[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+    return max(0, math.ceil((since_time - BASE_TIME) / RECORD_INTERVAL))
+
+def get_user(index):
+    """
+    Return a user.
+    """
+    return {'login': 'user{}'.format(index), 'id': index + 1, 'type': 'User', 'site_admin': False}
+
+class Listing:
+    """
+    A listing of `count` records, built by `get_record` from the index of the record, and ordered from the most recent
+    one when it is `timed`, in which case the `since` filter applies.
+    """
+    def __init__(self, count, get_record, timed=True):
+        self.count = count
+        self.get_record = get_record
+        self.timed = timed
+
+    def get_page(self, page, per_page, since=None):
+        """
+        Return the records of the page and the number of pages.
+        """
+        first_index = get_first_index(since) if self.timed else 0
+        count = max(0, self.count - first_index)
+        start = (page - 1) * per_page
+        positions = range(start, min(start + per_page, count))
+        if self.timed:
+            records = [self.get_record(self.count - 1 - position) for position in positions]
+        else:
+            records = [self.get_record(position) for position in positions]
+        return records, max(1, math.ceil(count / per_page))
+
+class MockGithub:
+    """
+    The stand-in server, serving `orgs` organizations of `repos` repositories named `org<n>/repo<n>`.
+    """
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, orgs=1, repos=10, volumes=None, latency=0.0, error_rate=0.0, secondary_rate_limit_rate=0.0,
+                 retry_after=1, rate_limit=5000, rate_limit_window=3600, seed=0, host='127.0.0.1', port=0):
+        self.orgs = orgs
+        self.repos = repos
+        self.volumes = dict(DEFAULT_VOLUMES, **(volumes or {}))
+        self.latency = latency
+        self.error_rate = error_rate
+        self.secondary_rate_limit_rate = secondary_rate_limit_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # The remaining requests and the reset time of each token.
+        self.budgets = {}
+        self.stats = collections.Counter()
+        self.server = ThreadingHTTPServer((host, port), get_handler(self))
+        self.server.daemon_threads = True
+        self.thread = None
+        self.routes = self.get_routes()
+
+    @property
+    def base_url(self):
+        """
+        Return the url to set as the `base_url` of the tap.
+        """
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def get_repositories(self):
+        """
+        Return the `repository` config of the tap for all the repositories.
+        """
+        return ' '.join('org{}/repo{}'.format(org, repo) for org in range(self.orgs) for repo in range(self.repos))
+
+    def start(self):
+        """
+        Serve the requests from a background thread, and return the base url.
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-github', daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Stop the server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.stop()
+
+    def get_repo_index(self, org, repo):
+        """
+        Return the index of the repository among all the repositories, or None if it does not exist.
+        """
+        org, repo = int(org), int(repo)
+        if org >= self.orgs or repo >= self.repos:
+            return None
+        return org * self.repos + repo
+
+    def get_routes(self):
+        """
+        Return the (pattern, name, handler) of the paths, the handler returning a `Listing`, a record or None if not found.
+        """
+        repo = r'/repos/org(?P<org>\d+)/repo(?P<repo>\d+)'
+        team = r'/orgs/org(?P<org>\d+)/teams/team(?P<team>\d+)'
+        routes = [
+            (r'/rate_limit', 'rate_limit', self.get_rate_limit),
+            (r'/orgs/org(?P<org>\d+)/repos', 'repositories', self.get_repositories_listing),
+            (r'/orgs/org(?P<org>\d+)/teams', 'teams', self.get_teams),
+            (team + r'/members', 'team_members', self.get_team_members),
+            (team + r'/memberships/(?P<login>[^/]+)', 'team_memberships', self.get_team_membership),
+            (repo + r'/pulls', 'pull_requests', self.get_pull_requests),
+            (repo + r'/pulls/comments', 'review_comments', self.get_repo_review_comments),
+            (repo + r'/pulls/(?P<number>\d+)', 'pull_request', self.get_pull_request),
+            (repo + r'/pulls/(?P<number>\d+)/reviews', 'reviews', self.get_reviews),
+            (repo + r'/pulls/(?P<number>\d+)/comments', 'review_comments', self.get_review_comments),
+            (repo + r'/pulls/(?P<number>\d+)/commits', 'pr_commits', self.get_pr_commits),
+            (repo + r'/commits', 'commits', self.get_commits),
+            (repo + r'/issues', 'issues', self.get_issues),
+            (repo + r'/issues/comments', 'issue_comments', self.get_issue_comments),
+            (repo + r'/issues/events', 'issue_events', self.get_issue_events),
+            (repo + r'/events', 'events', self.get_events),
+            (repo + r'/comments', 'commit_comments', self.get_commit_comments),
+            (repo + r'/stargazers', 'stargazers', self.get_stargazers),
+            (repo + r'/collaborators', 'collaborators', self.get_users_listing('collaborators')),
+            (repo + r'/assignees', 'assignees', self.get_users_listing('assignees')),
+            (repo + r'/releases', 'releases', self.get_releases),
+            (repo + r'/labels', 'labels', self.get_labels),
+            (repo + r'/milestones', 'milestones', self.get_milestones),
+            (repo + r'/projects', 'projects', self.get_projects),
+            (r'/projects/(?P<project>\d+)/columns', 'project_columns', self.get_project_columns),
+            (r'/projects/columns/(?P<column>\d+)/cards', 'project_cards', self.get_project_cards),
+        ]
+        return [(re.compile(pattern + '$'), name, handler) for pattern, name, handler in routes]
+
+    # The records of each route.
+
+    def get_rate_limit(self, token):
+        remaining, reset, _ = self.get_budget(token, charge=False)
+        return {'resources': {'core': {'limit': self.rate_limit, 'remaining': remaining, 'reset': reset,
+                                       'used': self.rate_limit - remaining}}}
+
+    def get_repositories_listing(self, org, token):
+        if int(org) >= self.orgs:
+            return None
+        def get_repository(index):
+            full_name = 'org{}/repo{}'.format(org, index)
+            return {'id': int(org) * self.repos + index + 1, 'name': 'repo{}'.format(index), 'full_name': full_name,
+                    'pushed_at': format_time(index), 'updated_at': format_time(index), 'archived': False}
+        return Listing(self.repos, get_repository, timed=False)
+
+    def get_teams(self, org, token):
+        if int(org) >= self.orgs:
+            return None
+        return Listing(self.volumes['teams'], lambda index: {'id': int(org) * 1000 + index + 1, 'slug': 'team{}'.format(index),
+                                                               'name': 'Team {}'.format(index)}, timed=False)
+
+    def get_team_members(self, org, team, token):
+        if int(org) >= self.orgs or int(team) >= self.volumes['teams']:
+            return None
+        return Listing(self.volumes['team_members'], get_user, timed=False)
+
+    def get_team_membership(self, org, team, login, token):
+        if int(org) >= self.orgs or int(team) >= self.volumes['teams']:
+            return None
+        return {'url': '{}/orgs/org{}/teams/team{}/memberships/{}'.format(self.base_url, org, team, login),
+                'role': 'member', 'state': 'active'}
+
+    def get_pull_request_record(self, repo_index, org, repo, index):
+        number = index + 1
+        return {'id': repo_index * 1000000 + number, 'number': number, 'state': 'open', 'title': 'Pull request {}'.format(number),
+                'user': get_user(index % 100), 'created_at': format_time(index), 'updated_at': format_time(index),
+                'head': {'sha': hashlib.sha1('org{}/repo{}/{}'.format(org, repo, number).encode()).hexdigest(), 'ref': 'branch'},
+                'base': {'sha': '0' * 40, 'ref': 'main'},
+                'url': '{}/repos/org{}/repo{}/pulls/{}'.format(self.base_url, org, repo, number)}
+
+    def get_pull_requests(self, org, repo, token):
+        repo_index = self.get_repo_index(org, repo)
+        if repo_index is None:
+            return None
+        return Listing(self.volumes['pull_requests'], lambda index: self.get_pull_request_record(repo_index, org, repo, index))
+
+    def get_pull_request(self, org, repo, number, token):
+        repo_index = self.get_repo_index(org, repo)
+        if repo_index is None or not 0 < int(number) <= self.volumes['pull_requests']:
+            return None
+        return self.get_pull_request_record(repo_index, org, repo, int(number) - 1)
+
+    def get_pull_request_children(self, name, org, repo, number, get_record):
+        repo_index = self.get_repo_index(org, repo)
+        if repo_index is None or not 0 < int(number) <= self.volumes['pull_requests']:
+            return None
+        parent_id = repo_index * 1000000 + int(number)
+        return Listing(self.volumes[name], lambda index: get_record(parent_id, index))
+
+    def get_reviews(self, org, repo, number, token):
+        return self.get_pull_request_children('reviews', org, repo, number, lambda parent_id, index: {
+            'id': parent_id * 100 + index, 'state': 'APPROVED', 'body': 'Review {}'.format(index),
+            'user': get_user(index), 'submitted_at': format_time(index)})
+
+    def get_review_comment_record(self, org, repo, parent_id, number, index):
+        return {'id': parent_id * 100 + index, 'body': 'Comment {}'.format(index), 'user': get_user(index),
+                'created_at': format_time(index), 'updated_at': format_time(index),
+                'pull_request_url': '{}/repos/org{}/repo{}/pulls/{}'.format(self.base_url, org, repo, number)}
+
+    def get_review_comments(self, org, repo, number, token):
+        return self.get_pull_request_children('review_comments', org, repo, number, lambda parent_id, index:
+                                              self.get_review_comment_record(org, repo, parent_id, number, index))
+
+    def get_repo_review_comments(self, org, repo, token):
+        repo_index = self.get_repo_index(org, repo)
+        if repo_index is None:
+            return None
+        per_pull_request = self.volumes['review_comments']
+        def get_record(index):
+            number = index // max(per_pull_request, 1) + 1
+            return self.get_review_comment_record(org, repo, repo_index * 1000000 + number, number, index)
+        return Listing(self.volumes['pull_requests'] * per_pull_request, get_record)
+
+    def get_pr_commits(self, org, repo, number, token):
+        return self.get_pull_request_children('pr_commits', org, repo, number, lambda parent_id, index: {
+            'sha': hashlib.sha1('{}/{}'.format(parent_id, index).encode()).hexdigest(),
+            'commit': {'message': 'Commit {}'.format(index), 'author': {'name': 'user', 'date': format_time(index)},
+                       'committer': {'name': 'user', 'date': format_time(index)}}})
+
+    def get_repo_listing(self, name, org, repo, get_record, timed=True):
+        repo_index = self.get_repo_index(org, repo)
+        if repo_index is None:
+            return None
+        return Listing(self.volumes[name], lambda index: get_record(repo_index * 1000000 + index + 1, index), timed)
+
+    def get_commits(self, org, repo, token):
+        return self.get_repo_listing('commits', org, repo, lambda record_id, index: {
+            'sha': hashlib.sha1(str(record_id).encode()).hexdigest(),
+            'commit': {'message': 'Commit {}'.format(index), 'author': {'name': 'user', 'date': format_time(index)},
+                       'committer': {'name': 'user', 'date': format_time(index)}},
+            'author': get_user(index % 100), 'committer': get_user(index % 100)})
+
+    def get_issues(self, org, repo, token):
+        return self.get_repo_listing('issues', org, repo, lambda record_id, index: {
+            'id': record_id, 'number': index + 1, 'title': 'Issue {}'.format(index), 'state': 'open', 'user': get_user(index % 100),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_issue_comments(self, org, repo, token):
+        return self.get_repo_listing('issue_comments', org, repo, lambda record_id, index: {
+            'id': record_id, 'body': 'Comment {}'.format(index), 'user': get_user(index % 100),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_issue_events(self, org, repo, token):
+        return self.get_repo_listing('issue_events', org, repo, lambda record_id, index: {
+            'id': record_id, 'event': 'labeled', 'actor': get_user(index % 100), 'created_at': format_time(index)})
+
+    def get_events(self, org, repo, token):
+        return self.get_repo_listing('events', org, repo, lambda record_id, index: {
+            'id': str(record_id), 'type': 'PushEvent', 'actor': get_user(index % 100), 'created_at': format_time(index)})
+
+    def get_commit_comments(self, org, repo, token):
+        return self.get_repo_listing('commit_comments', org, repo, lambda record_id, index: {
+            'id': record_id, 'body': 'Comment {}'.format(index), 'user': get_user(index % 100),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_stargazers(self, org, repo, token):
+        return self.get_repo_listing('stargazers', org, repo, lambda record_id, index: {
+            'starred_at': format_time(index), 'user': get_user(index)}, timed=False)
+
+    def get_users_listing(self, name):
+        return lambda org, repo, token: self.get_repo_listing(name, org, repo, lambda record_id, index: get_user(index), timed=False)
+
+    def get_releases(self, org, repo, token):
+        return self.get_repo_listing('releases', org, repo, lambda record_id, index: {
+            'id': record_id, 'tag_name': 'v{}'.format(index), 'created_at': format_time(index)})
+
+    def get_labels(self, org, repo, token):
+        return self.get_repo_listing('labels', org, repo, lambda record_id, index: {
+            'id': record_id, 'name': 'label{}'.format(index)}, timed=False)
+
+    def get_milestones(self, org, repo, token):
+        return self.get_repo_listing('milestones', org, repo, lambda record_id, index: {
+            'id': record_id, 'number': index + 1, 'title': 'Milestone {}'.format(index),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_projects(self, org, repo, token):
+        return self.get_repo_listing('projects', org, repo, lambda record_id, index: {
+            'id': record_id, 'name': 'Project {}'.format(index), 'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_project_columns(self, project, token):
+        return Listing(self.volumes['project_columns'], lambda index: {
+            'id': int(project) * 100 + index, 'name': 'Column {}'.format(index),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    def get_project_cards(self, column, token):
+        return Listing(self.volumes['project_cards'], lambda index: {
+            'id': int(column) * 100 + index, 'note': 'Card {}'.format(index),
+            'created_at': format_time(index), 'updated_at': format_time(index)})
+
+    # The emulation of the API.
+
+    def get_budget(self, token, charge=True):
+        """
+        Return the remaining requests and the reset time of the token, after charging the request if `charge`, and whether
+        the request is within the budget.
+        """
+        with self.lock:
+            now = int(time.time())
+            remaining, reset = self.budgets.get(token, (self.rate_limit, now + self.rate_limit_window))
+            if now >= reset:
+                remaining, reset = self.rate_limit, now + self.rate_limit_window
+            allowed = remaining > 0
+            if charge and allowed:
+                remaining -= 1
+            self.budgets[token] = (remaining, reset)
+            return remaining, reset, allowed
+
+    def inject(self, rate):
+        """
+        Return True at the rate.
+        """
+        if not rate:
+            return False
+        with self.lock:
+            return self.random.random() < rate
+
+    def count(self, *keys):
+        """
+        Count the request in the stats.
+        """
+        with self.lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def handle(self, handler):
+        """
+        Return the (status code, headers, body) of the response to the GET request.
+        """
+        url = urlsplit(handler.path)
+        query = dict(parse_qsl(url.query))
+        if url.path == '/_mock/stats':
+            return 200, {}, json.dumps(dict(self.stats)).encode('utf-8')
+
+        token = (handler.headers.get('Authorization') or '').split(' ')[-1]
+        if self.latency:
+            time.sleep(self.latency)
+        if self.inject(self.secondary_rate_limit_rate):
+            self.count('requests', 'secondary_rate_limits')
+            return 403, {'Retry-After': str(self.retry_after)}, json.dumps(
+                {'message': 'You have exceeded a secondary rate limit. Please wait a few minutes before you try again.'}).encode('utf-8')
+        if self.inject(self.error_rate):
+            self.count('requests', 'errors')
+            return 502, {}, b'{"message": "Server Error"}'
+
+        for pattern, name, route_handler in self.routes:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            name, route_handler, match = None, None, None
+
+        rate_limit_headers = {}
+        if name != 'rate_limit':
+            remaining, reset, allowed = self.get_budget(token)
+            rate_limit_headers = {'X-RateLimit-Limit': str(self.rate_limit), 'X-RateLimit-Remaining': str(remaining),
+                                  'X-RateLimit-Reset': str(reset), 'X-RateLimit-Used': str(self.rate_limit - remaining),
+                                  'X-RateLimit-Resource': 'core'}
+            if not allowed:
+                self.count('requests', 'rate_limited')
+                return 403, rate_limit_headers, b'{"message": "API rate limit exceeded."}'
+
+        result = route_handler(token=token, **match.groupdict()) if route_handler else None
+        if result is None:
+            self.count('requests', 'not_found')
+            return 404, rate_limit_headers, b'{"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}'
+
+        headers = dict(rate_limit_headers)
+        if isinstance(result, Listing):
+            per_page = min(int(query.get('per_page') or DEFAULT_PER_PAGE), MAX_PER_PAGE)
+            page = max(int(query.get('page') or 1), 1)
+            records, page_count = result.get_page(page, per_page, query.get('since'))
+            headers['Link'] = get_link_header(handler, url, query, page, page_count)
+            body = json.dumps(records).encode('utf-8')
+        else:
+            body = json.dumps(result).encode('utf-8')
+
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        headers['ETag'] = etag
+        if handler.headers.get('If-None-Match') == etag:
+            self.count('requests', 'not_modified', 'route:' + name)
+            return 304, headers, b''
+        self.count('requests', 'route:' + name)
+        return 200, headers, body
+
+def get_link_header(handler, url, query, page, page_count):
+    """
+    Return the `Link` header of the page, with the `next`, `last`, `first` and `prev` pages.
+    """
+    base = 'http://{}{}'.format(handler.headers.get('Host'), url.path)
+    links = []
+    for rel, link_page in [('next', page + 1), ('last', page_count), ('first', 1), ('prev', page - 1)]:
+        if (rel in ('next', 'last') and page < page_count) or (rel in ('first', 'prev') and page > 1):
+            links.append('<{}?{}>; rel="{}"'.format(base, urlencode(dict(query, page=link_page)), rel))
+    return ', '.join(links)
+
+def get_handler(mock_github):
+    """
+    Return the request handler class of the server.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # The headers and the body are sent separately, which the delayed ACKs would hold for each keep-alive request.
+        disable_nagle_algorithm = True
+
+        def do_GET(self): # pylint: disable=invalid-name
+            status_code, headers, body = mock_github.handle(self)
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                if value:
+                    self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+def parse_volumes(values):
+    """
+    Return the volumes from the `name=count` values.
+    """
+    volumes = {}
+    for value in values or []:
+        name, count = value.split('=', 1)
+        if name not in DEFAULT_VOLUMES:
+            raise argparse.ArgumentTypeError('Unknown volume {}, expected one of {}'.format(name, sorted(DEFAULT_VOLUMES)))
+        volumes[name] = int(count)
+    return volumes
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--orgs', type=int, default=1)
+    parser.add_argument('--repos', type=int, default=10, help='Repositories by organization')
+    parser.add_argument('--volume', action='append', help='Records by listing, e.g. stargazers=400')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--secondary-rate-limit-rate', type=float, default=0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--rate-limit-window', type=int, default=3600)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mock_github = MockGithub(args.orgs, args.repos, parse_volumes(args.volume), args.latency_ms / 1000, args.error_rate,
+                             args.secondary_rate_limit_rate, args.retry_after, args.rate_limit, args.rate_limit_window,
+                             args.seed, args.host, args.port)
+    print('Serving {} repositories at {}'.format(args.orgs * args.repos, mock_github.base_url))
+    print('Config: {}'.format(json.dumps({'base_url': mock_github.base_url, 'repository': 'org0/*' if args.orgs == 1 else
+                                          mock_github.get_repositories(), 'access_token': 'TOKEN', 'start_date': '2021-01-01T00:00:00Z'})))
+    try:
+        mock_github.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock_github.server.server_close()
+
+if __name__ == '__main__':
+    main()
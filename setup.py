@@ -15,11 +15,20 @@ setup(name='tap-github',
           'backoff==1.8.0'
       ],
       extras_require={
+          'async': [
+              'aiohttp==3.8.1'
+          ],
+          'orjson': [
+              'orjson==3.8.3'
+          ],
           'dev': [
               'pylint==2.6.2',
               'ipdb',
               'nose',
-              'requests-mock==1.9.3'
+              'requests-mock==1.9.3',
+              'graphql-core==3.2.3',
+              'aiohttp==3.8.1',
+              'orjson==3.8.3'
           ]
       },
       entry_points='''
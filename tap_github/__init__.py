@@ -4,6 +4,8 @@ import singer
 from tap_github.discover import discover as _discover
 from tap_github.client import GithubClient
 from tap_github.sync import sync as _sync
+from tap_github import output, profiling
+from tap_github.state import load_state, throttled_state
 
 LOGGER = singer.get_logger()
 
@@ -22,6 +24,8 @@ def main():
     """
     Run discover mode or sync mode.
     """
+    # The `--profile` option is not known to singer.
+    profile_dir = profiling.pop_profile_arg(sys.argv)
     args = singer.utils.parse_args(REQUIRED_CONFIG_KEYS)
 
     config = args.config
@@ -31,12 +35,18 @@ def main():
     state = {}
     if args.state:
         state = args.state
-
-    if args.discover:
-        do_discover(client)
-    else:
-        catalog = args.properties if args.properties else _discover(client)
-        _sync(client, config, state, catalog)
+    elif config.get('state_db_path'):
+        # Resume from the state saved by the previous sync.
+        state = load_state(config['state_db_path'])
+
+    with profiling.profiled(profile_dir, config):
+        if args.discover:
+            do_discover(client)
+        else:
+            catalog = args.properties if args.properties else _discover(client)
+            with output.buffered_output(config), output.grouped_records(config), output.schemas_once(), \
+                    throttled_state(config):
+                _sync(client, config, state, catalog)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+import backoff
+import simplejson
+import singer
+from singer import metrics
+from requests.utils import parse_header_links
+from tap_github.rest import (DEFAULT_SLEEP_SECONDS, REQUEST_TIMEOUT, GithubException, Server5xxError, TooManyRequests,
+                             SecondaryRateLimitExceeded, get_token_pool_sleep_seconds, check_response, get_next_url)
+from tap_github.rate_limit import TokenPool, SecondaryRateLimitCoolDown
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+LOGGER = singer.get_logger()
+
+# Set default number of requests running at the same time
+DEFAULT_MAX_IN_FLIGHT_REQUESTS = 10
+
+# Same number of tries as the backoff of `GithubClient.authed_get`
+MAX_TRIES = 5
+
+class AsyncResponse:
+    """
+    The response of the asyncio engine, exposing the part of `requests.Response` used by the tap.
+    """
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def links(self):
+        """
+        Return the parsed `Link` header of the response, keyed by the relation.
+        """
+        links = {}
+        for link in parse_header_links(self.headers.get('Link', '')):
+            links[link.get('rel') or link.get('url')] = link
+        return links
+
+    def json(self):
+        """
+        Return the JSON decoded body of the response.
+        """
+        return simplejson.loads(self.content)
+
+class AsyncGithubClient: # pylint: disable=too-many-instance-attributes
+    """
+    The client class used for making concurrent REST calls to the Github API with asyncio.
+    It keeps the contract of `GithubClient.authed_get`: the same exceptions, 404 skipping,
+    rate limit throttling and backoff, and runs its event loop in a dedicated thread.
+    """
+    def __init__(self, config, etag_cache = None, token_pool = None, cool_down = None):
+        if aiohttp is None:
+            raise GithubException("The `aiohttp` package is required to use `max_in_flight_requests`, please install tap-github[async].")
+
+        self.config = config
+        self.max_sleep_seconds = self.config.get('max_sleep_seconds', DEFAULT_SLEEP_SECONDS)
+        self.max_in_flight_requests = self.get_max_in_flight_requests()
+        self.etag_cache = etag_cache
+        # Share the rate limit budgets of the tokens with the blocking client.
+        self.token_pool = token_pool or TokenPool([config['access_token']])
+        self.cool_down = cool_down or SecondaryRateLimitCoolDown()
+        self.session = None
+        self.semaphore = None
+        self.loop = None
+        self.loop_thread = None
+        self.loop_lock = threading.Lock()
+
+    def get_max_in_flight_requests(self):
+        """
+        Get the number of concurrent requests from the config, if not valid use the default 10.
+        """
+        max_in_flight_requests = self.config.get('max_in_flight_requests')
+
+        # Only return the value if it is passed in the config and the value is not 0, "0" or ""
+        if max_in_flight_requests and int(max_in_flight_requests):
+            return int(max_in_flight_requests)
+
+        return DEFAULT_MAX_IN_FLIGHT_REQUESTS
+
+    def get_request_timeout(self):
+        """
+        Get the request timeout from the config, if not present use the default 300 seconds.
+        """
+        config_request_timeout = self.config.get('request_timeout')
+
+        if config_request_timeout and float(config_request_timeout):
+            return float(config_request_timeout)
+
+        return REQUEST_TIMEOUT
+
+    def run(self, coroutine):
+        """
+        Run the coroutine on the event loop thread and wait for its result.
+        The loop is shared by all the threads of the tap.
+        """
+        with self.loop_lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, name='tap-github-asyncio', daemon=True)
+                self.loop_thread.start()
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def get_session(self):
+        """
+        Return the `aiohttp.ClientSession`, creating it on the event loop on first use.
+        """
+        if self.session is None:
+            self.semaphore = asyncio.Semaphore(self.max_in_flight_requests)
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.get_request_timeout()))
+        return self.session
+
+    # pylint: disable=dangerous-default-value
+    async def authed_get(self, source, url, headers={}, stream="", should_skip_404 = True, not_accessible_repos = None):
+        """
+        Call rest API and return the response in case of status code 200.
+        Retry with the same exponential backoff policy as `GithubClient.authed_get`.
+        """
+        # During 'Timeout' error there is also possibility of 'ConnectionError',
+        # hence added backoff for 'ClientError' too.
+        # `backoff.on_exception` is not used for coroutines as its asyncio support is not available on all python versions.
+        retry_exceptions = (asyncio.TimeoutError, aiohttp.ClientError, Server5xxError, TooManyRequests)
+        wait_gen = backoff.expo(factor=2)
+        next(wait_gen)
+        for tries in range(1, MAX_TRIES + 1):
+            try:
+                return await self.get(source, url, headers, stream, should_skip_404, not_accessible_repos)
+            except SecondaryRateLimitExceeded:
+                # The wait of a secondary rate limit error is the `Retry-After` of the cool down, hence no backoff interval.
+                if tries == MAX_TRIES:
+                    raise
+            except retry_exceptions as exc:
+                if tries == MAX_TRIES:
+                    raise
+                seconds_to_wait = backoff.full_jitter(next(wait_gen))
+                LOGGER.info("Backing off %s(...) for %.1fs (%s)", source, seconds_to_wait, repr(exc))
+                await asyncio.sleep(seconds_to_wait)
+
+    async def get(self, source, url, headers, stream, should_skip_404, not_accessible_repos):
+        """
+        Send a single request and map the errors of the response to the exceptions of the tap.
+        """
+        session = await self.get_session()
+        request_headers = dict(headers)
+        async with self.semaphore:
+            cool_down_delay = self.cool_down.get_delay()
+            if cool_down_delay:
+                await asyncio.sleep(cool_down_delay)
+
+            access_token = self.token_pool.get_token()
+            pacing_delay = self.token_pool.get_pacing_delay(access_token)
+            if pacing_delay:
+                await asyncio.sleep(pacing_delay)
+            request_headers['authorization'] = 'token ' + access_token
+            cache_key = None
+            if self.etag_cache:
+                # Send the validators of the response cached for the token and serve it for a 304.
+                cache_key = self.etag_cache.get_key(url, access_token, headers.get('Accept'))
+                if cache_key:
+                    request_headers.update(self.etag_cache.get_conditional_headers(cache_key))
+            with metrics.http_request_timer(source) as timer:
+                async with session.get(url, headers=request_headers) as resp:
+                    response = AsyncResponse(str(resp.url), resp.status, resp.headers, await resp.read())
+
+                if cache_key:
+                    response = self.etag_cache.serve_response(cache_key, response)
+
+                # `raise_for_error` records the not accessible stream for the thread which requested the pages.
+                error_context = SimpleNamespace(not_accessible_repos=not_accessible_repos if not_accessible_repos is not None else set())
+                check_response(response, source, stream, error_context, should_skip_404, self.cool_down)
+                timer.tags[metrics.Tag.http_status_code] = response.status_code
+
+            seconds_to_sleep = get_token_pool_sleep_seconds(self.token_pool, access_token, response, self.max_sleep_seconds)
+            if seconds_to_sleep is not None:
+                # Keep the in flight slot while sleeping so that no other request is sent before the reset.
+                await asyncio.sleep(seconds_to_sleep)
+
+        if response.status_code == 404:
+            # Return an empty response body since we're not raising a NotFoundException
+            response.content = b'{}'
+        return response
+
+    async def authed_get_all_pages(self, source, url, headers={}, stream="", should_skip_404 = True, not_accessible_repos = None):
+        """
+        Fetch all pages of records and return them.
+        """
+        while url:
+            r = await self.authed_get(source, url, headers, stream, should_skip_404, not_accessible_repos)
+            yield r
+
+            # Fetch the next page if next found in the response, the loop ends once all pages are fetched.
+            url = get_next_url(r)
+
+    async def get_all_pages(self, source, url, stream, not_accessible_repos, headers = None):
+        """
+        Fetch all pages of records and return them as a list.
+        """
+        return [page async for page in self.authed_get_all_pages(source, url, headers or {}, stream=stream,
+                                                                 not_accessible_repos=not_accessible_repos)]
+
+    async def get_all_pages_concurrently(self, calls, not_accessible_repos = None, headers = None):
+        """
+        Fetch all pages of each (source, url, stream) call with the headers, e.g. the `Accept` header of the session of
+        the blocking client, with at most `max_in_flight_requests` requests at the same time.
+        Return the pages in the order of the calls.
+        """
+        return await asyncio.gather(*[self.get_all_pages(source, url, stream, not_accessible_repos, headers)
+                                      for source, url, stream in calls])
+
+    def close(self):
+        """
+        Close the session and stop the event loop.
+        """
+        if self.loop is None:
+            return
+        if self.session is not None:
+            self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
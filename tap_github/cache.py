@@ -0,0 +1,260 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from urllib.parse import parse_qsl, urlsplit
+import singer
+import requests
+from requests.structures import CaseInsensitiveDict
+
+LOGGER = singer.get_logger()
+
+# Response headers which are kept with the cached body.
+# The rate limit headers are taken from the 304 response instead.
+CACHED_HEADERS = ['Link', 'ETag', 'Last-Modified', 'Content-Type']
+
+# The modes of the response store.
+RESPONSE_STORE_MODES = ['record', 'replay', 'record_missing', 'refresh']
+# The modes requesting every response, `refresh` being an alias of `record`.
+RECORD_MODES = ['record', 'refresh']
+# The status codes of the responses which are stored, the other ones are raised.
+STORED_STATUS_CODES = [200, 404]
+
+class ETagCache:
+    """
+    An on-disk cache of the responses and their `ETag` and `Last-Modified` validators, keyed by the url,
+    the `Accept` header and the access token. The cached validators are sent as conditional headers and
+    a `304 Not Modified` response, which is not charged against the rate limit, is served from the cache.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # The cache is shared by the threads syncing repositories concurrently.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                'key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, headers TEXT, body BLOB)')
+        self.connection.commit()
+        self.hits = 0
+
+    @staticmethod
+    def get_key(url, token, accept):
+        """
+        Return the cache key of the request. The token is hashed so that it is never written to the disk.
+        Return None for a url filtered with `since`, as it changes with the bookmark and is never requested again.
+        """
+        if 'since' in dict(parse_qsl(urlsplit(url).query)):
+            return None
+        return hashlib.sha256('\n'.join([token or '', accept or '', url]).encode('utf-8')).hexdigest()
+
+    def get_conditional_headers(self, key):
+        """
+        Return the `If-None-Match` and `If-Modified-Since` headers for the cached response, if any.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT etag, last_modified FROM responses WHERE key = ?', (key,)).fetchone()
+
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def get_response(self, key, response = None):
+        """
+        Return the cached response as a 200 `requests.Response`, or None if the request is not cached.
+        The headers of the given 304 response, e.g. `X-RateLimit-Remaining`, override the cached headers.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT url, headers, body FROM responses WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return None
+
+        url, headers, body = row
+        cached_response = requests.Response()
+        cached_response.status_code = 200
+        cached_response.url = url
+        cached_response.headers = CaseInsensitiveDict(json.loads(headers))
+        if response is not None:
+            cached_response.headers.update({name: value for name, value in response.headers.items() if name.lower().startswith('x-ratelimit')})
+        cached_response._content = body # pylint: disable=protected-access
+        cached_response.from_cache = True
+        self.hits += 1
+        return cached_response
+
+    def has_response(self, key):
+        """
+        Return True if a response is cached for the key.
+        """
+        with self.lock:
+            return self.connection.execute('SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone() is not None
+
+    def store_response(self, key, response):
+        """
+        Store a 200 response which has an `ETag` or `Last-Modified` validator.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                                    (key, response.url, etag, last_modified, json.dumps(headers), response.content))
+            self.connection.commit()
+
+    def serve_response(self, key, response):
+        """
+        Return the cached response for a 304 response, which is not charged against the rate limit, and cache a 200 response.
+        Any other response is returned as is.
+        """
+        if key is None:
+            return response
+        if response.status_code == 304:
+            return self.get_response(key, response) or response
+        if response.status_code == 200:
+            self.store_response(key, response)
+        return response
+
+    def close(self):
+        """
+        Close the connection to the cache file.
+        """
+        LOGGER.info("Served %s responses from the ETag cache.", self.hits)
+        with self.lock:
+            self.connection.close()
+
+class PRHeadCache:
+    """
+    An on-disk index of the head commit of the pull requests and the number of their commits, keyed by the repository
+    and the pull request number. The commits of a pull request are fetched again only once its head moved.
+
+    Each head is kept with the `since` bookmark of the pr_commits from which its commits were written, so a head is
+    only used while the bookmark did not move back before it, e.g. after a reset of the state.
+
+    The heads are kept pending until `save` is called for the repository, once its state is about to be written,
+    so the index is never ahead of the commits the state covers.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # The cache is shared by the threads syncing repositories concurrently.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS pr_heads ('
+                                'repo TEXT, number INTEGER, head_sha TEXT, commit_count INTEGER, since TEXT, PRIMARY KEY (repo, number))')
+        self.connection.commit()
+        self.pending = {}
+        self.skipped = 0
+
+    def get_head(self, repo, number, since):
+        """
+        Return the (head sha, commit count) of the pull request, or None if the pull request is not indexed
+        or its commits were written from a later bookmark than `since`.
+        """
+        with self.lock:
+            row = self.pending.get((repo, number))
+            if row is None:
+                row = self.connection.execute('SELECT head_sha, commit_count, since FROM pr_heads WHERE repo = ? AND number = ?',
+                                              (repo, number)).fetchone()
+        if not row or row[2] > since:
+            return None
+        return tuple(row[:2])
+
+    def set_head(self, repo, number, head_sha, commit_count, since):
+        """
+        Index the head of the pull request once its commits are written from the `since` bookmark.
+        """
+        with self.lock:
+            self.pending[(repo, number)] = (head_sha, commit_count, since)
+
+    def save(self, repo):
+        """
+        Write the pending heads of the repository to the disk.
+        """
+        with self.lock:
+            heads = [key + head for key, head in self.pending.items() if key[0] == repo]
+            self.connection.executemany('INSERT OR REPLACE INTO pr_heads VALUES (?, ?, ?, ?, ?)', heads)
+            self.connection.commit()
+            for head in heads:
+                del self.pending[(head[0], head[1])]
+
+    def close(self):
+        """
+        Close the connection to the cache file.
+        """
+        LOGGER.info("Skipped the commits of %s pull requests with an unchanged head.", self.skipped)
+        with self.lock:
+            self.connection.close()
+
+class ResponseStore:
+    """
+    An on-disk store of the responses of the REST API with their status code and headers, keyed by the url and the
+    `Accept` header, to re-run a sync without any request. In the `record` mode, or its `refresh` alias, every response
+    is requested and stored, replacing the stored one. In the `replay` mode, only the stored responses are served. In
+    the `record_missing` mode, the stored responses are served and the others are requested and stored.
+    """
+    def __init__(self, path, mode='record'):
+        if mode not in RESPONSE_STORE_MODES:
+            raise ValueError("The mode of the response store must be one of {}, got '{}'.".format(RESPONSE_STORE_MODES, mode))
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        # The store is shared by the threads syncing repositories concurrently.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS stored_responses ('
+                                'key TEXT PRIMARY KEY, url TEXT, status_code INTEGER, headers TEXT, body BLOB)')
+        self.connection.commit()
+        self.served = 0
+        self.stored = 0
+
+    @staticmethod
+    def get_key(url, accept):
+        """
+        Return the key of the request in the store.
+        """
+        return hashlib.sha256('\n'.join([accept or '', url]).encode('utf-8')).hexdigest()
+
+    def get_response(self, key):
+        """
+        Return the stored response, or None if the request is not stored or every response is recorded.
+        """
+        if self.mode in RECORD_MODES:
+            return None
+        with self.lock:
+            row = self.connection.execute('SELECT url, status_code, headers, body FROM stored_responses WHERE key = ?',
+                                          (key,)).fetchone()
+        if not row:
+            return None
+
+        url, status_code, headers, body = row
+        stored_response = requests.Response()
+        stored_response.status_code = status_code
+        stored_response.url = url
+        stored_response.headers = CaseInsensitiveDict(json.loads(headers))
+        stored_response._content = body # pylint: disable=protected-access
+        stored_response.from_store = True
+        self.served += 1
+        return stored_response
+
+    def store_response(self, key, response):
+        """
+        Store the response, unless it is an error which is raised.
+        """
+        if response.status_code not in STORED_STATUS_CODES:
+            return
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO stored_responses VALUES (?, ?, ?, ?, ?)',
+                                    (key, response.url, response.status_code, json.dumps(dict(response.headers)), response.content))
+            self.connection.commit()
+        self.stored += 1
+
+    def close(self):
+        """
+        Close the connection to the store file.
+        """
+        LOGGER.info("Served %s responses from the response store, stored %s.", self.served, self.stored)
+        with self.lock:
+            self.connection.close()
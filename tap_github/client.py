@@ -1,167 +1,168 @@
+import collections
+from concurrent import futures
+import itertools
+import queue
 import time
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import requests
 import backoff
-from simplejson import JSONDecodeError
 import singer
 from singer import metrics
+from tap_github.cache import ETagCache, PRHeadCache, ResponseStore
+from tap_github.graphql import get_graphql_url
+from tap_github.rate_limit import TokenPool, SecondaryRateLimitCoolDown, DEFAULT_COOL_DOWN_SECONDS
+# The exceptions and helpers shared with the asyncio engine, also imported from this module by the callers.
+from tap_github.rest import ( # pylint: disable=unused-import
+    DEFAULT_DOMAIN, DEFAULT_SLEEP_SECONDS, REQUEST_TIMEOUT, GithubException, Server5xxError, BadCredentialsException,
+    AuthException, NotFoundException, BadRequestException, InternalServerError, UnprocessableError, NotModifiedError,
+    MovedPermanentlyError, ConflictError, RateLimitExceeded, TooManyRequests, GraphQLError, SecondaryRateLimitExceeded,
+    raise_for_error, get_token_pool_sleep_seconds, check_response, get_next_url)
 
 LOGGER = singer.get_logger()
-DEFAULT_SLEEP_SECONDS = 600
-DEFAULT_DOMAIN = "https://api.github.com"
-
-# Set default timeout of 300 seconds
-REQUEST_TIMEOUT = 300
-
-class GithubException(Exception):
-    pass
-
-class Server5xxError(GithubException):
-    pass
-
-class BadCredentialsException(GithubException):
-    pass
-
-class AuthException(GithubException):
-    pass
-
-class NotFoundException(GithubException):
-    pass
-
-class BadRequestException(GithubException):
-    pass
-
-class InternalServerError(Server5xxError):
-    pass
-
-class UnprocessableError(GithubException):
-    pass
-
-class NotModifiedError(GithubException):
-    pass
-
-class MovedPermanentlyError(GithubException):
-    pass
-
-class ConflictError(GithubException):
-    pass
-
-class RateLimitExceeded(GithubException):
-    pass
-
-class TooManyRequests(GithubException):
-    pass
-
-
-ERROR_CODE_EXCEPTION_MAPPING = {
-    301: {
-        "raise_exception": MovedPermanentlyError,
-        "message": "The resource you are looking for is moved to another URL."
-    },
-    304: {
-        "raise_exception": NotModifiedError,
-        "message": "The requested resource has not been modified since the last time you accessed it."
-    },
-    400:{
-        "raise_exception": BadRequestException,
-        "message": "The request is missing or has a bad parameter."
-    },
-    401: {
-        "raise_exception": BadCredentialsException,
-        "message": "Invalid authorization credentials."
-    },
-    403: {
-        "raise_exception": AuthException,
-        "message": "User doesn't have permission to access the resource."
-    },
-    404: {
-        "raise_exception": NotFoundException,
-        "message": "The resource you have specified cannot be found. Alternatively the access_token is not valid for the resource"
-    },
-    409: {
-        "raise_exception": ConflictError,
-        "message": "The request could not be completed due to a conflict with the current state of the server."
-    },
-    422: {
-        "raise_exception": UnprocessableError,
-        "message": "The request was not able to process right now."
-    },
-    429: {
-        "raise_exception": TooManyRequests,
-        "message": "Too many requests occurred."
-    },
-    500: {
-        "raise_exception": InternalServerError,
-        "message": "An error has occurred at Github's end."
-    }
-}
-
-def raise_for_error(resp, source, stream, client, should_skip_404):
-    """
-    Retrieve the error code and the error message from the response and return custom exceptions accordingly.
-    """
-    error_code = resp.status_code
-    try:
-        response_json = resp.json()
-    except JSONDecodeError:
-        response_json = {}
-
-    if error_code == 404 and should_skip_404:
-        # Add not accessible stream into list.
-        client.not_accessible_repos.add(stream)
-        details = ERROR_CODE_EXCEPTION_MAPPING.get(error_code).get("message")
-        if source == "teams":
-            details += ' or it is a personal account repository'
-        message = "HTTP-error-code: 404, Error: {}. Please refer \'{}\' for more details.".format(details, response_json.get("documentation_url"))
-        LOGGER.warning(message)
-        # Don't raise a NotFoundException
-        return None
 
-    message = "HTTP-error-code: {}, Error: {}".format(
-        error_code, ERROR_CODE_EXCEPTION_MAPPING.get(error_code, {}).get("message", "Unknown Error") if response_json == {} else response_json)
+# The maximum number of records of a page of the REST API.
+MAX_PER_PAGE = 100
 
-    if error_code > 500:
-        raise Server5xxError(message) from None
+def rate_throttling(response, max_sleep_seconds, token_pool = None, access_token = None):
+    """
+    Track the rate limit of the token used for the response and sleep before making a new request,
+    only if the rate limit of every token of the pool is exceeded. Without a pool, the token of the response is the only one.
+    """
+    if token_pool is None:
+        token_pool = TokenPool([access_token])
+    seconds_to_sleep = get_token_pool_sleep_seconds(token_pool, access_token, response, max_sleep_seconds)
+    if seconds_to_sleep is not None:
+        time.sleep(seconds_to_sleep)
 
-    exc = ERROR_CODE_EXCEPTION_MAPPING.get(error_code, {}).get("raise_exception", GithubException)
-    raise exc(message) from None
+def set_query_param(url, name, value):
+    """
+    Return the url with the query parameter set to the value.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = [(key, param) for key, param in parse_qsl(query, keep_blank_values=True) if key != name]
+    params.append((name, str(value)))
+    return urlunsplit((scheme, netloc, path, urlencode(params, safe=':/'), fragment))
 
-def calculate_seconds(epoch):
+def get_page_number(url):
     """
-    Calculate the seconds to sleep before making a new request.
+    Return the `page` query parameter of the url, or None if the url is not numbered by page.
     """
-    current = time.time()
-    return int(round((epoch - current), 0))
+    if not url:
+        return None
+    page = dict(parse_qsl(urlsplit(url).query)).get('page')
+    return int(page) if page and page.isdigit() else None
 
-def rate_throttling(response, max_sleep_seconds):
+def is_newest_first(url):
     """
-    For rate limit errors, get the remaining time before retrying and calculate the time to sleep before making a new request.
+    Return True if the listing of the url is sorted with its newest records first, so any new or updated record changes
+    its first page.
     """
-    if 'X-RateLimit-Remaining' in response.headers:
-        if int(response.headers['X-RateLimit-Remaining']) == 0:
-            seconds_to_sleep = calculate_seconds(int(response.headers['X-RateLimit-Reset']))
-
-            if seconds_to_sleep > max_sleep_seconds:
-                message = "API rate limit exceeded, please try after {} seconds.".format(seconds_to_sleep)
-                raise RateLimitExceeded(message) from None
-
-            LOGGER.info("API rate limit exceeded. Tap will retry the data collection after %s seconds.", seconds_to_sleep)
-            time.sleep(seconds_to_sleep)
-    else:
-        # Raise an exception if `X-RateLimit-Remaining` is not found in the header.
-        # API does include this key header if provided base URL is not a valid github custom domain.
-        raise GithubException("The API call using the specified base url was unsuccessful. Please double-check the provided base URL.")
-
-class GithubClient:
+    return dict(parse_qsl(urlsplit(url).query)).get('direction') == 'desc'
+
+class GithubClient: # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """
     The client class used for making REST calls to the Github API.
     """
     def __init__(self, config):
         self.config = config
-        self.session = requests.Session()
+        # Sessions and the not accessible streams are kept per thread, so repositories
+        # can be synced concurrently without sharing the mutable session headers.
+        self.thread_local = threading.local()
+        self.sessions = []
+        self.sessions_lock = threading.Lock()
         self.base_url = config['base_url'] if config.get('base_url') else DEFAULT_DOMAIN
         self.max_sleep_seconds = self.config.get('max_sleep_seconds', DEFAULT_SLEEP_SECONDS)
+        self.token_pool = TokenPool(self.get_access_tokens(),
+                                    reserve=int(self.config.get('rate_limit_reserve') or 0),
+                                    pacing=str(self.config.get('rate_limit_pacing', '')).lower() == 'true')
         self.set_auth_in_session()
         self.not_accessible_repos = set()
+        # The activity of the repositories listed with their organization, used to skip the repositories without any change.
+        self.repo_activity = {}
+        self.etag_cache = ETagCache(self.config['etag_cache_path']) if self.config.get('etag_cache_path') else None
+        self.etag_cache_skip_pages = bool(self.etag_cache) and str(self.config.get('etag_cache_skip_pages', '')).lower() == 'true'
+        self.pr_head_cache = PRHeadCache(self.config['pr_commits_cache_path']) if self.config.get('pr_commits_cache_path') else None
+        self.response_store = None
+        if self.config.get('response_store_path'):
+            self.response_store = ResponseStore(self.config['response_store_path'], self.config.get('response_store_mode') or 'record')
+        # The GraphQL API has its own rate limit, hence the budget of its tokens is tracked separately.
+        self.graphql_token_pool = TokenPool(self.token_pool.tokens, reserve=self.token_pool.reserve)
+        self.cool_down = SecondaryRateLimitCoolDown(int(self.config.get('secondary_rate_limit_cool_down') or DEFAULT_COOL_DOWN_SECONDS))
+        if self.token_pool.pacing:
+            self.fetch_rate_limits()
+        self.async_client = None
+        if self.config.get('max_in_flight_requests') and self.response_store:
+            LOGGER.warning("The asyncio engine is disabled with the response store, the requests go through the store one after the other.")
+        elif self.config.get('max_in_flight_requests'):
+            # Import here, as the asyncio engine is optional and needs the `aiohttp` package.
+            from tap_github.async_client import AsyncGithubClient # pylint: disable=import-outside-toplevel
+            self.async_client = AsyncGithubClient(config, self.etag_cache, self.token_pool, self.cool_down)
+        # The number of pages fetched ahead by a background thread while the current page is processed.
+        self.read_ahead_pages = int(self.config.get('read_ahead_pages') or 0)
+        # The number of pages fetched concurrently once the last page of a listing is known.
+        self.parallel_pages = int(self.config.get('parallel_pages') or 0)
+        # The threads fetching the pages concurrently, shared by all the listings of the run.
+        self.page_executor = None
+        if self.parallel_pages:
+            self.page_executor = futures.ThreadPoolExecutor(max_workers=self.parallel_pages, thread_name_prefix='tap-github-page')
+
+    def get_cache_key(self, url, access_token, accept):
+        """
+        Return the key of the request sent with the access token in the ETag cache, or None if the cache is not enabled.
+        """
+        if not self.etag_cache:
+            return None
+        return self.etag_cache.get_key(url, access_token, accept)
+
+    def get_cached_response(self, url, accept):
+        """
+        Return the response cached for the url with any token of the pool, or None if the url is not cached.
+        """
+        for access_token in self.token_pool.tokens:
+            cache_key = self.get_cache_key(url, access_token, accept)
+            resp = self.etag_cache.get_response(cache_key) if cache_key else None
+            if resp is not None:
+                return resp
+        return None
+
+    @property
+    def session(self):
+        """
+        Return the `requests.Session` of the current thread, creating it on first use.
+        """
+        session = getattr(self.thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self.thread_local.session = session
+            with self.sessions_lock:
+                self.sessions.append(session)
+            self.set_auth_in_session()
+        return session
+
+    def close_session(self):
+        """
+        Close the `requests.Session` of the current thread, if any, once the thread made its last request.
+        """
+        session = getattr(self.thread_local, 'session', None)
+        if session is not None:
+            del self.thread_local.session
+            session.close()
+            with self.sessions_lock:
+                self.sessions.remove(session)
+
+    @property
+    def not_accessible_repos(self):
+        """
+        Return the streams that were not accessible for the repository synced by the current thread.
+        """
+        if not hasattr(self.thread_local, 'not_accessible_repos'):
+            self.thread_local.not_accessible_repos = set()
+        return self.thread_local.not_accessible_repos
+
+    @not_accessible_repos.setter
+    def not_accessible_repos(self, value):
+        self.thread_local.not_accessible_repos = value
 
     def get_request_timeout(self):
         """
@@ -177,47 +178,334 @@ class GithubClient:
         # Return default timeout
         return REQUEST_TIMEOUT
 
-    def set_auth_in_session(self):
+    def get_access_tokens(self):
+        """
+        Get the access tokens of the pool, `access_token` followed by the space delimited or listed `access_tokens` of the config.
+        """
+        access_tokens = self.config.get('access_tokens') or []
+        if isinstance(access_tokens, str):
+            access_tokens = access_tokens.split(' ')
+
+        tokens = [self.config['access_token']]
+        for token in access_tokens:
+            if token and token not in tokens:
+                tokens.append(token)
+        return tokens
+
+    def set_auth_in_session(self, access_token = None):
         """
         Set access token in the header for authorization.
         """
-        access_token = self.config['access_token']
+        access_token = access_token or self.config['access_token']
         self.session.headers.update({'authorization': 'token ' + access_token})
 
+    def fetch_rate_limits(self):
+        """
+        Read the budget of every token of the pool from the `/rate_limit` endpoint, which is not charged against the rate limit,
+        so the requests are paced from the first one.
+
+        Docs: https://docs.github.com/en/rest/rate-limit#get-rate-limit-status-for-the-authenticated-user
+        """
+        for index, access_token in enumerate(self.token_pool.tokens, 1):
+            try:
+                resp = self.session.request(method='get', url='{}/rate_limit'.format(self.base_url), timeout=self.get_request_timeout(),
+                                            headers={'authorization': 'token ' + access_token})
+            except (requests.Timeout, requests.ConnectionError) as err:
+                LOGGER.warning("Unable to read the rate limit of access token %s: %s", index, err)
+                continue
+
+            if resp.status_code != 200:
+                # The rate limit may be disabled on a github custom domain.
+                LOGGER.warning("Unable to read the rate limit of access token %s, HTTP-error-code: %s", index, resp.status_code)
+                continue
+
+            core = resp.json().get('resources', {}).get('core', {})
+            if core.get('remaining') is None:
+                continue
+            self.token_pool.update(access_token, {'X-RateLimit-Remaining': core.get('remaining'),
+                                                  'X-RateLimit-Used': core.get('used'),
+                                                  'X-RateLimit-Reset': core.get('reset')})
+            LOGGER.info("Access token %s has %s of %s requests remaining until %s, keeping %s in reserve.",
+                        index, core.get('remaining'), core.get('limit'), core.get('reset'), self.token_pool.reserve)
+
     # pylint: disable=dangerous-default-value
     # During 'Timeout' error there is also possibility of 'ConnectionError',
     # hence added backoff for 'ConnectionError' too.
     @backoff.on_exception(backoff.expo, (requests.Timeout, requests.ConnectionError, Server5xxError, TooManyRequests), max_tries=5, factor=2)
+    # The wait of a secondary rate limit error is the `Retry-After` of the cool down, hence no backoff interval.
+    @backoff.on_exception(backoff.constant, SecondaryRateLimitExceeded, max_tries=5, interval=0, jitter=None)
     def authed_get(self, source, url, headers={}, stream="", should_skip_404 = True):
         """
         Call rest API and return the response in case of status code 200.
         """
+        if self.response_store:
+            resp = self.get_stored_response(source, url, headers, stream, should_skip_404)
+            if resp is not None:
+                return resp
+
+        cool_down_delay = self.cool_down.get_delay()
+        if cool_down_delay:
+            time.sleep(cool_down_delay)
+
         with metrics.http_request_timer(source) as timer:
             self.session.headers.update(headers)
-            resp = self.session.request(method='get', url=url, timeout=self.get_request_timeout())
-            if resp.status_code != 200:
-                raise_for_error(resp, source, stream, self, should_skip_404)
+            access_token = self.token_pool.get_token()
+            pacing_delay = self.token_pool.get_pacing_delay(access_token)
+            if pacing_delay:
+                time.sleep(pacing_delay)
+            self.set_auth_in_session(access_token)
+            request_kwargs = {}
+            cache_key = self.get_cache_key(url, access_token, self.session.headers.get('Accept'))
+            if cache_key:
+                # Send the validators of the cached response, only for this request.
+                conditional_headers = self.etag_cache.get_conditional_headers(cache_key)
+                if conditional_headers:
+                    request_kwargs['headers'] = conditional_headers
+            resp = self.session.request(method='get', url=url, timeout=self.get_request_timeout(), **request_kwargs)
+            if cache_key:
+                resp = self.etag_cache.serve_response(cache_key, resp)
+            if self.response_store:
+                self.response_store.store_response(self.response_store.get_key(url, self.session.headers.get('Accept')), resp)
+            check_response(resp, source, stream, self, should_skip_404, self.cool_down)
             timer.tags[metrics.Tag.http_status_code] = resp.status_code
-            rate_throttling(resp, self.max_sleep_seconds)
+            rate_throttling(resp, self.max_sleep_seconds, self.token_pool, access_token)
             if resp.status_code == 404:
                 # Return an empty response body since we're not raising a NotFoundException
                 resp._content = b'{}' # pylint: disable=protected-access
             return resp
 
+    def get_stored_response(self, source, url, headers, stream, should_skip_404):
+        """
+        Return the response of the url served by the response store, as `authed_get` returns the response it requested,
+        or None if the url is to be requested.
+        """
+        self.session.headers.update(headers)
+        resp = self.response_store.get_response(self.response_store.get_key(url, self.session.headers.get('Accept')))
+        if resp is None:
+            if self.response_store.mode == 'replay':
+                raise GithubException("The response of {} is not in the response store, which is replayed.".format(url))
+            return None
+        if resp.status_code != 200:
+            raise_for_error(resp, source, stream, self, should_skip_404)
+        if resp.status_code == 404:
+            # Return an empty response body since we're not raising a NotFoundException
+            resp._content = b'{}' # pylint: disable=protected-access
+        return resp
+
+    @backoff.on_exception(backoff.expo, (requests.Timeout, requests.ConnectionError, Server5xxError, TooManyRequests), max_tries=5, factor=2)
+    # The wait of a secondary rate limit error is the `Retry-After` of the cool down, hence no backoff interval.
+    @backoff.on_exception(backoff.constant, SecondaryRateLimitExceeded, max_tries=5, interval=0, jitter=None)
+    def authed_graphql(self, source, query, variables, stream=""):
+        """
+        Call the GraphQL API and return the data of the response.
+
+        Docs: https://docs.github.com/en/graphql/guides/forming-calls-with-graphql
+        """
+        cool_down_delay = self.cool_down.get_delay()
+        if cool_down_delay:
+            time.sleep(cool_down_delay)
+
+        with metrics.http_request_timer(source) as timer:
+            access_token = self.graphql_token_pool.get_token()
+            self.set_auth_in_session(access_token)
+            resp = self.session.request(method='post', url=get_graphql_url(self.base_url), timeout=self.get_request_timeout(),
+                                        json={'query': query, 'variables': variables})
+            check_response(resp, source, stream, self, False, self.cool_down)
+            timer.tags[metrics.Tag.http_status_code] = resp.status_code
+            rate_throttling(resp, self.max_sleep_seconds, self.graphql_token_pool, access_token)
+
+            response_json = resp.json()
+            errors = response_json.get('errors') or []
+            if any(error.get('type') == 'RATE_LIMITED' for error in errors):
+                # The rate limit errors of the GraphQL API come with a 200 status code.
+                raise TooManyRequests("GraphQL-error: {}".format(errors))
+            if errors and all(error.get('type') == 'NOT_FOUND' for error in errors):
+                # Skip the not found resources, as for a 404 error of the REST API.
+                LOGGER.warning("GraphQL-error: %s", errors)
+                self.not_accessible_repos.add(stream)
+            elif errors:
+                raise GraphQLError("GraphQL-error: {}".format(errors))
+            return response_json.get('data')
+
+    @property
+    def prefetched_pages(self):
+        """
+        Return the pages fetched concurrently in advance for the current thread, keyed by the url of the first page.
+        """
+        if not hasattr(self.thread_local, 'prefetched_pages'):
+            self.thread_local.prefetched_pages = {}
+        return self.thread_local.prefetched_pages
+
+    def prefetch_all_pages(self, calls):
+        """
+        Fetch all pages of the given (source, url, stream) calls concurrently with the asyncio engine.
+        The pages are served, and released, by the next `authed_get_all_pages` call for the same url, or released by
+        `release_prefetched_pages`. They are requested with the headers of the session, as the pages requested by
+        `authed_get_all_pages`. Do nothing if the engine is not enabled.
+        """
+        if not self.async_client or not calls:
+            return
+
+        headers = {key: value for key, value in self.session.headers.items() if key.lower() != 'authorization'}
+        all_pages = self.async_client.run(self.async_client.get_all_pages_concurrently(calls, self.not_accessible_repos, headers))
+        for (_, url, _), pages in zip(calls, all_pages):
+            self.prefetched_pages[url] = pages
+
+    def release_prefetched_pages(self, calls):
+        """
+        Release the pages prefetched for the (source, url, stream) calls which were not served.
+        """
+        for _, url, _ in calls:
+            self.prefetched_pages.pop(url, None)
+
     def authed_get_all_pages(self, source, url, headers={}, stream="", should_skip_404 = True):
         """
         Fetch all pages of records and return them.
         """
-        while True:
-            r = self.authed_get(source, url, headers, stream, should_skip_404)
+        prefetched_pages = self.prefetched_pages.pop(url, None)
+        if prefetched_pages is not None:
+            yield from prefetched_pages
+            return
+
+        pages = self.get_pages(source, url, headers, stream, should_skip_404)
+        if self.read_ahead_pages:
+            yield from self.read_ahead(pages, self.read_ahead_pages)
+        else:
+            yield from pages
+
+    def get_pages(self, source, url, headers, stream, should_skip_404):
+        """
+        Fetch the pages one after the other, following the `next` links. With `etag_cache_skip_pages`, the remaining pages
+        of a listing sorted newest first are served from the ETag cache once its first page is not modified. The other
+        listings can grow at their last page while their first page is unchanged, so each of their pages is requested.
+        """
+        skip_cached_pages = self.etag_cache_skip_pages and is_newest_first(url)
+        serve_from_cache = False
+        while url:
+            r = None
+            if serve_from_cache:
+                r = self.get_cached_response(url, self.session.headers.get('Accept'))
+            if r is None:
+                r = self.authed_get(source, url, headers, stream, should_skip_404)
+                if skip_cached_pages and not serve_from_cache and getattr(r, 'from_cache', False):
+                    # The first page is not modified, serve the remaining pages from the cache without any request.
+                    LOGGER.info("First page of %s is not modified, skipping the requests of the cached pages.", url)
+                    serve_from_cache = True
             yield r
 
-            # Fetch the next page if next found in the response.
-            if 'next' in r.links:
-                url = r.links['next']['url']
-            else:
-            # Break the loop if all pages are fetched.
-                break
+            # Fetch the next page if next found in the response, the loop ends once all pages are fetched.
+            url = get_next_url(r)
+
+    def read_ahead(self, pages, max_pages):
+        """
+        Yield the pages, while a background thread fetches up to `max_pages` pages ahead of the page being processed.
+        The errors of the requests are raised in the thread of the caller, in the order of the pages.
+        """
+        buffer = queue.Queue(max_pages)
+        stop = threading.Event()
+        # The streams which are not accessible are reported to the thread syncing the repository.
+        not_accessible_repos = self.not_accessible_repos
+
+        def put(item):
+            """
+            Buffer the item, waiting while the buffer is full, unless the caller stopped reading the pages.
+            """
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch_pages():
+            self.not_accessible_repos = not_accessible_repos
+            try:
+                for page in pages:
+                    if not put((page, None)):
+                        break
+                else:
+                    put((None, None))
+            except Exception as err: # pylint: disable=broad-except
+                put((None, err))
+            finally:
+                pages.close()
+                # The thread is started for each listing, so its session is closed along with it.
+                self.close_session()
+
+        threading.Thread(target=fetch_pages, name='tap-github-read-ahead', daemon=True).start()
+        try:
+            while True:
+                page, err = buffer.get()
+                if err:
+                    raise err
+                if page is None:
+                    return
+                yield page
+        finally:
+            # Stop the background thread when the caller stops reading the pages, e.g. once the bookmark is reached.
+            stop.set()
+
+    def authed_get_all_pages_in_parallel(self, source, url, headers={}, stream=""):
+        """
+        Fetch all pages of records with the maximum page size, and once the first page gives the number of pages with its
+        `last` link, fetch up to `parallel_pages` of the remaining pages concurrently. The pages are yielded in order, and
+        read ahead as by `authed_get_all_pages`.
+        Fetch the pages one after the other if `parallel_pages` is not set or the pages are not numbered.
+        """
+        if not self.parallel_pages:
+            yield from self.authed_get_all_pages(source, url, headers, stream=stream)
+            return
+
+        pages = self.get_parallel_pages(source, url, headers, stream)
+        if self.read_ahead_pages:
+            yield from self.read_ahead(pages, self.read_ahead_pages)
+        else:
+            yield from pages
+
+    def get_parallel_pages(self, source, url, headers, stream):
+        """
+        Fetch the first page, then the remaining numbered pages concurrently. The page size of the url of a page other
+        than the first one, e.g. resumed from a checkpoint, is kept, as its page number is an offset in pages of that size.
+        """
+        if not get_page_number(url):
+            url = set_query_param(url, 'per_page', MAX_PER_PAGE)
+        response = self.authed_get(source, url, headers, stream)
+        yield response
+        next_url = get_next_url(response)
+        last_page = get_page_number(response.links.get('last', {}).get('url'))
+        if not next_url:
+            return
+        first_page = get_page_number(next_url)
+        if not last_page or first_page != (get_page_number(url) or 1) + 1:
+            # e.g. the cursor based pagination.
+            yield from self.get_pages(source, next_url, headers, stream, True)
+            return
+
+        not_accessible_repos = self.not_accessible_repos
+        def get_page(page):
+            # The streams which are not accessible are reported to the thread syncing the repository.
+            self.not_accessible_repos = not_accessible_repos
+            return self.authed_get(source, set_query_param(next_url, 'page', page), headers, stream)
+
+        pending = collections.deque()
+        try:
+            pages = iter(range(first_page, last_page + 1))
+            for page in itertools.islice(pages, self.parallel_pages):
+                pending.append(self.page_executor.submit(get_page, page))
+            while pending:
+                response = pending.popleft().result()
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(self.page_executor.submit(get_page, page))
+                yield response
+        finally:
+            for future in pending:
+                future.cancel()
+
+        if get_next_url(response):
+            # The records added to the listing since its first page.
+            yield from self.get_pages(source, get_next_url(response), headers, stream, True)
 
     def verify_repo_access(self, url_for_repo, repo):
         """
@@ -332,6 +620,9 @@ class GithubClient:
                         )
 
                         repos.append(repo_full_name)
+                        self.repo_activity[repo_full_name] = {'pushed_at': repo.get('pushed_at'),
+                                                              'updated_at': repo.get('updated_at'),
+                                                              'archived': repo.get('archived', False)}
             except NotFoundException:
                 # Throwing user-friendly error message as it checks token access
                 message = "HTTP-error-code: 404, Error: Please check the organization name \'{}\' or you do not have sufficient permissions to access this organization.".format(org)
@@ -340,5 +631,17 @@ class GithubClient:
         return repos
 
     def __exit__(self, exception_type, exception_value, traceback):
-        # Kill the session instance.
-        self.session.close()
+        # Kill the session instances of all threads.
+        with self.sessions_lock:
+            for session in self.sessions:
+                session.close()
+        if self.page_executor:
+            self.page_executor.shutdown(wait=False)
+        if self.async_client:
+            self.async_client.close()
+        if self.etag_cache:
+            self.etag_cache.close()
+        if self.pr_head_cache:
+            self.pr_head_cache.close()
+        if self.response_store:
+            self.response_store.close()
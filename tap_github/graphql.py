@@ -0,0 +1,423 @@
+from urllib.parse import quote
+import singer
+
+# Number of pull requests fetched per query, each with the first page of its selected children.
+DEFAULT_PULL_REQUESTS_PAGE_SIZE = 25
+
+# Number of nodes of the nested connections fetched with their pull request.
+CHILD_PAGE_SIZE = 50
+
+# Number of nodes fetched by the queries paginating an overflowing connection.
+MAX_PAGE_SIZE = 100
+
+PAGE_INFO = 'pageInfo { hasNextPage endCursor }'
+
+# The fields of a `User` typed field, e.g. the assignees.
+USER_FIELDS = '__typename id databaseId login avatarUrl url isSiteAdmin'
+
+# The fields of an `Actor` typed field, e.g. the author, which is either a user, a bot, an organization or a mannequin.
+ACTOR_FIELDS = '''
+    __typename login avatarUrl url
+    ... on Node { id }
+    ... on User { databaseId isSiteAdmin }
+    ... on Bot { databaseId }
+    ... on Organization { databaseId }
+    ... on Mannequin { databaseId }
+'''
+
+GIT_ACTOR_FIELDS = 'name email date user { ' + USER_FIELDS + ' }'
+
+PULL_REQUEST_FIELDS = '''
+    id databaseId number state locked title body url isDraft
+    createdAt updatedAt closedAt mergedAt authorAssociation activeLockReason
+    author { ''' + ACTOR_FIELDS + ''' }
+    mergeCommit { oid }
+    headRefName headRefOid headRepositoryOwner { login }
+    baseRefName baseRefOid baseRepository { owner { login } }
+    labels(first: 100) { nodes { id name description color isDefault } }
+    assignees(first: 100) { nodes { ''' + USER_FIELDS + ''' } }
+    milestone { id number title description state dueOn createdAt updatedAt closedAt url creator { ''' + ACTOR_FIELDS + ''' } }
+    reviewRequests(first: 100) {
+        nodes { requestedReviewer { __typename ... on User { ''' + USER_FIELDS + ''' } ... on Team { id databaseId name slug description privacy url } } }
+    }
+    autoMergeRequest { enabledBy { ''' + ACTOR_FIELDS + ''' } mergeMethod commitHeadline commitBody }
+'''
+
+REVIEW_FIELDS = '''
+    id databaseId body bodyHTML bodyText state submittedAt url authorAssociation
+    author { ''' + ACTOR_FIELDS + ''' }
+    commit { oid }
+'''
+
+REVIEW_COMMENT_FIELDS = '''
+    id databaseId body bodyHTML bodyText path diffHunk position originalPosition
+    line originalLine startLine originalStartLine createdAt updatedAt url authorAssociation
+    author { ''' + ACTOR_FIELDS + ''' }
+    commit { oid }
+    originalCommit { oid }
+    replyTo { databaseId }
+    pullRequestReview { databaseId }
+    reactionGroups { content reactors { totalCount } }
+'''
+
+COMMIT_FIELDS = '''
+    commit {
+        id oid url message
+        author { ''' + GIT_ACTOR_FIELDS + ''' }
+        committer { ''' + GIT_ACTOR_FIELDS + ''' }
+        tree { oid }
+        comments { totalCount }
+        signature { isValid state signature payload }
+        parents(first: 100) { nodes { oid url } }
+    }
+'''
+
+def get_connection(field, arguments, selection):
+    """
+    Return the selection of a connection with its page info.
+    """
+    return '{}({}) {{ {} nodes {{ {} }} }}'.format(field, arguments, PAGE_INFO, selection)
+
+def get_review_thread_fields(page_size):
+    """
+    Return the selection of a review thread with the first page of its comments.
+    """
+    return 'id diffSide startDiffSide ' + get_connection('comments', 'first: {}'.format(page_size), REVIEW_COMMENT_FIELDS)
+
+# The connections of a pull request by child stream, with the type of their nodes.
+CHILD_CONNECTIONS = {
+    'reviews': ('reviews', lambda page_size: REVIEW_FIELDS),
+    'review_comments': ('reviewThreads', get_review_thread_fields),
+    'pr_commits': ('commits', lambda page_size: COMMIT_FIELDS),
+}
+
+def get_pull_requests_query(children, page_size):
+    """
+    Return the query of a page of pull requests ordered by `updatedAt`, along with
+    the first page of the connections of the given child streams.
+    """
+    selection = PULL_REQUEST_FIELDS
+    for child in children:
+        field, get_fields = CHILD_CONNECTIONS[child]
+        selection += get_connection(field, 'first: {}'.format(CHILD_PAGE_SIZE), get_fields(CHILD_PAGE_SIZE))
+
+    pull_requests = get_connection('pullRequests',
+                                   'first: {}, after: $cursor, orderBy: {{field: UPDATED_AT, direction: DESC}}'.format(page_size),
+                                   selection)
+    return 'query($owner: String!, $name: String!, $cursor: String) { repository(owner: $owner, name: $name) { ' + pull_requests + ' } }'
+
+def get_graphql_url(base_url):
+    """
+    Return the url of the GraphQL API. The REST API of a Github Enterprise server is served
+    under `/api/v3` and its GraphQL API under `/api/graphql`.
+    """
+    if base_url.rstrip('/').endswith('/v3'):
+        return base_url.rstrip('/')[:-len('v3')] + 'graphql'
+    return base_url.rstrip('/') + '/graphql'
+
+def get_pull_requests(client, repo_path, children, page_size = DEFAULT_PULL_REQUESTS_PAGE_SIZE):
+    """
+    Yield the pages of pull request nodes of the repository, most recently updated first.
+    """
+    owner, name = repo_path.split('/', 1)
+    query = get_pull_requests_query(children, page_size)
+    cursor = None
+    while True:
+        data = client.authed_graphql('pull_requests', query, {'owner': owner, 'name': name, 'cursor': cursor}, stream='pull_requests')
+        if not data or not data.get('repository'):
+            # The repository is not accessible, as for a 404 of the REST API.
+            return
+
+        connection = data['repository']['pullRequests']
+        yield connection['nodes']
+
+        if not connection['pageInfo']['hasNextPage']:
+            break
+        cursor = connection['pageInfo']['endCursor']
+
+def get_nodes_query(type_name, field, selection):
+    """
+    Return the query of a page of a connection of the node with the given id.
+    """
+    return 'query($id: ID!, $cursor: String) {{ node(id: $id) {{ ... on {} {{ {} }} }} }}'.format(
+        type_name, get_connection(field, 'first: {}, after: $cursor'.format(MAX_PAGE_SIZE), selection))
+
+def get_all_nodes(client, source, type_name, node_id, field, selection, connection):
+    """
+    Return all nodes of a connection whose first page was fetched along with its parent node.
+    The pages after the first one are fetched with the id of the parent node.
+    """
+    nodes = list(connection['nodes'])
+    page_info = connection['pageInfo']
+    query = get_nodes_query(type_name, field, selection)
+    while page_info['hasNextPage']:
+        data = client.authed_graphql(source, query, {'id': node_id, 'cursor': page_info['endCursor']}, stream=source)
+        connection = data['node'][field]
+        nodes.extend(connection['nodes'])
+        page_info = connection['pageInfo']
+
+    return nodes
+
+def get_child_records(client, child, pull_request, repo_path):
+    """
+    Return the records of the child stream for the pull request node, in the shape of the REST API.
+    """
+    field, get_fields = CHILD_CONNECTIONS[child]
+    nodes = get_all_nodes(client, child, 'PullRequest', pull_request['id'], field, get_fields(MAX_PAGE_SIZE), pull_request[field])
+    api_url = '{}/repos/{}'.format(client.base_url, repo_path)
+
+    if child == 'reviews':
+        return [to_review(node, client.base_url, api_url, pull_request) for node in nodes]
+
+    if child == 'review_comments':
+        records = []
+        for thread in nodes:
+            comments = get_all_nodes(client, child, 'PullRequestReviewThread', thread['id'], 'comments', REVIEW_COMMENT_FIELDS, thread['comments'])
+            records.extend(to_review_comment(node, thread, client.base_url, api_url, pull_request) for node in comments)
+        return records
+
+    return [to_pr_commit(node['commit'], client.base_url, api_url) for node in nodes]
+
+def lower(value):
+    """
+    Return the lower case value of a GraphQL enum, which the REST API returns in lower case.
+    """
+    return value.lower() if value else value
+
+def to_user(actor, base_url):
+    """
+    Return the REST representation of a GraphQL actor.
+    """
+    if not actor:
+        return None
+
+    login = actor.get('login')
+    if actor.get('__typename') == 'Bot':
+        # The REST API suffixes the login of the bots.
+        login = '{}[bot]'.format(login)
+
+    return {
+        'login': login,
+        'id': actor.get('databaseId'),
+        'node_id': actor.get('id'),
+        'avatar_url': actor.get('avatarUrl'),
+        'url': '{}/users/{}'.format(base_url, quote(login)),
+        'html_url': actor.get('url'),
+        'type': actor.get('__typename'),
+        'site_admin': actor.get('isSiteAdmin', False),
+    }
+
+def to_team(team):
+    """
+    Return the REST representation of a GraphQL team.
+    """
+    return {
+        'id': team.get('databaseId'),
+        'node_id': team.get('id'),
+        'name': team.get('name'),
+        'slug': team.get('slug'),
+        'description': team.get('description'),
+        'privacy': lower(team.get('privacy')),
+        'html_url': team.get('url'),
+    }
+
+def to_pull_request(node, base_url, repo_path):
+    """
+    Return the REST representation of a GraphQL pull request, as in `pull_requests.json`.
+    """
+    api_url = '{}/repos/{}'.format(base_url, repo_path)
+    pull_url = '{}/pulls/{}'.format(api_url, node['number'])
+    milestone = node.get('milestone')
+    auto_merge = node.get('autoMergeRequest')
+    head_owner = (node.get('headRepositoryOwner') or {}).get('login')
+    base_owner = ((node.get('baseRepository') or {}).get('owner') or {}).get('login')
+    requested_reviewers = [request['requestedReviewer'] for request in node['reviewRequests']['nodes'] if request.get('requestedReviewer')]
+
+    return {
+        'id': node['databaseId'],
+        'node_id': node['id'],
+        'number': node['number'],
+        # The REST API does not have a merged state, a merged pull request is closed.
+        'state': 'open' if node['state'] == 'OPEN' else 'closed',
+        'locked': node.get('locked'),
+        'title': node.get('title'),
+        'body': node.get('body'),
+        'draft': node.get('isDraft'),
+        'user': to_user(node.get('author'), base_url),
+        'author_association': node.get('authorAssociation'),
+        'active_lock_reason': lower(node.get('activeLockReason')),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'closed_at': node.get('closedAt'),
+        'merged_at': node.get('mergedAt'),
+        'merge_commit_sha': (node.get('mergeCommit') or {}).get('oid'),
+        'labels': [{
+            'node_id': label['id'],
+            'url': '{}/labels/{}'.format(api_url, quote(label['name'])),
+            'name': label['name'],
+            'description': label.get('description'),
+            'color': label.get('color'),
+            'default': label.get('isDefault'),
+        } for label in node['labels']['nodes']],
+        'assignee': to_user(node['assignees']['nodes'][0], base_url) if node['assignees']['nodes'] else None,
+        'assignees': [to_user(assignee, base_url) for assignee in node['assignees']['nodes']],
+        'requested_reviewers': [to_user(reviewer, base_url) for reviewer in requested_reviewers if reviewer['__typename'] == 'User'],
+        'requested_teams': [to_team(team) for team in requested_reviewers if team['__typename'] == 'Team'],
+        'milestone': {
+            'node_id': milestone.get('id'),
+            'number': milestone.get('number'),
+            'url': '{}/milestones/{}'.format(api_url, milestone.get('number')),
+            'html_url': milestone.get('url'),
+            'state': lower(milestone.get('state')),
+            'title': milestone.get('title'),
+            'description': milestone.get('description'),
+            'creator': to_user(milestone.get('creator'), base_url),
+            'created_at': milestone.get('createdAt'),
+            'updated_at': milestone.get('updatedAt'),
+            'closed_at': milestone.get('closedAt'),
+            'due_on': milestone.get('dueOn'),
+        } if milestone else None,
+        'head': {
+            'label': '{}:{}'.format(head_owner, node.get('headRefName')) if head_owner else node.get('headRefName'),
+            'ref': node.get('headRefName'),
+            'sha': node.get('headRefOid'),
+        },
+        'base': {
+            'label': '{}:{}'.format(base_owner, node.get('baseRefName')) if base_owner else node.get('baseRefName'),
+            'ref': node.get('baseRefName'),
+            'sha': node.get('baseRefOid'),
+        },
+        'auto_merge': {
+            'enabled_by': to_user(auto_merge.get('enabledBy'), base_url),
+            'merge_method': lower(auto_merge.get('mergeMethod')),
+            'commit_title': auto_merge.get('commitHeadline'),
+            'commit_message': auto_merge.get('commitBody'),
+        } if auto_merge else None,
+        'url': pull_url,
+        'html_url': node.get('url'),
+        'diff_url': '{}.diff'.format(node.get('url')),
+        'patch_url': '{}.patch'.format(node.get('url')),
+        'issues_url': '{}/issues/{}'.format(api_url, node['number']),
+        'commits_url': '{}/commits'.format(pull_url),
+        'review_comments_url': '{}/comments'.format(pull_url),
+        'comments_url': '{}/issues/{}/comments'.format(api_url, node['number']),
+        'statuses_url': '{}/statuses/{}'.format(api_url, node.get('headRefOid')),
+    }
+
+def to_review(node, base_url, api_url, pull_request):
+    """
+    Return the REST representation of a GraphQL pull request review, as in `reviews.json`.
+    """
+    return {
+        'id': node['databaseId'],
+        'node_id': node['id'],
+        'user': to_user(node.get('author'), base_url),
+        'body': node.get('body'),
+        'body_html': node.get('bodyHTML'),
+        'body_text': node.get('bodyText'),
+        'state': node.get('state'),
+        'commit_id': (node.get('commit') or {}).get('oid'),
+        'author_association': node.get('authorAssociation'),
+        'submitted_at': node.get('submittedAt'),
+        'html_url': node.get('url'),
+        'pull_request_url': '{}/pulls/{}'.format(api_url, pull_request['number']),
+    }
+
+def to_reactions(reaction_groups, url):
+    """
+    Return the REST reactions summary of the GraphQL reaction groups.
+    """
+    reactions = {'url': url, 'total_count': 0}
+    contents = {'THUMBS_UP': '+1', 'THUMBS_DOWN': '-1', 'LAUGH': 'laugh', 'HOORAY': 'hooray',
+                'CONFUSED': 'confused', 'HEART': 'heart', 'ROCKET': 'rocket', 'EYES': 'eyes'}
+    for key in contents.values():
+        reactions[key] = 0
+    for group in reaction_groups or []:
+        if group['content'] in contents:
+            reactions[contents[group['content']]] = group['reactors']['totalCount']
+            reactions['total_count'] += group['reactors']['totalCount']
+    return reactions
+
+def to_review_comment(node, thread, base_url, api_url, pull_request):
+    """
+    Return the REST representation of a GraphQL review comment, as in `review_comments.json`.
+    """
+    url = '{}/pulls/comments/{}'.format(api_url, node['databaseId'])
+    return {
+        'id': node['databaseId'],
+        'node_id': node['id'],
+        'url': url,
+        'user': to_user(node.get('author'), base_url),
+        'body': node.get('body'),
+        'body_html': node.get('bodyHTML'),
+        'body_text': node.get('bodyText'),
+        'path': node.get('path'),
+        'diff_hunk': node.get('diffHunk'),
+        'position': node.get('position'),
+        'original_position': node.get('originalPosition'),
+        'line': node.get('line'),
+        'original_line': node.get('originalLine'),
+        'start_line': node.get('startLine'),
+        'original_start_line': node.get('originalStartLine'),
+        'side': thread.get('diffSide'),
+        'start_side': thread.get('startDiffSide'),
+        'commit_id': (node.get('commit') or {}).get('oid'),
+        'original_commit_id': (node.get('originalCommit') or {}).get('oid'),
+        'in_reply_to_id': (node.get('replyTo') or {}).get('databaseId'),
+        'pull_request_review_id': (node.get('pullRequestReview') or {}).get('databaseId'),
+        'author_association': node.get('authorAssociation'),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'html_url': node.get('url'),
+        'pull_request_url': '{}/pulls/{}'.format(api_url, pull_request['number']),
+        'reactions': to_reactions(node.get('reactionGroups'), '{}/reactions'.format(url)),
+    }
+
+def to_utc(value):
+    """
+    Return the `GitTimestamp` of a git actor, which keeps the UTC offset of the commit, in UTC as the REST API.
+    """
+    return singer.utils.strptime_to_utc(value).strftime('%Y-%m-%dT%H:%M:%SZ') if value else value
+
+def to_git_actor(actor):
+    """
+    Return the REST representation of a GraphQL git actor, the author or the committer of a commit.
+    """
+    if not actor:
+        return None
+    return {'name': actor.get('name'), 'email': actor.get('email'), 'date': to_utc(actor.get('date'))}
+
+def to_pr_commit(node, base_url, api_url):
+    """
+    Return the REST representation of a GraphQL commit, as in `pr_commits.json`.
+    The fields derived from the pull request are added by `PRCommits.add_fields_at_1st_level`.
+    """
+    signature = node.get('signature')
+    return {
+        'sha': node['oid'],
+        'node_id': node.get('id'),
+        'url': '{}/commits/{}'.format(api_url, node['oid']),
+        'html_url': node.get('url'),
+        'comments_url': '{}/commits/{}/comments'.format(api_url, node['oid']),
+        'commit': {
+            'url': '{}/git/commits/{}'.format(api_url, node['oid']),
+            'message': node.get('message'),
+            'author': to_git_actor(node.get('author')),
+            'committer': to_git_actor(node.get('committer')),
+            'tree': {'sha': node['tree']['oid'], 'url': '{}/git/trees/{}'.format(api_url, node['tree']['oid'])} if node.get('tree') else None,
+            'comment_count': (node.get('comments') or {}).get('totalCount'),
+            'verification': {
+                'verified': signature.get('isValid'),
+                'reason': lower(signature.get('state')),
+                'signature': signature.get('signature'),
+                'payload': signature.get('payload'),
+            } if signature else {'verified': False, 'reason': 'unsigned', 'signature': None, 'payload': None},
+        },
+        'author': to_user((node.get('author') or {}).get('user'), base_url),
+        'committer': to_user((node.get('committer') or {}).get('user'), base_url),
+        'parents': [{
+            'sha': parent['oid'],
+            'url': '{}/commits/{}'.format(api_url, parent['oid']),
+            'html_url': parent.get('url'),
+        } for parent in node['parents']['nodes']],
+    }
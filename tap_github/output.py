@@ -0,0 +1,325 @@
+import contextlib
+import queue
+import sys
+import threading
+import time
+import simplejson
+import singer
+from singer import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = singer.get_logger()
+
+# Repositories can be synced from several worker threads at once, so every Singer message
+# goes through this lock to keep the lines written to stdout whole and in order.
+WRITE_LOCK = threading.RLock()
+
+# Set default number of messages waiting for the writer thread
+DEFAULT_OUTPUT_QUEUE_SIZE = 10000
+# Set default number of bytes collected before they are written to stdout
+DEFAULT_OUTPUT_BUFFER_SIZE = 1024 * 1024
+# Interval in seconds between the metrics of the time spent writing to stdout
+METRIC_LOG_INTERVAL = 60
+# Set default number of records held to be written grouped by stream
+DEFAULT_GROUP_RECORDS_SIZE = 10000
+
+def serialize(message):
+    """
+    Return the line of the message, serialized with orjson if it is installed, as simplejson does otherwise.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(message.asdict()) + b'\n' # pylint: disable=no-member
+        except TypeError:
+            # e.g. a Decimal or a key which is not a string, which only simplejson supports.
+            pass
+    return (simplejson.dumps(message.asdict(), use_decimal=True) + '\n').encode('utf-8')
+
+class BufferedWriter: # pylint: disable=too-many-instance-attributes
+    """
+    Write the Singer messages to stdout from a dedicated thread, so the sync does not wait for the target.
+    The messages are queued in a bounded queue, collected into large writes and flushed after each STATE
+    message, which is written once the messages before it are.
+    """
+    def __init__(self, stream, max_queue_size=DEFAULT_OUTPUT_QUEUE_SIZE, buffer_size=DEFAULT_OUTPUT_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.queue = queue.Queue(max_queue_size)
+        self.error = None
+        # Time spent by the writer thread in the writes to stdout and by the sync waiting for a full queue.
+        self.blocked_seconds = 0
+        self.queue_wait_seconds = 0
+        self.last_metric_time = time.monotonic()
+        self.thread = threading.Thread(target=self.run, name='tap-github-output', daemon=True)
+        self.thread.start()
+
+    def write(self, line, flush=False):
+        """
+        Queue the line, waiting while the queue is full.
+        """
+        self.raise_error()
+        item = (line, flush)
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+
+        start = time.monotonic()
+        while True:
+            try:
+                self.queue.put(item, timeout=1)
+                break
+            except queue.Full:
+                self.raise_error()
+        self.queue_wait_seconds += time.monotonic() - start
+
+    def run(self):
+        """
+        Drain the queue into buffered writes to stdout until the writer is closed.
+        """
+        lines = []
+        size = 0
+        try:
+            while True:
+                line, flush = self.queue.get()
+                if line is not None:
+                    lines.append(line)
+                    size += len(line)
+                if flush or size >= self.buffer_size:
+                    self.write_lines(lines, flush)
+                    lines = []
+                    size = 0
+                self.queue.task_done()
+                if line is None:
+                    break
+        except Exception as err: # pylint: disable=broad-except
+            # Raised by the next write of the sync.
+            self.error = err
+            self.queue.task_done()
+            # Unblock the sync waiting for the queue.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.queue.task_done()
+
+    def write_lines(self, lines, flush):
+        """
+        Write the lines to stdout, and flush it if required.
+        """
+        start = time.monotonic()
+        if lines:
+            self.stream.write(b''.join(lines))
+        if flush:
+            self.stream.flush()
+        self.blocked_seconds += time.monotonic() - start
+
+        if flush and time.monotonic() - self.last_metric_time >= METRIC_LOG_INTERVAL:
+            self.log_metrics()
+
+    def log_metrics(self):
+        """
+        Log the time spent writing to stdout, which is high when the target is the bottleneck.
+        """
+        self.last_metric_time = time.monotonic()
+        metrics.log(LOGGER, metrics.Point('timer', 'stdout_blocked', self.blocked_seconds, {}))
+        metrics.log(LOGGER, metrics.Point('timer', 'output_queue_wait', self.queue_wait_seconds, {}))
+
+    def wait(self):
+        """
+        Wait until the queued messages are written.
+        """
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and not self.error:
+                self.queue.all_tasks_done.wait(1)
+        self.raise_error()
+
+    def raise_error(self):
+        """
+        Raise the error of the writer thread, if any.
+        """
+        if self.error:
+            raise self.error
+
+    def close(self):
+        """
+        Write and flush the queued messages, then stop the writer thread.
+        """
+        self.write(None, flush=True)
+        self.thread.join()
+        self.log_metrics()
+        self.raise_error()
+
+class RecordGroups:
+    """
+    The records held until the next STATE or SCHEMA message, grouped by stream in the order of their first record.
+    """
+    def __init__(self, max_records=DEFAULT_GROUP_RECORDS_SIZE):
+        self.max_records = max_records
+        self.groups = {}
+        self.count = 0
+
+    def add(self, stream_name, record, time_extracted):
+        """
+        Hold the record, and return True if the groups are full and have to be written.
+        """
+        self.groups.setdefault(stream_name, []).append((record, time_extracted))
+        self.count += 1
+        return self.count >= self.max_records
+
+    def pop(self):
+        """
+        Return the held records by stream, and empty the groups.
+        """
+        groups = self.groups
+        self.groups = {}
+        self.count = 0
+        return groups
+
+WRITER = None
+RECORD_GROUPS = None
+WRITTEN_SCHEMAS = None
+# The `StateWriter` which coalesces the STATE messages, set by `state.throttled_state`.
+STATE_WRITER = None
+
+@contextlib.contextmanager
+def buffered_output(config):
+    """
+    Write the messages with a `BufferedWriter` within the context if `buffered_output` is enabled in the config.
+    """
+    global WRITER # pylint: disable=global-statement
+    if str(config.get('buffered_output', '')).lower() != 'true':
+        yield
+        return
+
+    if orjson is None:
+        LOGGER.warning("The `orjson` package is not installed, the messages are serialized with simplejson.")
+    WRITER = BufferedWriter(sys.stdout.buffer,
+                            int(config.get('output_queue_size') or DEFAULT_OUTPUT_QUEUE_SIZE),
+                            int(config.get('output_buffer_size') or DEFAULT_OUTPUT_BUFFER_SIZE))
+    try:
+        yield
+    finally:
+        writer, WRITER = WRITER, None
+        writer.close()
+
+@contextlib.contextmanager
+def grouped_records(config):
+    """
+    Write the records grouped by stream within the context if `group_records` is enabled in the config.
+    """
+    global RECORD_GROUPS # pylint: disable=global-statement
+    if str(config.get('group_records', '')).lower() != 'true':
+        yield
+        return
+
+    RECORD_GROUPS = RecordGroups(int(config.get('group_records_size') or DEFAULT_GROUP_RECORDS_SIZE))
+    try:
+        yield
+    finally:
+        with WRITE_LOCK:
+            write_record_groups()
+            RECORD_GROUPS = None
+
+@contextlib.contextmanager
+def schemas_once():
+    """
+    Write the SCHEMA message of each stream once within the context, and again only if the schema changes.
+    """
+    global WRITTEN_SCHEMAS # pylint: disable=global-statement
+    WRITTEN_SCHEMAS = {}
+    try:
+        yield
+    finally:
+        WRITTEN_SCHEMAS = None
+
+def write_record_groups():
+    """
+    Write the held records, one stream after the other.
+    """
+    if RECORD_GROUPS:
+        for stream_name, records in RECORD_GROUPS.pop().items():
+            for record, time_extracted in records:
+                write_record_message(stream_name, record, time_extracted)
+
+def write_message(message, flush=False):
+    """
+    Queue the message to the writer thread.
+    """
+    line = serialize(message)
+    with WRITE_LOCK:
+        WRITER.write(line, flush)
+
+def write_record_message(stream_name, record, time_extracted):
+    """
+    Write a RECORD message.
+    """
+    if WRITER:
+        write_message(singer.RecordMessage(stream=stream_name, record=record, time_extracted=time_extracted))
+        return
+    with WRITE_LOCK:
+        singer.write_record(stream_name, record, time_extracted=time_extracted)
+
+def write_record(stream_name, record, time_extracted=None):
+    """
+    Write a RECORD message while holding the output lock, or hold it to be written with its stream.
+    """
+    if STATE_WRITER:
+        # An approximate count is enough for the interval of the STATE messages.
+        STATE_WRITER.records += 1
+    if RECORD_GROUPS:
+        with WRITE_LOCK:
+            if RECORD_GROUPS.add(stream_name, record, time_extracted):
+                write_record_groups()
+        return
+    write_record_message(stream_name, record, time_extracted)
+
+def write_schema(stream_name, schema, key_properties):
+    """
+    Write a SCHEMA message while holding the output lock, after the held records, unless it was already written.
+    """
+    with WRITE_LOCK:
+        if WRITTEN_SCHEMAS is not None:
+            if WRITTEN_SCHEMAS.get(stream_name) == (schema, key_properties):
+                return
+            WRITTEN_SCHEMAS[stream_name] = (schema, key_properties)
+        write_record_groups()
+        if WRITER:
+            write_message(singer.SchemaMessage(stream=stream_name, schema=schema, key_properties=key_properties))
+        else:
+            singer.write_schema(stream_name, schema, key_properties)
+
+def write_state(state):
+    """
+    Write a STATE message while holding the output lock, after the held records.
+    """
+    with WRITE_LOCK:
+        write_record_groups()
+        if STATE_WRITER:
+            STATE_WRITER.write(state)
+        elif WRITER:
+            # The messages before the state are flushed with it.
+            write_message(singer.StateMessage(value=state), flush=True)
+        else:
+            singer.write_state(state)
+
+def write_state_message(line):
+    """
+    Write the serialized STATE message and flush the output, while holding the output lock.
+    """
+    with WRITE_LOCK:
+        if WRITER:
+            WRITER.write(line.encode('utf-8'), flush=True)
+        else:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+def wait_written():
+    """
+    Wait until the messages queued to the writer thread, if any, are written.
+    """
+    if WRITER:
+        WRITER.wait()
@@ -0,0 +1,271 @@
+import collections
+import contextlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import singer
+
+LOGGER = singer.get_logger()
+
+PROFILE_ARG = '--profile'
+DEFAULT_PROFILE_DIR = 'tap-github-profile'
+# Set default seconds between the samples of the stacks of the threads
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Set default number of entries of each table of the summary
+DEFAULT_TOP = 25
+
+def pop_profile_arg(argv):
+    """
+    Remove the `--profile [DIR]` option from the arguments, before they are parsed by singer, and return the directory
+    of the profile, or None if the option is not given.
+    """
+    if PROFILE_ARG not in argv:
+        return None
+    index = argv.index(PROFILE_ARG)
+    del argv[index]
+    if index < len(argv) and not argv[index].startswith('-'):
+        return argv.pop(index)
+    return DEFAULT_PROFILE_DIR
+
+def get_frame_name(code):
+    """
+    Return the name of the function of the frame in the stacks.
+    """
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+class Profiler: # pylint: disable=too-many-instance-attributes
+    """
+    Sample the stacks of all the threads from a background thread, and trace the memory allocations with tracemalloc.
+
+    The samples and the memory are labelled with the repository and the stream synced by the thread, set with `label`.
+    The peak of traced memory is that of the whole process, so the peak of each label is only recorded with
+    `label_peaks`, when a single repository is synced at a time, since resetting the peak for a label would lose the
+    peaks of the other threads. Before Python 3.9, which can't reset the peak, the peak of a label is the peak since
+    the start of the tracing. Tracing the memory slows down the code which allocates the most, so it can be disabled
+    with `memory` to compare the sampled times.
+    """
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, memory=True, label_peaks=True):
+        self.interval = interval
+        self.memory = memory
+        self.label_peaks = label_peaks
+        # The peak of traced memory of the run.
+        self.peak_bytes = 0
+        # The count of each stack, folded as `label;outermost frame;...;innermost frame`.
+        self.stacks = collections.Counter()
+        self.samples = 0
+        # The stack of the labels of each thread, with the peak of traced memory within each label.
+        self.labels = {}
+        # The calls, the peak of traced memory and the net allocated bytes of each label.
+        self.label_stats = collections.defaultdict(lambda: {'calls': 0, 'peak_bytes': 0, 'allocated_bytes': 0})
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='tap-github-profiler', daemon=True)
+        self.start_time = None
+        self.elapsed = 0
+
+    def start(self):
+        """
+        Start the memory tracing and the sampling thread.
+        """
+        if self.memory:
+            tracemalloc.start()
+        self.start_time = time.monotonic()
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the sampling thread and return the snapshot of the memory still allocated, if traced, then stop the
+        tracing.
+        """
+        self.stop_event.set()
+        self.thread.join()
+        self.elapsed = time.monotonic() - self.start_time
+        if not self.memory:
+            return None
+        self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return snapshot
+
+    def run(self):
+        """
+        Sample the stacks of the other threads until stopped.
+        """
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items(): # pylint: disable=protected-access
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(get_frame_name(frame.f_code))
+                    frame = frame.f_back
+                labels = self.labels.get(thread_id)
+                root = labels[-1][0] if labels else 'thread:{}'.format(names.get(thread_id, thread_id))
+                self.stacks[';'.join([root, *reversed(frames)])] += 1
+            self.samples += 1
+
+    def enter(self, key):
+        """
+        Label the samples of the current thread with the key until `exit`.
+        """
+        labels = self.labels.setdefault(threading.get_ident(), [])
+        if not self.memory:
+            labels.append([key, 0, 0])
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if not self.label_peaks:
+            labels.append([key, 0, current])
+            return
+        if labels:
+            # The peak within the parent label so far, before it is reset for the child label.
+            labels[-1][1] = max(labels[-1][1], peak)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        labels.append([key, 0, current])
+
+    def exit(self):
+        """
+        Remove the label of the current thread, and record its memory.
+        """
+        labels = self.labels[threading.get_ident()]
+        key, peak, start = labels.pop()
+        stats = self.label_stats[key]
+        stats['calls'] += 1
+        if not self.memory:
+            return
+        current, traced_peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, traced_peak)
+        stats['allocated_bytes'] += current - start
+        if not self.label_peaks:
+            return
+        peak = max(peak, traced_peak)
+        stats['peak_bytes'] = max(stats['peak_bytes'], peak)
+        if labels:
+            labels[-1][1] = max(labels[-1][1], peak)
+
+    def get_sample_seconds(self):
+        """
+        Return the seconds between two samples, which is longer than the interval with the time to take them.
+        """
+        return self.elapsed / self.samples if self.samples else self.interval
+
+    def get_label_times(self):
+        """
+        Return the sampled seconds of each label.
+        """
+        seconds = self.get_sample_seconds()
+        times = collections.Counter()
+        for stack, count in self.stacks.items():
+            times[stack.split(';', 1)[0]] += count * seconds
+        return times
+
+    def get_function_times(self):
+        """
+        Return the sampled seconds of each function in the labelled threads, by itself and including its callees.
+        """
+        seconds = self.get_sample_seconds()
+        self_times = collections.Counter()
+        total_times = collections.Counter()
+        for stack, count in self.stacks.items():
+            root, *frames = stack.split(';')
+            if root.startswith('thread:') or not frames:
+                continue
+            self_times[frames[-1]] += count * seconds
+            for name in set(frames):
+                total_times[name] += count * seconds
+        return self_times, total_times
+
+    def write_folded(self, path):
+        """
+        Write the samples as folded stacks, the input of flamegraph.pl, speedscope and similar tools.
+        """
+        with open(path, 'w') as folded_file:
+            for stack, count in sorted(self.stacks.items()):
+                folded_file.write('{} {}\n'.format(stack, count))
+
+    def get_summary(self, snapshot, top=DEFAULT_TOP):
+        """
+        Return the summary of the top labels, functions and allocations.
+        """
+        lines = ['Profile of {:.1f}s, {} samples every {:.4f}s'.format(self.elapsed, self.samples, self.get_sample_seconds()), '']
+
+        lines.append('Top labels by sampled time, including the idle time of the threads:')
+        for key, seconds in self.get_label_times().most_common(top):
+            lines.append('  {:>10.2f}s  {}'.format(seconds, key))
+
+        self_times, total_times = self.get_function_times()
+        lines.extend(['', 'Top functions of the sync threads by own sampled time:'])
+        for name, seconds in self_times.most_common(top):
+            lines.append('  {:>10.2f}s  {}'.format(seconds, name))
+        lines.extend(['', 'Top functions of the sync threads by sampled time including their callees:'])
+        for name, seconds in total_times.most_common(top):
+            lines.append('  {:>10.2f}s  {}'.format(seconds, name))
+
+        if snapshot is None:
+            return '\n'.join(lines) + '\n'
+        lines.extend(['', 'Peak of traced memory of the run: {:.1f} MB'.format(self.peak_bytes / 1024 ** 2)])
+        if self.label_peaks:
+            lines.extend(['', 'Top labels by peak of traced memory:'])
+            for key, stats in sorted(self.label_stats.items(), key=lambda item: -item[1]['peak_bytes'])[:top]:
+                lines.append('  {:>10.1f} MB  {} ({} calls, {:+.1f} MB allocated)'.format(
+                    stats['peak_bytes'] / 1024 ** 2, key, stats['calls'], stats['allocated_bytes'] / 1024 ** 2))
+        else:
+            lines.extend(['', 'Top labels by net allocated memory, including the allocations of the concurrent repositories:'])
+            for key, stats in sorted(self.label_stats.items(), key=lambda item: -item[1]['allocated_bytes'])[:top]:
+                lines.append('  {:>+10.1f} MB  {} ({} calls)'.format(stats['allocated_bytes'] / 1024 ** 2, key, stats['calls']))
+
+        lines.extend(['', 'Top allocations still held at the end of the run:'])
+        for statistic in snapshot.statistics('lineno')[:top]:
+            lines.append('  {:>10.1f} KB  {}'.format(statistic.size / 1024, statistic.traceback))
+        return '\n'.join(lines) + '\n'
+
+PROFILER = None
+
+@contextlib.contextmanager
+def profiled(profile_dir, config):
+    """
+    Profile the run within the context if `profile_dir` is set, and write the folded stacks and the summary of the
+    profile in the directory at the end, even if the run failed. The memory is traced unless `profile_memory` is
+    disabled in the config, with the peak of each label only if the repositories are synced one at a time.
+    """
+    global PROFILER # pylint: disable=global-statement
+    if not profile_dir:
+        yield
+        return
+
+    os.makedirs(profile_dir, exist_ok=True)
+    PROFILER = Profiler(float(config.get('profile_interval') or DEFAULT_SAMPLE_INTERVAL),
+                        str(config.get('profile_memory', 'true')).lower() == 'true',
+                        int(config.get('max_concurrent_repos') or 1) <= 1)
+    PROFILER.start()
+    try:
+        yield
+    finally:
+        profiler, PROFILER = PROFILER, None
+        snapshot = profiler.stop()
+        profiler.write_folded(os.path.join(profile_dir, 'profile.folded'))
+        summary = profiler.get_summary(snapshot, int(config.get('profile_top') or DEFAULT_TOP))
+        with open(os.path.join(profile_dir, 'summary.txt'), 'w') as summary_file:
+            summary_file.write(summary)
+        LOGGER.info("Profile written to %s:\n%s", profile_dir, summary)
+
+@contextlib.contextmanager
+def label(repo, stream):
+    """
+    Label the samples and the memory of the current thread with the repository and the stream within the context,
+    when the run is profiled.
+    """
+    profiler = PROFILER
+    if profiler is None:
+        yield
+        return
+
+    profiler.enter('{}:{}'.format(repo, stream))
+    try:
+        yield
+    finally:
+        profiler.exit()
@@ -0,0 +1,166 @@
+import threading
+import time
+import singer
+
+LOGGER = singer.get_logger()
+
+# Number of requests a paced token can send in a burst
+DEFAULT_PACING_BURST = 10
+
+# Seconds during which the requests are slowed down after a secondary rate limit error
+DEFAULT_COOL_DOWN_SECONDS = 300
+
+# Seconds between two requests during the cool down
+COOL_DOWN_REQUEST_INTERVAL = 1
+
+class TokenBudget: # pylint: disable=too-few-public-methods
+    """
+    The rate limit budget of an access token, as reported by the `X-RateLimit-*` response headers.
+    """
+    def __init__(self):
+        # The budget is unknown until the first response for the token.
+        self.remaining = None
+        self.used = None
+        self.reset = None
+        # Token bucket used to pace the requests of the token.
+        self.bucket = None
+        self.bucket_updated_at = None
+
+    def get_remaining(self, now):
+        """
+        Return the remaining requests of the token, or None if unknown or the rate limit window was reset.
+        """
+        if self.reset is not None and now >= self.reset:
+            return None
+        return self.remaining
+
+class TokenPool:
+    """
+    A pool of access tokens. Each request uses the token with the most remaining requests,
+    so the client only has to wait when the rate limit of every token is exceeded.
+
+    With pacing, the pool is also a budget governor: the requests of each token are spread with a token
+    bucket refilled at the rate that spends the remaining requests, minus the reserve kept for the other
+    consumers of the token, by the reset time. The tokens are then exhausted smoothly at the end of the
+    rate limit window instead of bursting through it and waiting for up to an hour.
+    """
+    def __init__(self, tokens, reserve = 0, pacing = False, burst = DEFAULT_PACING_BURST):
+        self.tokens = list(tokens)
+        self.budgets = {token: TokenBudget() for token in self.tokens}
+        self.reserve = reserve
+        self.pacing = pacing
+        self.burst = burst
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def get_headroom(self, token, now):
+        """
+        Return the requests the token can still send, keeping the reserve. Infinite if the budget is unknown.
+        """
+        remaining = self.budgets[token].get_remaining(now)
+        return float('inf') if remaining is None else remaining - self.reserve
+
+    def get_token(self):
+        """
+        Return the token with the most headroom. A token with an unknown budget is preferred,
+        then the first token in the config order among the ones with the same budget.
+        """
+        now = time.time()
+        with self.lock:
+            return max(self.tokens, key=lambda token: self.get_headroom(token, now))
+
+    def update(self, token, headers):
+        """
+        Track the budget of the token from the `X-RateLimit-Remaining`, `X-RateLimit-Used`
+        and `X-RateLimit-Reset` headers of its response.
+        """
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        with self.lock:
+            budget = self.budgets[token]
+            budget.remaining = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Used'):
+                budget.used = int(headers['X-RateLimit-Used'])
+            if headers.get('X-RateLimit-Reset'):
+                budget.reset = int(headers['X-RateLimit-Reset'])
+
+    def get_pacing_delay(self, token):
+        """
+        Take a request from the token bucket of the token and return the seconds to wait before sending it.
+        Return 0 if pacing is disabled or the budget of the token is unknown.
+        """
+        if not self.pacing:
+            return 0
+
+        now = time.time()
+        with self.lock:
+            budget = self.budgets[token]
+            headroom = self.get_headroom(token, now)
+            if headroom == float('inf') or headroom <= 0 or budget.reset is None:
+                # Unknown budgets are not paced and exhausted tokens wait in `get_sleep_seconds`.
+                return 0
+
+            # Refill the bucket at the rate which spends the headroom by the reset time.
+            refill_rate = headroom / max(budget.reset - now, 1)
+            if budget.bucket is None:
+                budget.bucket = float(self.burst)
+            else:
+                budget.bucket = min(float(self.burst), budget.bucket + (now - budget.bucket_updated_at) * refill_rate)
+            budget.bucket_updated_at = now
+
+            budget.bucket -= 1
+            if budget.bucket >= 0:
+                return 0
+            # The request is sent once the bucket is refilled, the debt is paid by the next refills.
+            return -budget.bucket / refill_rate
+
+    def get_sleep_seconds(self):
+        """
+        Return the seconds to sleep until a token has requests available again,
+        or None if at least one token still has requests remaining above the reserve.
+        """
+        now = time.time()
+        with self.lock:
+            if any(self.get_headroom(token, now) > 0 for token in self.tokens):
+                return None
+            return int(round(min(self.budgets[token].reset or now for token in self.tokens) - now, 0))
+
+class SecondaryRateLimitCoolDown:
+    """
+    Slow down all the requests of the tap after a secondary rate limit error. No request is sent until
+    the `Retry-After` of the error is elapsed, then for the cool down period the requests of all threads
+    and of the asyncio engine are sent one at a time, at most one every `COOL_DOWN_REQUEST_INTERVAL` seconds.
+    """
+    def __init__(self, cool_down_seconds = DEFAULT_COOL_DOWN_SECONDS, request_interval = COOL_DOWN_REQUEST_INTERVAL):
+        self.cool_down_seconds = cool_down_seconds
+        self.request_interval = request_interval
+        self.resume_at = 0
+        self.cool_down_until = 0
+        self.next_request_at = 0
+        self.lock = threading.Lock()
+
+    def trigger(self, retry_after):
+        """
+        Start, or extend, the cool down after a secondary rate limit error.
+        """
+        now = time.time()
+        with self.lock:
+            self.resume_at = max(self.resume_at, now + retry_after)
+            self.cool_down_until = max(self.cool_down_until, self.resume_at + self.cool_down_seconds)
+        LOGGER.warning("Secondary rate limit exceeded. Tap will retry after %s seconds and slow down the requests for %s seconds.",
+                       retry_after, self.cool_down_seconds)
+
+    def get_delay(self):
+        """
+        Reserve the next request slot and return the seconds to wait before sending the request.
+        """
+        now = time.time()
+        with self.lock:
+            if now >= self.cool_down_until:
+                return 0
+
+            request_at = max(now, self.resume_at, self.next_request_at)
+            self.next_request_at = request_at + self.request_interval
+            return request_at - now
@@ -0,0 +1,198 @@
+from simplejson import JSONDecodeError
+import singer
+
+LOGGER = singer.get_logger()
+DEFAULT_SLEEP_SECONDS = 600
+DEFAULT_DOMAIN = "https://api.github.com"
+
+# Set default timeout of 300 seconds
+REQUEST_TIMEOUT = 300
+
+# Set default wait of a secondary rate limit error without `Retry-After` header
+DEFAULT_SECONDARY_RATE_LIMIT_RETRY_AFTER = 60
+
+class GithubException(Exception):
+    pass
+
+class Server5xxError(GithubException):
+    pass
+
+class BadCredentialsException(GithubException):
+    pass
+
+class AuthException(GithubException):
+    pass
+
+class NotFoundException(GithubException):
+    pass
+
+class BadRequestException(GithubException):
+    pass
+
+class InternalServerError(Server5xxError):
+    pass
+
+class UnprocessableError(GithubException):
+    pass
+
+class NotModifiedError(GithubException):
+    pass
+
+class MovedPermanentlyError(GithubException):
+    pass
+
+class ConflictError(GithubException):
+    pass
+
+class RateLimitExceeded(GithubException):
+    pass
+
+class TooManyRequests(GithubException):
+    pass
+
+class GraphQLError(GithubException):
+    pass
+
+class SecondaryRateLimitExceeded(GithubException):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+ERROR_CODE_EXCEPTION_MAPPING = {
+    301: {
+        "raise_exception": MovedPermanentlyError,
+        "message": "The resource you are looking for is moved to another URL."
+    },
+    304: {
+        "raise_exception": NotModifiedError,
+        "message": "The requested resource has not been modified since the last time you accessed it."
+    },
+    400:{
+        "raise_exception": BadRequestException,
+        "message": "The request is missing or has a bad parameter."
+    },
+    401: {
+        "raise_exception": BadCredentialsException,
+        "message": "Invalid authorization credentials."
+    },
+    403: {
+        "raise_exception": AuthException,
+        "message": "User doesn't have permission to access the resource."
+    },
+    404: {
+        "raise_exception": NotFoundException,
+        "message": "The resource you have specified cannot be found. Alternatively the access_token is not valid for the resource"
+    },
+    409: {
+        "raise_exception": ConflictError,
+        "message": "The request could not be completed due to a conflict with the current state of the server."
+    },
+    422: {
+        "raise_exception": UnprocessableError,
+        "message": "The request was not able to process right now."
+    },
+    429: {
+        "raise_exception": TooManyRequests,
+        "message": "Too many requests occurred."
+    },
+    500: {
+        "raise_exception": InternalServerError,
+        "message": "An error has occurred at Github's end."
+    }
+}
+
+def raise_for_error(resp, source, stream, client, should_skip_404):
+    """
+    Retrieve the error code and the error message from the response and return custom exceptions accordingly.
+    """
+    error_code = resp.status_code
+    try:
+        response_json = resp.json()
+    except JSONDecodeError:
+        response_json = {}
+
+    if error_code == 404 and should_skip_404:
+        # Add not accessible stream into list.
+        client.not_accessible_repos.add(stream)
+        details = ERROR_CODE_EXCEPTION_MAPPING.get(error_code).get("message")
+        if source == "teams":
+            details += ' or it is a personal account repository'
+        message = "HTTP-error-code: 404, Error: {}. Please refer \'{}\' for more details.".format(details, response_json.get("documentation_url"))
+        LOGGER.warning(message)
+        # Don't raise a NotFoundException
+        return None
+
+    message = "HTTP-error-code: {}, Error: {}".format(
+        error_code, ERROR_CODE_EXCEPTION_MAPPING.get(error_code, {}).get("message", "Unknown Error") if response_json == {} else response_json)
+
+    retry_after = get_secondary_rate_limit_retry_after(resp, response_json)
+    if retry_after is not None:
+        raise SecondaryRateLimitExceeded(message, retry_after) from None
+
+    if error_code > 500:
+        raise Server5xxError(message) from None
+
+    exc = ERROR_CODE_EXCEPTION_MAPPING.get(error_code, {}).get("raise_exception", GithubException)
+    raise exc(message) from None
+
+def get_secondary_rate_limit_retry_after(resp, response_json):
+    """
+    Return the seconds to wait if the response is a secondary rate limit error, otherwise None.
+    Secondary rate limits come back as a 403 or 429 with a `Retry-After` header or a specific message.
+
+    Docs: https://docs.github.com/en/rest/overview/resources-in-the-rest-api#secondary-rate-limits
+    """
+    if resp.status_code not in (403, 429):
+        return None
+
+    retry_after = resp.headers.get('Retry-After')
+    if retry_after and str(retry_after).isdigit():
+        return int(retry_after)
+
+    error_message = str(response_json.get('message', '')).lower() if isinstance(response_json, dict) else ''
+    if 'secondary rate limit' in error_message or 'abuse' in error_message:
+        # Github recommends to wait for at least one minute without `Retry-After`.
+        return DEFAULT_SECONDARY_RATE_LIMIT_RETRY_AFTER
+
+    return None
+
+def get_token_pool_sleep_seconds(token_pool, access_token, response, max_sleep_seconds):
+    """
+    Track the rate limit of the token used for the response and return the time to sleep before making a new request,
+    if the rate limit of every token of the pool is exceeded. Return None if a token still has requests remaining.
+    """
+    if 'X-RateLimit-Remaining' not in response.headers:
+        # Raise an exception if `X-RateLimit-Remaining` is not found in the header.
+        # API does include this key header if provided base URL is not a valid github custom domain.
+        raise GithubException("The API call using the specified base url was unsuccessful. Please double-check the provided base URL.")
+
+    token_pool.update(access_token, response.headers)
+    seconds_to_sleep = token_pool.get_sleep_seconds()
+    if seconds_to_sleep is None:
+        return None
+
+    if seconds_to_sleep > max_sleep_seconds:
+        message = "API rate limit exceeded, please try after {} seconds.".format(seconds_to_sleep)
+        raise RateLimitExceeded(message) from None
+
+    LOGGER.info("API rate limit exceeded for all %s access tokens. Tap will retry the data collection after %s seconds.", len(token_pool), seconds_to_sleep)
+    return max(seconds_to_sleep, 0)
+
+def check_response(resp, source, stream, client, should_skip_404, cool_down):
+    """
+    Raise the exception of the error of the response, if any, and start the cool down after a secondary rate limit error.
+    """
+    if resp.status_code == 200:
+        return
+    try:
+        raise_for_error(resp, source, stream, client, should_skip_404)
+    except SecondaryRateLimitExceeded as err:
+        cool_down.trigger(err.retry_after)
+        raise
+
+def get_next_url(resp):
+    """
+    Return the url of the next page of the response, or None if it is the last page.
+    """
+    return resp.links.get('next', {}).get('url')
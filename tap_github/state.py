@@ -0,0 +1,273 @@
+import contextlib
+import copy
+import sqlite3
+import threading
+import time
+import simplejson
+import singer
+from tap_github import output
+
+LOGGER = singer.get_logger()
+
+class ConcurrentStateManager:
+    """
+    Own the shared state while repositories are synced concurrently.
+    Each worker syncs a repository against a private copy of that repository's bookmarks,
+    and every state write of a worker is merged back into the shared state under a lock
+    before the whole state is written by the single serialized writer.
+
+    The repositories which are in flight are kept in `currently_syncing_repos` along with the
+    stream being synced for each of them, so an interrupted run can resume all of them.
+    {
+      "currently_syncing_repos": {
+        "singer-io/tap-github": "issues",
+        "singer-io/tap-stripe": null
+      }
+    }
+    """
+    def __init__(self, state):
+        self.state = state
+        self.lock = threading.RLock()
+
+        # Carry over the repository that was in flight when a sequential sync was interrupted.
+        syncing_repos = self.state.setdefault('currently_syncing_repos', {})
+        syncing_repo = self.state.pop('currently_syncing_repo', None)
+        syncing_stream = self.state.pop('currently_syncing', None)
+        if syncing_repo:
+            syncing_repos.setdefault(syncing_repo, syncing_stream)
+
+    def get_in_flight_repos(self):
+        """
+        Return the repositories that were being synced when the previous sync was interrupted.
+        """
+        with self.lock:
+            return list(self.state['currently_syncing_repos'].keys())
+
+    def start_repo(self, repo):
+        """
+        Mark the repository as in flight and return the private state the worker should sync with.
+        """
+        with self.lock:
+            syncing_stream = self.state['currently_syncing_repos'].get(repo)
+            self.state['currently_syncing_repos'][repo] = syncing_stream
+
+            repo_state = {'bookmarks': {repo: copy.deepcopy(self.state.get('bookmarks', {}).get(repo, {}))}}
+            if syncing_stream:
+                repo_state['currently_syncing'] = syncing_stream
+            output.write_state(self.state)
+        return repo_state
+
+    def write_repo_state(self, repo, repo_state):
+        """
+        Merge the private state of a worker into the shared state and write the shared state.
+        """
+        with self.lock:
+            self.state.setdefault('bookmarks', {})[repo] = copy.deepcopy(repo_state.get('bookmarks', {}).get(repo, {}))
+            self.state['currently_syncing_repos'][repo] = singer.get_currently_syncing(repo_state)
+            output.write_state(self.state)
+
+    def get_repo_activity(self, repo):
+        """
+        Return the activity of the repository saved at the end of its last sync.
+        """
+        with self.lock:
+            return self.state.get('repo_activity', {}).get(repo)
+
+    def finish_repo(self, repo, repo_state, activity=None):
+        """
+        Merge the final bookmarks and the activity of the repository and remove it from the in flight repositories.
+        """
+        with self.lock:
+            self.state.setdefault('bookmarks', {})[repo] = copy.deepcopy(repo_state.get('bookmarks', {}).get(repo, {}))
+            if activity:
+                self.state.setdefault('repo_activity', {})[repo] = activity
+            self.state['currently_syncing_repos'].pop(repo, None)
+            output.write_state(self.state)
+
+    def finish(self):
+        """
+        Flush `currently_syncing_repos` once all repositories are synced.
+        """
+        with self.lock:
+            self.state.pop('currently_syncing_repos', None)
+            output.write_state(self.state)
+
+def dumps(value):
+    """
+    Serialize a value of the state as singer does.
+    """
+    return simplejson.dumps(value, use_decimal=True)
+
+class StateWriter: # pylint: disable=too-many-instance-attributes
+    """
+    Coalesce the STATE messages of a large state. The state passed to each write is consistent with the records
+    written before it, so the last one is written once `interval_seconds` elapsed or `interval_records` records were
+    written since the previous STATE message, and at the end of the sync. A coalesced state is only ever behind the
+    records, never ahead of them.
+
+    The state is kept serialized by entry of its top level objects, e.g. the bookmarks of each repository, and only
+    the entries which changed since the previous STATE message are serialized again. With `db_path`, the entries are
+    also saved in a SQLite file, which is updated with the changed entries once the STATE message is written.
+    """
+    def __init__(self, interval_seconds=0, interval_records=0, db_path=None):
+        self.interval_seconds = interval_seconds
+        self.interval_records = interval_records
+        self.state = None
+        self.last_write_time = None
+        self.records = 0
+        self.written = 0
+        self.coalesced = 0
+
+        # The last written value of each entry, keyed by (key, None) for a top level value and (key, name)
+        # for the entries of a top level object, with its serialization.
+        self.values = {}
+        self.fragments = {}
+
+        self.connection = None
+        if db_path:
+            self.connection = sqlite3.connect(db_path, check_same_thread=False)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS state_entries ('
+                                    'key TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, name))')
+            self.connection.commit()
+
+    def is_due(self):
+        """
+        Return True if the coalesced state has to be written.
+        """
+        if self.last_write_time is None or not (self.interval_seconds or self.interval_records):
+            return True
+        if self.interval_seconds and time.monotonic() - self.last_write_time >= self.interval_seconds:
+            return True
+        return bool(self.interval_records) and self.records >= self.interval_records
+
+    def write(self, state):
+        """
+        Take the state of a STATE message, and write it if it is due.
+        """
+        self.state = state
+        if self.is_due():
+            self.flush()
+        else:
+            self.coalesced += 1
+
+    def update(self, state):
+        """
+        Serialize the entries of the state which changed since the previous STATE message,
+        and return the changed and the removed entries.
+        """
+        entries = {}
+        for key, value in state.items():
+            if isinstance(value, dict):
+                entries[(key, None)] = {}
+                entries.update(((key, name), entry) for name, entry in value.items())
+            else:
+                entries[(key, None)] = value
+
+        changed = []
+        for entry_key, value in entries.items():
+            if entry_key not in self.values or self.values[entry_key] != value:
+                self.values[entry_key] = copy.deepcopy(value)
+                self.fragments[entry_key] = dumps(value)
+                changed.append(entry_key)
+        removed = [entry_key for entry_key in self.values if entry_key not in entries]
+        for entry_key in removed:
+            del self.values[entry_key]
+            del self.fragments[entry_key]
+        return changed, removed
+
+    def get_message(self):
+        """
+        Return the STATE message from the serialized entries.
+        """
+        values = {}
+        for (key, name), fragment in self.fragments.items():
+            if name is None:
+                values.setdefault(key, [None, []])[0] = fragment
+            else:
+                values.setdefault(key, [None, []])[1].append('{}: {}'.format(dumps(name), fragment))
+        value = ', '.join('{}: {}'.format(dumps(key), '{' + ', '.join(entries) + '}' if entries else fragment)
+                          for key, (fragment, entries) in values.items())
+        return '{"type": "STATE", "value": {' + value + '}}\n'
+
+    def save(self, changed, removed):
+        """
+        Save the changed and the removed entries in the SQLite file.
+        """
+        self.connection.executemany('DELETE FROM state_entries WHERE key = ? AND name = ?',
+                                    [(key, name or '') for key, name in removed])
+        self.connection.executemany('INSERT OR REPLACE INTO state_entries VALUES (?, ?, ?)',
+                                    [(key, name or '', self.fragments[(key, name)]) for key, name in changed])
+        self.connection.commit()
+
+    def flush(self):
+        """
+        Write the last state taken, if any.
+        """
+        if self.state is None:
+            return
+        changed, removed = self.update(self.state)
+        output.write_state_message(self.get_message())
+        if self.connection:
+            # Wait for the STATE message to be written, so the file is never ahead of the output.
+            output.wait_written()
+            self.save(changed, removed)
+        self.state = None
+        self.records = 0
+        self.written += 1
+        self.last_write_time = time.monotonic()
+
+    def close(self):
+        """
+        Close the SQLite file.
+        """
+        LOGGER.info("Wrote %s STATE messages, coalesced %s.", self.written, self.coalesced)
+        if self.connection:
+            self.connection.close()
+
+def load_state(db_path):
+    """
+    Return the state saved in the SQLite file of a `StateWriter`.
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute('CREATE TABLE IF NOT EXISTS state_entries ('
+                           'key TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, name))')
+        rows = connection.execute('SELECT key, name, value FROM state_entries ORDER BY rowid').fetchall()
+    finally:
+        connection.close()
+
+    state = {}
+    for key, name, value in rows:
+        value = simplejson.loads(value, use_decimal=True)
+        if name:
+            state.setdefault(key, {})[name] = value
+        elif isinstance(value, dict):
+            # The entries of a top level object are saved in their own rows.
+            state.setdefault(key, {})
+        else:
+            state[key] = value
+    return state
+
+@contextlib.contextmanager
+def throttled_state(config):
+    """
+    Write the STATE messages with a `StateWriter` within the context if `state_interval_seconds`,
+    `state_interval_records` or `state_db_path` is set in the config.
+    """
+    interval_seconds = float(config.get('state_interval_seconds') or 0)
+    interval_records = int(config.get('state_interval_records') or 0)
+    db_path = config.get('state_db_path')
+    if not (interval_seconds or interval_records or db_path):
+        yield
+        return
+
+    state_writer = StateWriter(interval_seconds, interval_records, db_path)
+    output.STATE_WRITER = state_writer
+    try:
+        yield
+        # The last state taken is consistent with the records, unless the sync failed in between.
+        with output.WRITE_LOCK:
+            state_writer.flush()
+    finally:
+        output.STATE_WRITER = None
+        state_writer.close()
@@ -1,6 +1,10 @@
+import contextlib
 from datetime import datetime
+import threading
 import singer
 from singer import (metrics, bookmarks, metadata)
+from tap_github import output, graphql, profiling, transform
+from tap_github.client import NotFoundException
 
 LOGGER = singer.get_logger()
 DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
@@ -22,6 +26,132 @@ def get_schema(catalog, stream_id):
     stream_catalog = [cat for cat in catalog if cat['tap_stream_id'] == stream_id ][0]
     return stream_catalog
 
+class StreamContext: # pylint: disable=too-many-instance-attributes
+    """
+    The catalog entry of a stream with its metadata map and transformers, built once per sync instead of for each record.
+    """
+    def __init__(self, stream_catalog, config=None, internal_fields=()):
+        config = config or {}
+        self.stream_catalog = stream_catalog
+        self.schema = stream_catalog['schema']
+        self.metadata = metadata.to_map(stream_catalog['metadata'])
+        self.projected_fields = transform.get_projected_fields(self.schema, self.metadata, internal_fields)
+        # The deselected fields read by the tap, which are removed from a copy of the record only.
+        self.protected_fields = set(internal_fields) & transform.get_deselected_fields(self.metadata, nested=False)
+        # The transformers are kept per thread, as the repositories can be synced concurrently, and exited by `close`.
+        self.thread_local = threading.local()
+        self.transformers = []
+        self.lock = threading.Lock()
+        self.compiled_transform = None
+        if str(config.get('compiled_transform', '')).lower() == 'true':
+            self.compiled_transform = transform.get_compiled_transform(self.schema, config.get('transform_cache_dir'))
+            self.deselected_fields = transform.get_deselected_fields(self.metadata)
+
+    def project(self, record):
+        """
+        Return the record with only the selected fields and the fields read by the tap, before it is transformed.
+        """
+        if self.projected_fields is None or not isinstance(record, dict):
+            return record
+        return {key: value for key, value in record.items() if key in self.projected_fields}
+
+    def transform(self, record):
+        """
+        Transform the record with the schema and the metadata of the stream.
+        """
+        if self.protected_fields:
+            record = dict(record)
+        if self.compiled_transform:
+            if self.deselected_fields is None:
+                record = self.get_transformer().filter_data_by_metadata(record, self.metadata)
+            elif isinstance(record, dict):
+                for field in self.deselected_fields:
+                    record.pop(field, None)
+            rec = self.compiled_transform(record)
+            if rec is not transform.FAIL:
+                return rec
+            # The record does not match the schema, the transformer of singer raises the errors.
+
+        return self.get_transformer().transform(record, self.schema, metadata=self.metadata)
+
+    def get_transformer(self):
+        """
+        Return the transformer of the current thread, without the errors of the previous record.
+        """
+        transformer = getattr(self.thread_local, 'transformer', None)
+        if transformer is None:
+            transformer = self.thread_local.transformer = singer.Transformer()
+            with self.lock:
+                self.transformers.append(transformer)
+        # The errors of a record are only raised for this record.
+        transformer.errors = []
+        return transformer
+
+    def close(self):
+        """
+        Exit the transformers, which logs the paths they removed and filtered.
+        """
+        with self.lock:
+            for transformer in self.transformers:
+                transformer.log_warning()
+            self.transformers = []
+
+class SyncContext:
+    """
+    The runtime context of a sync: the catalog indexed by stream, with the context of each stream and
+    the stream instances, built once when first used.
+    """
+    def __init__(self, catalog, config=None):
+        self.catalog = catalog
+        self.config = config
+        self.stream_contexts = {}
+        self.stream_objects = {}
+        self.lock = threading.Lock()
+
+    def get_stream(self, stream_id):
+        """
+        Return the context of the stream.
+        """
+        stream_context = self.stream_contexts.get(stream_id)
+        if stream_context is None:
+            with self.lock:
+                if stream_id not in self.stream_contexts:
+                    self.stream_contexts[stream_id] = StreamContext(get_schema(self.catalog, stream_id), self.config,
+                                                                  self.get_stream_object(stream_id).get_internal_fields())
+                stream_context = self.stream_contexts[stream_id]
+        return stream_context
+
+    def get_stream_object(self, stream_id):
+        """
+        Return the shared instance of the stream, used to read its attributes.
+        """
+        stream_object = self.stream_objects.get(stream_id)
+        if stream_object is None:
+            stream_object = self.stream_objects.setdefault(stream_id, STREAMS[stream_id]())
+        return stream_object
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        # Exit the transformers of the streams.
+        for stream_context in self.stream_contexts.values():
+            stream_context.close()
+
+def get_sync_context(catalog):
+    """
+    Return the sync context of the catalog, which is built if the catalog is not already a sync context.
+    """
+    if isinstance(catalog, SyncContext):
+        return catalog
+    return SyncContext(catalog)
+
+def get_checkpoint_pages(config):
+    """
+    Return the number of pages between the checkpoints of the incremental streams, 0 if they are disabled.
+    """
+    return int((config or {}).get('checkpoint_pages') or 0)
+
 def get_child_full_url(domain, child_object, repo_path, parent_id, grand_parent_id):
     """
     Build the child stream's URL based on the parent and the grandparent's ids.
@@ -68,6 +198,11 @@ class Stream:
     use_repository = False
     headers = {'Accept': '*/*'}
     parent = None
+    # Fields of the record and of the parent record read by `add_fields_at_1st_level`, which are kept by the projection.
+    internal_fields = []
+    parent_fields = []
+    # Fetch the pages of the listings concurrently, with `parallel_pages`.
+    parallel_pages = False
 
     def build_url(self, base_url, repo_path, bookmark):
         """
@@ -125,6 +260,71 @@ class Stream:
         for child in stream_obj.children:
             self.write_bookmarks(child, selected_streams, bookmark_value, repo_path, state)
 
+    def get_checkpoint(self, state, repo_path, full_url):
+        """
+        Return the checkpoint of an interrupted sync of the stream from the same url, if any.
+        """
+        checkpoint = (bookmarks.get_bookmark(state, repo_path, self.tap_stream_id) or {}).get('checkpoint')
+        if checkpoint and checkpoint.get('url') == full_url:
+            LOGGER.info("Resuming the sync of %s for %s from the checkpoint at %s", self.tap_stream_id, repo_path, checkpoint['next'])
+            return checkpoint
+        return None
+
+    def write_checkpoint(self, state, repo_path, since, checkpoint, write_state):
+        """
+        Write the checkpoint of the pages synced so far, along with the bookmark the stream was synced from.
+        The bookmark of the stream is only written once all its pages are synced, which drops the checkpoint.
+        """
+        bookmark = dict(bookmarks.get_bookmark(state, repo_path, self.tap_stream_id) or {}, since=since, checkpoint=checkpoint)
+        singer.write_bookmark(state, repo_path, self.tap_stream_id, bookmark)
+        (write_state or output.write_state)(state)
+
+    def write_page_checkpoint(self, state, repo_path, selected_stream_ids, since, checkpoint, checkpoint_pages, page, response, write_state):
+        """
+        Write the checkpoint every `checkpoint_pages` pages, if the listing has a next page.
+        Only a selected stream is checkpointed, the bookmark of a deselected parent is never written to drop it.
+        """
+        if not checkpoint_pages or page % checkpoint_pages or self.tap_stream_id not in selected_stream_ids:
+            return
+        next_url = response.links.get('next', {}).get('url')
+        if next_url:
+            self.write_checkpoint(state, repo_path, since, dict(checkpoint, next=next_url), write_state)
+
+    def get_parent_key(self, record):
+        """
+        Return the key of the record in the parents whose children were synced.
+        """
+        return ','.join(str(record.get(key)) for key in self.key_properties)
+
+    def get_synced_parents(self, state, repo_path):
+        """
+        Return the replication key value of the parents whose children were synced before the sync of the stream was
+        interrupted, by the key of the parent.
+        """
+        return (bookmarks.get_bookmark(state, repo_path, self.tap_stream_id) or {}).get('synced_parents', {})
+
+    def drop_synced_parents(self, state, repo_path):
+        """
+        Drop the parents saved by an interrupted sync, even if the bookmark of the stream is not written because it is
+        not selected.
+        """
+        (bookmarks.get_bookmark(state, repo_path, self.tap_stream_id) or {}).pop('synced_parents', None)
+
+    def write_synced_parent(self, state, repo_path, since, record, checkpoint_children, write_state):
+        """
+        Save the parent once its children are synced, along with the bookmark the stream was synced from, if the
+        children are checkpointed. The parents are dropped once the bookmark of the stream is written, at the end of its sync.
+        """
+        if not checkpoint_children:
+            return
+        bookmark = bookmarks.get_bookmark(state, repo_path, self.tap_stream_id)
+        if bookmark is None:
+            bookmark = {}
+            singer.write_bookmark(state, repo_path, self.tap_stream_id, bookmark)
+        bookmark['since'] = since
+        bookmark.setdefault('synced_parents', {})[self.get_parent_key(record)] = record.get(self.replication_keys)
+        (write_state or output.write_state)(state)
+
     # pylint: disable=no-self-use
     def get_child_records(self,
                           client,
@@ -141,8 +341,11 @@ class Stream:
                           parent_record = None):
         """
         Retrieve and write all the child records for each updated parent based on the parent record and its ids.
+        Return the number of child records retrieved.
         """
-        child_object = STREAMS[child_stream]()
+        context = get_sync_context(catalog)
+        child_object = context.get_stream_object(child_stream)
+        child_record_count = 0
 
         child_bookmark_value = get_bookmark(state, repo_path, child_object.tap_stream_id, "since", start_date)
 
@@ -150,9 +353,9 @@ class Stream:
             parent_id = grand_parent_id
 
         child_full_url = get_child_full_url(client.base_url, child_object, repo_path, parent_id, grand_parent_id)
-        stream_catalog = get_schema(catalog, child_object.tap_stream_id)
+        stream_context = context.get_stream(child_object.tap_stream_id)
 
-        with metrics.record_counter(child_object.tap_stream_id) as counter:
+        with profiling.label(repo_path, child_object.tap_stream_id), metrics.record_counter(child_object.tap_stream_id) as counter:
             for response in client.authed_get_all_pages(
                 child_object.tap_stream_id,
                 child_full_url,
@@ -162,39 +365,105 @@ class Stream:
                 extraction_time = singer.utils.now()
 
                 if isinstance(records, list):
-                    # Loop through all the records of response
-                    for record in records:
-                        record['_sdc_repository'] = repo_path
-                        child_object.add_fields_at_1st_level(record = record, parent_record = parent_record)
+                    child_record_count += len(records)
+                    with child_object.prefetch_child_records(client, records, repo_path, state, stream_to_sync, grand_parent_id):
+                        # Loop through all the records of response
+                        for record in records:
+                            record = stream_context.project(record)
+                            record['_sdc_repository'] = repo_path
+                            child_object.add_fields_at_1st_level(record = record, parent_record = parent_record)
 
-                        with singer.Transformer() as transformer:
-
-                            rec = transformer.transform(record, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
+                            rec = stream_context.transform(record)
 
                             if child_object.tap_stream_id in selected_stream_ids and record.get(child_object.replication_keys, start_date) >= child_bookmark_value:
-                                singer.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
+                                output.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
                                 counter.increment()
 
-                        # Loop thru each child and nested child in the parent and fetch all the child records.
-                        for nested_child in child_object.children:
-                            if nested_child in stream_to_sync:
-                                # Collect id of child record to pass in the API of its sub-child.
-                                child_id = tuple(record.get(key) for key in STREAMS[nested_child]().id_keys)
-                                # Here, grand_parent_id is the id of 1st level parent(main parent) which is required to
-                                # pass in the API of the current child's sub-child.
-                                child_object.get_child_records(client, catalog, nested_child, child_id, repo_path, state, start_date, bookmark_dttm, stream_to_sync, selected_stream_ids, grand_parent_id, record)
+                            # Loop thru each child and nested child in the parent and fetch all the child records.
+                            for nested_child in child_object.children:
+                                if nested_child in stream_to_sync:
+                                    # Collect id of child record to pass in the API of its sub-child.
+                                    child_id = tuple(record.get(key) for key in context.get_stream_object(nested_child).id_keys)
+                                    # Here, grand_parent_id is the id of 1st level parent(main parent) which is required to
+                                    # pass in the API of the current child's sub-child.
+                                    child_object.get_child_records(client, context, nested_child, child_id, repo_path, state, start_date, bookmark_dttm, stream_to_sync, selected_stream_ids, grand_parent_id, record)
 
                 else:
                     # Write JSON response directly if it is a single record only.
+                    child_record_count += 1
+                    records = stream_context.project(records)
                     records['_sdc_repository'] = repo_path
                     child_object.add_fields_at_1st_level(record = records, parent_record = parent_record)
 
-                    with singer.Transformer() as transformer:
+                    rec = stream_context.transform(records)
+                    if child_object.tap_stream_id in selected_stream_ids and records.get(child_object.replication_keys, start_date) >= child_bookmark_value :
+
+                        output.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
+
+        return child_record_count
 
-                        rec = transformer.transform(records, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
-                        if child_object.tap_stream_id in selected_stream_ids and records.get(child_object.replication_keys, start_date) >= child_bookmark_value :
+    def sync_child_streams(self, client, context, record, repo_path, state, start_date, stream_to_sync, selected_stream_ids):
+        """
+        Sync the child streams of the record which are selected, or whose nested children are selected.
+        """
+        for child in self.children:
+            if child in stream_to_sync:
+                parent_id = tuple(record.get(key) for key in context.get_stream_object(child).id_keys)
+                self.get_child_records(client,
+                                       context,
+                                       child,
+                                       parent_id,
+                                       repo_path,
+                                       state,
+                                       start_date,
+                                       record.get(self.replication_keys),
+                                       stream_to_sync,
+                                       selected_stream_ids,
+                                       parent_record = record)
+
+    @contextlib.contextmanager
+    def prefetch_child_records(self, client, records, repo_path, state, stream_to_sync, parent_id = None):
+        """
+        Fetch the pages of the child streams for all the records of a page concurrently, when the asyncio engine
+        of the client is enabled. The child records are written afterwards by `get_child_records` in the usual order,
+        within the context, and the pages which were not read, e.g. of the records skipped by the sync, are released
+        at its end.
+        """
+        calls = []
+        if self.children and client.async_client:
+            for record in records:
+                for child in self.children:
+                    if child in stream_to_sync and not self.is_child_cached(client, child, repo_path, state, record):
+                        child_object = STREAMS[child]()
+                        child_id = tuple(record.get(key) for key in child_object.id_keys)
+                        child_full_url = get_child_full_url(client.base_url, child_object, repo_path, parent_id or child_id, child_id)
+                        calls.append((child_object.tap_stream_id, child_full_url, child_object.tap_stream_id))
+            client.prefetch_all_pages(calls)
+        try:
+            yield
+        finally:
+            client.release_prefetched_pages(calls)
+
+    # pylint: disable=no-self-use,unused-argument
+    def is_child_cached(self, client, child_stream, repo_path, state, record):
+        """
+        Return True if the pages of the child stream for the record don't need to be fetched in advance.
+        """
+        return False
 
-                            singer.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
+    def get_internal_fields(self):
+        """
+        Return the fields of the records read by the tap, which are kept even if they are not selected.
+        """
+        fields = set(self.key_properties) | set(self.internal_fields)
+        if self.replication_keys:
+            fields.add(self.replication_keys)
+        for child in self.children:
+            # The ids of the child urls and the fields added to the child records.
+            child_object = STREAMS[child]()
+            fields.update(child_object.id_keys)
+            fields.update(child_object.parent_fields)
+        return fields
 
     # pylint: disable=unnecessary-pass
     def add_fields_at_1st_level(self, record, parent_record = None):
@@ -204,6 +473,8 @@ class Stream:
         pass
 
 class FullTableStream(Stream):
+    parallel_pages = True
+
     def sync_endpoint(self,
                         client,
                         state,
@@ -211,7 +482,8 @@ class FullTableStream(Stream):
                         repo_path,
                         start_date,
                         selected_stream_ids,
-                        stream_to_sync
+                        stream_to_sync,
+                        write_state=None # pylint: disable=unused-argument
                         ):
         """
         A common function sync full table streams.
@@ -220,10 +492,12 @@ class FullTableStream(Stream):
         # build full url
         full_url = self.build_url(client.base_url, repo_path, None)
 
-        stream_catalog = get_schema(catalog, self.tap_stream_id)
+        context = get_sync_context(catalog)
+        stream_context = context.get_stream(self.tap_stream_id)
 
+        get_all_pages = client.authed_get_all_pages_in_parallel if self.parallel_pages else client.authed_get_all_pages
         with metrics.record_counter(self.tap_stream_id) as counter:
-            for response in client.authed_get_all_pages(
+            for response in get_all_pages(
                     self.tap_stream_id,
                     full_url,
                     self.headers,
@@ -231,37 +505,22 @@ class FullTableStream(Stream):
             ):
                 records = response.json()
                 extraction_time = singer.utils.now()
-                # Loop through all records
-                for record in records:
-
-                    record['_sdc_repository'] = repo_path
-                    self.add_fields_at_1st_level(record = record, parent_record = None)
+                with self.prefetch_child_records(client, records, repo_path, state, stream_to_sync):
+                    # Loop through all records
+                    for record in records:
+                        record = stream_context.project(record)
+                        record['_sdc_repository'] = repo_path
+                        self.add_fields_at_1st_level(record = record, parent_record = None)
 
-                    with singer.Transformer() as transformer:
-                        rec = transformer.transform(record, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
+                        rec = stream_context.transform(record)
                         if self.tap_stream_id in selected_stream_ids:
 
-                            singer.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                            output.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
 
                             counter.increment()
 
-                    for child in self.children:
-                        if child in stream_to_sync:
-
-                            parent_id = tuple(record.get(key) for key in STREAMS[child]().id_keys)
-
-                            # Sync child stream, if it is selected or its nested child is selected.
-                            self.get_child_records(client,
-                                                catalog,
-                                                child,
-                                                parent_id,
-                                                repo_path,
-                                                state,
-                                                start_date,
-                                                record.get(self.replication_keys),
-                                                stream_to_sync,
-                                                selected_stream_ids,
-                                                parent_record = record)
+                        # Sync the child streams, if they are selected or their nested children are selected.
+                        self.sync_child_streams(client, context, record, repo_path, state, start_date, stream_to_sync, selected_stream_ids)
 
         return state
 
@@ -273,7 +532,8 @@ class IncrementalStream(Stream):
                       repo_path,
                       start_date,
                       selected_stream_ids,
-                      stream_to_sync
+                      stream_to_sync,
+                      write_state=None
                       ):
 
         """
@@ -291,61 +551,61 @@ class IncrementalStream(Stream):
         # build full url
         full_url = self.build_url(client.base_url, repo_path, min_bookmark_value)
 
-        stream_catalog = get_schema(catalog, self.tap_stream_id)
+        context = get_sync_context(catalog)
+        stream_context = context.get_stream(self.tap_stream_id)
+        checkpoint_pages = get_checkpoint_pages(context.config)
 
+        # Resume from the next page of the checkpoint with the max bookmark of the pages synced before the interruption.
+        checkpoint = self.get_checkpoint(state, repo_path, full_url) or {}
+        page_url = checkpoint.get('next', full_url)
+        max_bookmark_value = max(max_bookmark_value, checkpoint.get('bookmark', max_bookmark_value))
+
+        get_all_pages = client.authed_get_all_pages_in_parallel if self.parallel_pages else client.authed_get_all_pages
         with metrics.record_counter(self.tap_stream_id) as counter:
-            for response in client.authed_get_all_pages(
+            for page, response in enumerate(get_all_pages(
                     self.tap_stream_id,
-                    full_url,
+                    page_url,
                     self.headers,
                     stream = self.tap_stream_id
-            ):
+            ), 1):
                 records = response.json()
                 extraction_time = singer.utils.now()
-                # Loop through all records
-                for record in records:
+                # Only the children of the records updated after the bookmark are synced.
+                with self.prefetch_child_records(client, (record for record in records
+                                                          if (record.get(self.replication_keys) or '') >= min_bookmark_value),
+                                                 repo_path, state, stream_to_sync):
+                    # Loop through all records
+                    for record in records:
+                        record = stream_context.project(record)
+                        record['_sdc_repository'] = repo_path
+                        self.add_fields_at_1st_level(record = record, parent_record = None)
 
-                    record['_sdc_repository'] = repo_path
-                    self.add_fields_at_1st_level(record = record, parent_record = None)
-
-                    with singer.Transformer() as transformer:
-                        if record.get(self.replication_keys):
-                            if record[self.replication_keys] >= max_bookmark_value:
-                                # Update max_bookmark_value
-                                max_bookmark_value = record[self.replication_keys]
-
-                            bookmark_dttm = record[self.replication_keys]
-
-                            # Keep only records whose bookmark is after the last_datetime
-                            if bookmark_dttm >= min_bookmark_value:
-
-                                if self.tap_stream_id in selected_stream_ids and bookmark_dttm >= parent_bookmark_value:
-                                    rec = transformer.transform(record, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
-
-                                    singer.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
-                                    counter.increment()
-
-                                for child in self.children:
-                                    if child in stream_to_sync:
-
-                                        parent_id = tuple(record.get(key) for key in STREAMS[child]().id_keys)
-
-                                        # Sync child stream, if it is selected or its nested child is selected.
-                                        self.get_child_records(client,
-                                                            catalog,
-                                                            child,
-                                                            parent_id,
-                                                            repo_path,
-                                                            state,
-                                                            start_date,
-                                                            record.get(self.replication_keys),
-                                                            stream_to_sync,
-                                                            selected_stream_ids,
-                                                            parent_record = record)
-                        else:
+                        if not record.get(self.replication_keys):
                             LOGGER.warning("Skipping this record for %s stream with %s = %s as it is missing replication key %s.",
                                         self.tap_stream_id, self.key_properties, record[self.key_properties], self.replication_keys)
+                            continue
+
+                        if record[self.replication_keys] >= max_bookmark_value:
+                            # Update max_bookmark_value
+                            max_bookmark_value = record[self.replication_keys]
+
+                        bookmark_dttm = record[self.replication_keys]
+
+                        # Keep only records whose bookmark is after the last_datetime
+                        if bookmark_dttm >= min_bookmark_value:
 
+                            if self.tap_stream_id in selected_stream_ids and bookmark_dttm >= parent_bookmark_value:
+                                rec = stream_context.transform(record)
+
+                                output.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                                counter.increment()
+
+                            # Sync the child streams, if they are selected or their nested children are selected.
+                            self.sync_child_streams(client, context, record, repo_path, state, start_date, stream_to_sync, selected_stream_ids)
+
+                # The records are not ordered, so the next page and the max bookmark so far are saved.
+                self.write_page_checkpoint(state, repo_path, selected_stream_ids, parent_bookmark_value,
+                                           {"url": full_url, "bookmark": max_bookmark_value}, checkpoint_pages, page, response, write_state)
 
             # Write bookmark for incremental stream.
             self.write_bookmarks(self.tap_stream_id, selected_stream_ids, max_bookmark_value, repo_path, state)
@@ -361,7 +621,8 @@ class IncrementalOrderedStream(Stream):
                       repo_path,
                       start_date,
                       selected_stream_ids,
-                      stream_to_sync
+                      stream_to_sync,
+                      write_state=None
                       ):
         """
         A sync function for streams that have records in the descending order of replication key value. For such streams,
@@ -376,71 +637,88 @@ class IncrementalOrderedStream(Stream):
         # Build full url
         full_url = self.build_url(client.base_url, repo_path, bookmark_value)
         synced_all_records = False
-        stream_catalog = get_schema(catalog, self.tap_stream_id)
+        context = get_sync_context(catalog)
+        stream_context = context.get_stream(self.tap_stream_id)
+        checkpoint_pages = get_checkpoint_pages(context.config)
+        # The parents are only saved in the bookmark of a selected stream, the bookmark of a deselected parent is never
+        # written to drop them.
+        checkpoint_children = (str((context.config or {}).get('checkpoint_children', '')).lower() == 'true'
+                               and self.tap_stream_id in selected_stream_ids
+                               and any(child in stream_to_sync for child in self.children))
+        synced_parents = self.get_synced_parents(state, repo_path)
 
         parent_bookmark_value = bookmark_value
-        record_counter = 0
+        # Resume from the next page of the checkpoint, the bookmark is still the one of the first record synced before
+        # the interruption.
+        checkpoint = self.get_checkpoint(state, repo_path, full_url) or {}
+        page_url = checkpoint.get('next', full_url)
+        bookmark_value = checkpoint.get('bookmark', bookmark_value)
+        record_counter = 1 if checkpoint else 0
+
         with metrics.record_counter(self.tap_stream_id) as counter:
-            for response in client.authed_get_all_pages(
+            for page, response in enumerate(client.authed_get_all_pages(
                     self.tap_stream_id,
-                    full_url,
+                    page_url,
                     stream = self.tap_stream_id
-            ):
+            ), 1):
                 records = response.json()
                 extraction_time = singer.utils.now()
-                for record in records:
-                    record['_sdc_repository'] = repo_path
-                    self.add_fields_at_1st_level(record = record, parent_record = None)
+                # Only the children of the records updated after the bookmark, and not synced before an interruption, are synced.
+                with self.prefetch_child_records(client, (record for record in records
+                                                          if (record.get(self.replication_keys) or '') >= min_bookmark_value
+                                                          and synced_parents.get(self.get_parent_key(record)) != record.get(self.replication_keys)),
+                                                 repo_path, state, stream_to_sync):
+                    for record in records:
+                        record = stream_context.project(record)
+                        record['_sdc_repository'] = repo_path
+                        self.add_fields_at_1st_level(record = record, parent_record = None)
 
-                    updated_at = record.get(self.replication_keys)
+                        updated_at = record.get(self.replication_keys)
 
-                    if record_counter == 0 and updated_at > bookmark_value:
-                        # Consider replication key value of 1st record as bookmark value.
-                        # Because all records are in descending order of replication key value
-                        bookmark_value = updated_at
-                    record_counter = record_counter + 1
+                        if record_counter == 0 and updated_at > bookmark_value:
+                            # Consider replication key value of 1st record as bookmark value.
+                            # Because all records are in descending order of replication key value
+                            bookmark_value = updated_at
+                        record_counter = record_counter + 1
 
-                    if updated_at:
-                        if bookmark_time and singer.utils.strptime_to_utc(updated_at) < bookmark_time:
-                            # Skip all records from now onwards because the bookmark value of the current record is less than
-                            # last saved bookmark value and all records from now onwards will have bookmark value less than last
-                            # saved bookmark value.
-                            synced_all_records = True
-                            break
+                        if updated_at:
+                            if bookmark_time and singer.utils.strptime_to_utc(updated_at) < bookmark_time:
+                                # Skip all records from now onwards because the bookmark value of the current record is less than
+                                # last saved bookmark value and all records from now onwards will have bookmark value less than last
+                                # saved bookmark value.
+                                synced_all_records = True
+                                break
 
-                        if self.tap_stream_id in selected_stream_ids and updated_at >= parent_bookmark_value:
+                            if self.tap_stream_id in selected_stream_ids and updated_at >= parent_bookmark_value:
 
-                            # Transform and write record
-                            with singer.Transformer() as transformer:
-                                rec = transformer.transform(record, stream_catalog['schema'], metadata=metadata.to_map(stream_catalog['metadata']))
-                                singer.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                                # Transform and write record
+                                rec = stream_context.transform(record)
+                                output.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
                                 counter.increment()
 
-                        for child in self.children:
-                            if child in stream_to_sync:
-                                parent_id = tuple(record.get(key) for key in STREAMS[child]().id_keys)
-
-                                # Sync child stream, if it is selected or its nested child is selected.
-                                self.get_child_records(client,
-                                                    catalog,
-                                                    child,
-                                                    parent_id,
-                                                    repo_path,
-                                                    state,
-                                                    start_date,
-                                                    record.get(self.replication_keys),
-                                                    stream_to_sync,
-                                                    selected_stream_ids,
-                                                    parent_record = record)
-                    else:
-                        LOGGER.warning("Skipping this record for %s stream with %s = %s as it is missing replication key %s.",
-                                    self.tap_stream_id, self.key_properties, record[self.key_properties], self.replication_keys)
+                            if synced_parents.get(self.get_parent_key(record)) == updated_at:
+                                # The children were synced before the sync was interrupted, and the record was not updated since.
+                                continue
+
+                            # Sync the child streams, if they are selected or their nested children are selected.
+                            self.sync_child_streams(client, context, record, repo_path, state, start_date, stream_to_sync, selected_stream_ids)
+
+                            self.write_synced_parent(state, repo_path, parent_bookmark_value, record, checkpoint_children, write_state)
+                        else:
+                            LOGGER.warning("Skipping this record for %s stream with %s = %s as it is missing replication key %s.",
+                                        self.tap_stream_id, self.key_properties, record[self.key_properties], self.replication_keys)
 
                 if synced_all_records:
                     break
 
+                # The records are in descending order, so the older records of the next pages are still to be synced
+                # and the bookmark stays the one the stream was synced from until the last page.
+                self.write_page_checkpoint(state, repo_path, selected_stream_ids, parent_bookmark_value,
+                                           {"url": full_url, "bookmark": bookmark_value}, checkpoint_pages, page, response, write_state)
+
             # Write bookmark for incremental stream.
             self.write_bookmarks(self.tap_stream_id, selected_stream_ids, bookmark_value, repo_path, state)
+            self.drop_synced_parents(state, repo_path)
 
         return state
 
@@ -456,6 +734,7 @@ class Reviews(IncrementalStream):
     use_repository = True
     id_keys = ['number']
     parent = 'pull_requests'
+    parent_fields = ['id']
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
@@ -463,24 +742,95 @@ class Reviews(IncrementalStream):
         """
         record['pr_id'] = parent_record['id']
 
+class PullRequestIndex: # pylint: disable=too-few-public-methods
+    """
+    Resolve the number of a pull request of the repository to its id. The pull requests are listed lazily,
+    most recently updated first, so the pull requests of recently updated review comments are found in the first pages.
+    """
+    def __init__(self, client, repo_path):
+        self.client = client
+        self.repo_path = repo_path
+        self.ids = {}
+        self.pages = None
+
+    def get_id(self, number):
+        """
+        Return the id of the pull request with the given number.
+        """
+        if self.pages is None:
+            self.pages = self.client.authed_get_all_pages(
+                'pull_requests',
+                '{}/repos/{}/pulls?state=all&sort=updated&direction=desc&per_page=100'.format(self.client.base_url, self.repo_path),
+                stream = 'pull_requests'
+            )
+
+        while number not in self.ids:
+            response = next(self.pages, None)
+            if response is None:
+                break
+            for record in response.json():
+                self.ids[record['number']] = record['id']
+
+        if number not in self.ids:
+            # Fall back to the pull request itself if it is not listed, e.g. it was deleted.
+            response = self.client.authed_get('pull_requests', '{}/repos/{}/pulls/{}'.format(self.client.base_url, self.repo_path, number),
+                                              stream = 'pull_requests')
+            self.ids[number] = response.json().get('id')
+
+        return self.ids[number]
+
 class ReviewComments(IncrementalOrderedStream):
     '''
     https://docs.github.com/en/rest/pulls/comments#get-a-review-comment-for-a-pull-request
+    https://docs.github.com/en/rest/pulls/comments#list-review-comments-in-a-repository
     '''
     tap_stream_id = "review_comments"
     replication_method = "INCREMENTAL"
     replication_keys = "updated_at"
     key_properties = ["id"]
     path = "pulls/{}/comments?sort=updated_at&direction=desc"
+    # Listing of the review comments of all pull requests, used when the stream is synced at the repository level.
+    repo_level_path = "pulls/comments?sort=updated&direction=desc&since={}"
     use_repository = True
     id_keys = ['number']
     parent = 'pull_requests'
+    internal_fields = ['pull_request_url']
+    parent_fields = ['id']
+    pull_request_index = None
+
+    def build_url(self, base_url, repo_path, bookmark):
+        """
+        Build the url of the review comments of the repository updated since the bookmark.
+        """
+        full_url = '{}/repos/{}/{}'.format(base_url, repo_path, self.repo_level_path.format(bookmark))
+        LOGGER.info("Final url is: %s", full_url)
+        return full_url
+
+    def sync_endpoint(self,
+                      client,
+                      state,
+                      catalog,
+                      repo_path,
+                      start_date,
+                      selected_stream_ids,
+                      stream_to_sync,
+                      write_state=None
+                      ):
+        """
+        Sync the review comments of all pull requests from the repository level endpoint.
+        """
+        self.pull_request_index = PullRequestIndex(client, repo_path)
+        return super().sync_endpoint(client, state, catalog, repo_path, start_date, selected_stream_ids, stream_to_sync, write_state)
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
         Add fields in the record explicitly at the 1st level of JSON.
         """
-        record['pr_id'] = parent_record['id']
+        if parent_record:
+            record['pr_id'] = parent_record['id']
+        else:
+            # Synced at the repository level, resolve the pull request from its url.
+            record['pr_id'] = self.pull_request_index.get_id(int(record['pull_request_url'].rstrip('/').split('/')[-1]))
 
 class PRCommits(IncrementalStream):
     '''
@@ -494,6 +844,8 @@ class PRCommits(IncrementalStream):
     use_repository = True
     id_keys = ['number']
     parent = 'pull_requests'
+    internal_fields = ['commit', 'sha']
+    parent_fields = ['number', 'id']
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
@@ -516,6 +868,202 @@ class PullRequests(IncrementalOrderedStream):
     path = "pulls?state=all&sort=updated&direction=desc"
     children = ['reviews', 'review_comments', 'pr_commits']
     pk_child_fields = ["number"]
+    # The head is compared with the cache of the pr_commits.
+    internal_fields = ['head']
+
+    def sync_endpoint(self,
+                      client,
+                      state,
+                      catalog,
+                      repo_path,
+                      start_date,
+                      selected_stream_ids,
+                      stream_to_sync,
+                      write_state=None
+                      ):
+        """
+        Sync the pull requests along with their children over the GraphQL API if enabled, otherwise over the REST API.
+        """
+        if str(client.config.get('graphql_pull_requests', '')).lower() != 'true':
+            state = super().sync_endpoint(client, state, catalog, repo_path, start_date, selected_stream_ids, stream_to_sync, write_state)
+            if client.pr_head_cache:
+                # The state of the commits is written next, index their heads.
+                client.pr_head_cache.save(repo_path)
+            return state
+
+        bookmark_value = get_bookmark(state, repo_path, self.tap_stream_id, "since", start_date)
+        current_time = datetime.today().strftime(DATE_FORMAT)
+
+        min_bookmark_value = self.get_min_bookmark(self.tap_stream_id, selected_stream_ids, current_time, repo_path, start_date, state)
+        bookmark_time = singer.utils.strptime_to_utc(min_bookmark_value)
+
+        children = [child for child in self.children if child in stream_to_sync]
+        page_size = int(client.config.get('graphql_page_size') or graphql.DEFAULT_PULL_REQUESTS_PAGE_SIZE)
+        synced_all_records = False
+        context = get_sync_context(catalog)
+        stream_context = context.get_stream(self.tap_stream_id)
+
+        parent_bookmark_value = bookmark_value
+        record_counter = 0
+        with metrics.record_counter(self.tap_stream_id) as counter:
+            for nodes in graphql.get_pull_requests(client, repo_path, children, page_size):
+                extraction_time = singer.utils.now()
+
+                for node in nodes:
+                    record = stream_context.project(graphql.to_pull_request(node, client.base_url, repo_path))
+                    record['_sdc_repository'] = repo_path
+
+                    updated_at = record.get(self.replication_keys)
+
+                    if record_counter == 0 and updated_at > bookmark_value:
+                        # Consider replication key value of 1st record as bookmark value.
+                        # Because all records are in descending order of replication key value
+                        bookmark_value = updated_at
+                    record_counter = record_counter + 1
+
+                    if singer.utils.strptime_to_utc(updated_at) < bookmark_time:
+                        # Skip all records from now onwards because they were updated before the last saved bookmark value.
+                        synced_all_records = True
+                        break
+
+                    if self.tap_stream_id in selected_stream_ids and updated_at >= parent_bookmark_value:
+                        # Transform and write record
+                        rec = stream_context.transform(record)
+                        output.write_record(self.tap_stream_id, rec, time_extracted=extraction_time)
+                        counter.increment()
+
+                    for child in children:
+                        # The first page of the children was fetched with the pull request, the overflowing pages are fetched now.
+                        self.write_graphql_child_records(client, context, child, node, record, repo_path, state, start_date, selected_stream_ids)
+
+                if synced_all_records:
+                    break
+
+            # Write bookmark for incremental stream.
+            self.write_bookmarks(self.tap_stream_id, selected_stream_ids, bookmark_value, repo_path, state)
+
+        return state
+
+    def get_child_records(self,
+                          client,
+                          catalog,
+                          child_stream,
+                          grand_parent_id,
+                          repo_path,
+                          state,
+                          start_date,
+                          bookmark_dttm,
+                          stream_to_sync,
+                          selected_stream_ids,
+                          parent_id = None,
+                          parent_record = None):
+        """
+        Retrieve and write the child records of an updated pull request. With the pr_commits cache, the commits are
+        retrieved only if the head of the pull request moved, and only the new commits if it moved forward.
+        """
+        if child_stream != 'pr_commits' or not client.pr_head_cache:
+            return super().get_child_records(client, catalog, child_stream, grand_parent_id, repo_path, state, start_date,
+                                             bookmark_dttm, stream_to_sync, selected_stream_ids, parent_id, parent_record)
+
+        head_sha = (parent_record.get('head') or {}).get('sha')
+        cached_head = self.get_cached_head(client, repo_path, state, parent_record['number'])
+        if cached_head and cached_head[0] == head_sha:
+            LOGGER.info("Head of pull request %s is unchanged, skipping its commits.", parent_record['number'])
+            client.pr_head_cache.skipped += 1
+            return cached_head[1]
+
+        commit_count = None
+        if cached_head:
+            commit_count = self.get_new_pr_commits(client, catalog, repo_path, state, start_date, selected_stream_ids,
+                                                   parent_record, cached_head)
+        if commit_count is None:
+            commit_count = super().get_child_records(client, catalog, child_stream, grand_parent_id, repo_path, state, start_date,
+                                                     bookmark_dttm, stream_to_sync, selected_stream_ids, parent_id, parent_record)
+
+        client.pr_head_cache.set_head(repo_path, parent_record['number'], head_sha, commit_count,
+                                      get_bookmark(state, repo_path, 'pr_commits', 'since', start_date))
+        return commit_count
+
+    # pylint: disable=no-self-use
+    def get_cached_head(self, client, repo_path, state, number):
+        """
+        Return the cached (head sha, commit count) of the pull request. The cache is ignored without a bookmark of the
+        pr_commits, e.g. after a reset of the state, as the commits of the cached heads are not covered by the state.
+        """
+        since = get_bookmark(state, repo_path, 'pr_commits', 'since', None)
+        if not since:
+            return None
+        return client.pr_head_cache.get_head(repo_path, number, since)
+
+    # pylint: disable=no-self-use
+    def get_new_pr_commits(self, client, catalog, repo_path, state, start_date, selected_stream_ids, parent_record, cached_head):
+        """
+        Retrieve and write the commits pushed to the pull request since its cached head with the compare API.
+        Return the number of commits of the pull request, or None if the head did not move forward, e.g. after
+        a force push, and all the commits have to be retrieved.
+
+        Docs: https://docs.github.com/en/rest/commits/commits#compare-two-commits
+        """
+        cached_sha, cached_count = cached_head
+        compare_url = '{}/repos/{}/compare/{}...{}'.format(client.base_url, repo_path, cached_sha, parent_record['head']['sha'])
+        try:
+            comparison = client.authed_get('pr_commits', compare_url, stream = 'pr_commits', should_skip_404 = False).json()
+        except NotFoundException:
+            # The cached head is not reachable anymore.
+            return None
+
+        commits = comparison.get('commits') or []
+        if comparison.get('status') != 'ahead' or comparison.get('total_commits') != len(commits):
+            # The head diverged from the cached head, or the new commits don't fit in a single comparison.
+            return None
+
+        context = get_sync_context(catalog)
+        child_object = context.get_stream_object('pr_commits')
+        child_bookmark_value = get_bookmark(state, repo_path, child_object.tap_stream_id, "since", start_date)
+        stream_context = context.get_stream(child_object.tap_stream_id)
+        extraction_time = singer.utils.now()
+
+        with metrics.record_counter(child_object.tap_stream_id) as counter:
+            for record in commits:
+                record = stream_context.project(record)
+                record['_sdc_repository'] = repo_path
+                child_object.add_fields_at_1st_level(record = record, parent_record = parent_record)
+
+                rec = stream_context.transform(record)
+                if child_object.tap_stream_id in selected_stream_ids and record.get(child_object.replication_keys, start_date) >= child_bookmark_value:
+                    output.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
+                    counter.increment()
+
+        return cached_count + len(commits)
+
+    def is_child_cached(self, client, child_stream, repo_path, state, record):
+        """
+        Return True for the commits of an indexed pull request, which are either skipped or retrieved with the compare API.
+        """
+        return child_stream == 'pr_commits' and bool(client.pr_head_cache) and \
+            self.get_cached_head(client, repo_path, state, record.get('number')) is not None
+
+    # pylint: disable=no-self-use
+    def write_graphql_child_records(self, client, catalog, child_stream, node, parent_record, repo_path, state, start_date, selected_stream_ids):
+        """
+        Write the child records of a pull request node fetched over the GraphQL API.
+        """
+        context = get_sync_context(catalog)
+        child_object = context.get_stream_object(child_stream)
+        child_bookmark_value = get_bookmark(state, repo_path, child_object.tap_stream_id, "since", start_date)
+        stream_context = context.get_stream(child_object.tap_stream_id)
+        extraction_time = singer.utils.now()
+
+        with metrics.record_counter(child_object.tap_stream_id) as counter:
+            for record in graphql.get_child_records(client, child_stream, node, repo_path):
+                record = stream_context.project(record)
+                record['_sdc_repository'] = repo_path
+                child_object.add_fields_at_1st_level(record = record, parent_record = parent_record)
+
+                if child_object.tap_stream_id in selected_stream_ids and (record.get(child_object.replication_keys) or start_date) >= child_bookmark_value:
+                    rec = stream_context.transform(record)
+                    output.write_record(child_object.tap_stream_id, rec, time_extracted=extraction_time)
+                    counter.increment()
 
 class ProjectCards(IncrementalStream):
     '''
@@ -568,6 +1116,7 @@ class TeamMemberships(FullTableStream):
     use_organization = True
     parent = 'team_members'
     id_keys = ["login"]
+    parent_fields = ['login']
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
@@ -589,6 +1138,7 @@ class TeamMembers(FullTableStream):
     has_children = True
     parent = 'teams'
     pk_child_fields = ['login']
+    parent_fields = ['slug']
 
 
     def add_fields_at_1st_level(self, record, parent_record = None):
@@ -619,6 +1169,8 @@ class Commits(IncrementalStream):
     key_properties = ["sha"]
     path = "commits"
     filter_param = True
+    internal_fields = ['commit']
+    parallel_pages = True
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
@@ -733,6 +1285,7 @@ class StarGazers(FullTableStream):
     key_properties = ["user_id"]
     path = "stargazers"
     headers = {'Accept': 'application/vnd.github.v3.star+json'}
+    internal_fields = ['user']
 
     def add_fields_at_1st_level(self, record, parent_record = None):
         """
@@ -1,11 +1,17 @@
 import collections
+from concurrent import futures
 import singer
 from singer import bookmarks
-from tap_github.streams import STREAMS
+from tap_github import output, profiling
+from tap_github.state import ConcurrentStateManager
+from tap_github.streams import STREAMS, SyncContext
 
 LOGGER = singer.get_logger()
 STREAM_TO_SYNC_FOR_ORGS = ['teams', 'team_members', 'team_memberships']
 
+# The streams whose records only change with a push to the repository.
+STREAMS_CHANGED_BY_PUSH = ['commits']
+
 def get_selected_streams(catalog):
     '''
     Gets selected streams.  Checks schema's 'selected'
@@ -22,7 +28,7 @@ def get_selected_streams(catalog):
 
     return selected_streams
 
-def update_currently_syncing(state, stream_name):
+def update_currently_syncing(state, stream_name, write_state=None):
     """
     Updates currently syncing stream in the state.
     """
@@ -30,7 +36,7 @@ def update_currently_syncing(state, stream_name):
         del state['currently_syncing']
     else:
         singer.set_currently_syncing(state, stream_name)
-    singer.write_state(state)
+    (write_state or output.write_state)(state)
 
 def update_currently_syncing_repo(state, repo_path):
     """
@@ -41,7 +47,7 @@ def update_currently_syncing_repo(state, repo_path):
         del state['currently_syncing_repo']
     else:
         state['currently_syncing_repo'] = repo_path
-    singer.write_state(state)
+    output.write_state(state)
 
 def get_ordered_stream_list(currently_syncing, streams_to_sync):
     """
@@ -63,6 +69,55 @@ def get_ordered_repos(state, repositories):
         repositories = repositories[index:] + repositories[:index]
     return repositories
 
+def get_ordered_repos_for_concurrent_sync(in_flight_repos, repositories):
+    """
+    Get an ordered list of repos to sync concurrently, starting with the repos that were in flight
+    when the previous sync was interrupted, in the order of the configured repositories.
+    """
+    in_flight_repos = set(in_flight_repos)
+    return [repo for repo in repositories if repo in in_flight_repos] + \
+        [repo for repo in repositories if repo not in in_flight_repos]
+
+def get_max_concurrent_repos(config):
+    """
+    Get the number of repositories to sync in parallel from the config, if not present sync one repository at a time.
+    """
+    max_concurrent_repos = config.get('max_concurrent_repos')
+
+    # Only return the value if it is passed in the config and the value is not 0, "0" or ""
+    if max_concurrent_repos and int(max_concurrent_repos) > 1:
+        return int(max_concurrent_repos)
+
+    return 1
+
+def get_repo_activity(client, repo):
+    """
+    Get the `pushed_at`, `updated_at` and `archived` activity of the repository listed with its organization,
+    if the change detection is enabled in the config.
+    """
+    if str(client.config.get('repo_change_detection', '')).lower() != 'true':
+        return None
+    return client.repo_activity.get(repo)
+
+def get_idle_streams(saved_activity, activity, streams_to_sync, repo_bookmarks):
+    """
+    Get the streams without any change since the last sync of the repository, by comparing the current activity
+    of the repository with the activity saved in the state at the end of its last sync.
+    Only the streams with a bookmark for the repository were synced before, the other ones are never idle.
+    """
+    if not activity or not saved_activity:
+        return set()
+
+    synced_streams = set(streams_to_sync).intersection(repo_bookmarks or {})
+    if activity.get('archived') and saved_activity.get('archived'):
+        # An archived repository is read-only, it is frozen once synced after it was archived.
+        return synced_streams
+
+    if activity.get('pushed_at') == saved_activity.get('pushed_at'):
+        return synced_streams.intersection(STREAMS_CHANGED_BY_PUSH)
+
+    return set()
+
 def translate_state(state, catalog, repositories):
     '''
     This tap used to only support a single repository, in which case the
@@ -127,16 +182,35 @@ def translate_state(state, catalog, repositories):
             if bookmarks.get_bookmark(state, stream_name, 'since'):
                 new_state['bookmarks'][repo][stream_name]['since'] = bookmarks.get_bookmark(state, stream_name, 'since')
 
+    if state.get('repo_activity'):
+        # Keep the activity of the repositories, which is saved even if only full table streams are synced.
+        new_state['repo_activity'] = state['repo_activity']
+
+    if state.get('currently_syncing_repos'):
+        # Keep the repositories in flight of an interrupted concurrent sync, so they resume from their stream.
+        new_state['currently_syncing_repos'] = state['currently_syncing_repos']
+
     return new_state
 
-def get_stream_to_sync(catalog):
+def get_repo_level_streams(config):
+    """
+    Get the child streams which are synced as top level streams from their repository level endpoint,
+    instead of once per parent record.
+    """
+    if str(config.get('review_comments_repo_level', '')).lower() == 'true':
+        return ['review_comments']
+    return []
+
+def get_stream_to_sync(catalog, repo_level_streams=()):
     """
     Get the streams for which the sync function should be called(the parent in case of selected child streams).
     """
     streams_to_sync = []
     selected_streams = get_selected_streams(catalog)
+    # The repository level streams don't need their parent to be synced.
+    selected_children = [stream for stream in selected_streams if stream not in repo_level_streams]
     for stream_name, stream_obj in STREAMS.items():
-        if stream_name in selected_streams or is_any_child_selected(stream_obj, selected_streams):
+        if stream_name in selected_streams or is_any_child_selected(stream_obj, selected_children):
             # Append the selected stream or deselected parent stream into the list, if its child or nested child is selected.
             streams_to_sync.append(stream_name)
     return streams_to_sync
@@ -163,7 +237,7 @@ def write_schemas(stream_id, catalog, selected_streams):
     if stream_id in selected_streams:
         # Get catalog object for particular stream.
         stream = [cat for cat in catalog['streams'] if cat['tap_stream_id'] == stream_id ][0]
-        singer.write_schema(stream_id, stream['schema'], stream['key_properties'])
+        output.write_schema(stream_id, stream['schema'], stream['key_properties'])
 
     for child in stream_obj.children:
         write_schemas(child, catalog, selected_streams)
@@ -178,59 +252,138 @@ def sync(client, config, state, catalog):
     # Get selected streams, make sure stream dependencies are met
     selected_stream_ids = get_selected_streams(catalog)
 
-    streams_to_sync = get_stream_to_sync(catalog)
+    streams_to_sync = get_stream_to_sync(catalog, get_repo_level_streams(config))
     LOGGER.info('Sync stream %s', streams_to_sync)
 
     repositories, organizations = client.extract_repos_from_config()
 
     state = translate_state(state, catalog, repositories)
-    singer.write_state(state)
-
-    # Sync `teams`, `team_members`and `team_memberships` streams just single time for any organization.
-    streams_to_sync_for_orgs = set(streams_to_sync).intersection(STREAM_TO_SYNC_FOR_ORGS)
-    # Loop through all organizations
-    if selected_stream_ids:
-        for orgs in organizations:
-            LOGGER.info("Starting sync of organization: %s", orgs)
-            do_sync(catalog, streams_to_sync_for_orgs, selected_stream_ids, client, start_date, state, orgs)
-
-        # Sync other streams for all repos
-        streams_to_sync_for_repos = set(streams_to_sync) - streams_to_sync_for_orgs
-        # pylint: disable=too-many-nested-blocks
-        # Sync repositories only if any streams are selected
-        for repo in get_ordered_repos(state, repositories):
-            update_currently_syncing_repo(state, repo)
-            LOGGER.info("Starting sync of repository: %s", repo)
-            do_sync(catalog, streams_to_sync_for_repos, selected_stream_ids, client, start_date, state, repo)
-
-            if client.not_accessible_repos:
-                # Give warning messages for a repo that is not accessible by a stream or is invalid.
-                message = "Please check the repository name \'{}\' or you do not have sufficient permissions to access this repository for following streams {}.".format(repo, ", ".join(client.not_accessible_repos))
-                LOGGER.warning(message)
-                client.not_accessible_repos = set()
-        update_currently_syncing_repo(state, None)
-
-def do_sync(catalog, streams_to_sync, selected_stream_ids, client, start_date, state, repo):
+    output.write_state(state)
+
+    # Index the catalog once for all the repositories, the transformers of the streams are exited at the end of the sync.
+    with SyncContext(catalog['streams'], config) as context:
+        if str(config.get('compiled_transform', '')).lower() == 'true':
+            # Compile the transforms of the streams before the first request.
+            for stream_id in streams_to_sync:
+                context.get_stream(stream_id)
+
+        # Sync `teams`, `team_members`and `team_memberships` streams just single time for any organization.
+        streams_to_sync_for_orgs = set(streams_to_sync).intersection(STREAM_TO_SYNC_FOR_ORGS)
+        # Loop through all organizations
+        if selected_stream_ids:
+            for orgs in organizations:
+                LOGGER.info("Starting sync of organization: %s", orgs)
+                do_sync(catalog, streams_to_sync_for_orgs, selected_stream_ids, client, start_date, state, orgs, context=context)
+
+            # Sync other streams for all repos
+            streams_to_sync_for_repos = set(streams_to_sync) - streams_to_sync_for_orgs
+
+            max_concurrent_repos = get_max_concurrent_repos(config)
+            if max_concurrent_repos > 1:
+                sync_repos_concurrently(catalog, streams_to_sync_for_repos, selected_stream_ids, client, start_date,
+                                        state, repositories, max_concurrent_repos, context)
+                return
+
+            # pylint: disable=too-many-nested-blocks
+            # Sync repositories only if any streams are selected
+            for repo in get_ordered_repos(state, repositories):
+                update_currently_syncing_repo(state, repo)
+                activity = get_repo_activity(client, repo)
+                idle_streams = get_idle_streams(state.get('repo_activity', {}).get(repo), activity, streams_to_sync_for_repos,
+                                                state.get('bookmarks', {}).get(repo))
+                if idle_streams:
+                    LOGGER.info("Skipping streams %s of repository %s without any change since its last sync.", sorted(idle_streams), repo)
+                LOGGER.info("Starting sync of repository: %s", repo)
+                do_sync(catalog, streams_to_sync_for_repos - idle_streams, selected_stream_ids, client, start_date, state, repo, context=context)
+
+                if client.not_accessible_repos:
+                    # Give warning messages for a repo that is not accessible by a stream or is invalid.
+                    message = "Please check the repository name \'{}\' or you do not have sufficient permissions to access this repository for following streams {}.".format(repo, ", ".join(client.not_accessible_repos))
+                    LOGGER.warning(message)
+                    client.not_accessible_repos = set()
+
+                if activity:
+                    # Save the activity once the repository is synced, it is written with the next state.
+                    state.setdefault('repo_activity', {})[repo] = activity
+            update_currently_syncing_repo(state, None)
+
+
+def sync_repo(catalog, streams_to_sync, selected_stream_ids, client, start_date, state_manager, repo, context=None):
+    """
+    Sync a single repository in a worker thread against its private state.
+    """
+    repo_state = state_manager.start_repo(repo)
+    activity = get_repo_activity(client, repo)
+    idle_streams = get_idle_streams(state_manager.get_repo_activity(repo), activity, streams_to_sync,
+                                    repo_state['bookmarks'][repo])
+    if idle_streams:
+        LOGGER.info("Skipping streams %s of repository %s without any change since its last sync.", sorted(idle_streams), repo)
+    LOGGER.info("Starting sync of repository: %s", repo)
+    client.not_accessible_repos = set()
+
+    do_sync(catalog, set(streams_to_sync) - idle_streams, selected_stream_ids, client, start_date, repo_state, repo,
+            write_state=lambda repo_state: state_manager.write_repo_state(repo, repo_state), context=context)
+
+    if client.not_accessible_repos:
+        # Give warning messages for a repo that is not accessible by a stream or is invalid.
+        message = "Please check the repository name \'{}\' or you do not have sufficient permissions to access this repository for following streams {}.".format(repo, ", ".join(client.not_accessible_repos))
+        LOGGER.warning(message)
+        client.not_accessible_repos = set()
+
+    state_manager.finish_repo(repo, repo_state, activity)
+
+def sync_repos_concurrently(catalog, streams_to_sync, selected_stream_ids, client, start_date, state, repositories, max_workers,
+                            context=None):
+    """
+    Sync the repositories with a bounded pool of worker threads.
+    """
+    state_manager = ConcurrentStateManager(state)
+    repositories = get_ordered_repos_for_concurrent_sync(state_manager.get_in_flight_repos(), repositories)
+    LOGGER.info("Syncing %s repositories with %s concurrent workers.", len(repositories), max_workers)
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tap-github-repo') as executor:
+        pending = [executor.submit(sync_repo, catalog, streams_to_sync, selected_stream_ids, client, start_date, state_manager, repo, context)
+                   for repo in repositories]
+        done, not_done = futures.wait(pending, return_when=futures.FIRST_EXCEPTION)
+        for future in not_done:
+            # Don't start the remaining repositories once a worker failed, the in flight ones are kept in the state.
+            future.cancel()
+        for future in done:
+            # Raise the exception of the failed worker, if any.
+            future.result()
+
+    state_manager.finish()
+
+def do_sync(catalog, streams_to_sync, selected_stream_ids, client, start_date, state, repo, write_state=None, context=None):
     """
     Sync all other streams except teams, team_members and team_memberships for each repo.
     """
+    write_state = write_state or output.write_state
+    context = context or SyncContext(catalog['streams'], client.config)
+    repo_level_streams = get_repo_level_streams(client.config)
     currently_syncing = singer.get_currently_syncing(state)
     for stream_id in get_ordered_stream_list(currently_syncing, streams_to_sync):
         stream_obj = STREAMS[stream_id]()
 
-        # If it is a "sub_stream", it will be synced as part of the parent stream
-        if stream_id in streams_to_sync and not stream_obj.parent:
-            write_schemas(stream_id, catalog, selected_stream_ids)
-            update_currently_syncing(state, stream_id)
-
-            state = stream_obj.sync_endpoint(client = client,
-                                              state = state,
-                                              catalog = catalog['streams'],
-                                              repo_path = repo,
-                                              start_date = start_date,
-                                              selected_stream_ids = selected_stream_ids,
-                                              stream_to_sync = streams_to_sync
-                                            )
-
-            singer.write_state(state)
-        update_currently_syncing(state, None)
+        # If it is a "sub_stream", it will be synced as part of the parent stream, unless it is synced at the repository level.
+        if stream_id in streams_to_sync and (not stream_obj.parent or stream_id in repo_level_streams):
+            # Exclude the other repository level streams from the children synced with their parent.
+            stream_selected_ids = [stream for stream in selected_stream_ids if stream == stream_id or stream not in repo_level_streams]
+            stream_streams_to_sync = [stream for stream in streams_to_sync if stream == stream_id or stream not in repo_level_streams]
+
+            with profiling.label(repo, stream_id):
+                write_schemas(stream_id, catalog, stream_selected_ids)
+                update_currently_syncing(state, stream_id, write_state)
+
+                state = stream_obj.sync_endpoint(client = client,
+                                                  state = state,
+                                                  catalog = context,
+                                                  repo_path = repo,
+                                                  start_date = start_date,
+                                                  selected_stream_ids = stream_selected_ids,
+                                                  stream_to_sync = stream_streams_to_sync,
+                                                  write_state = write_state
+                                                )
+
+                write_state(state)
+        update_currently_syncing(state, None, write_state)
@@ -0,0 +1,279 @@
+import datetime
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import re
+import tempfile
+import threading
+import singer
+from singer.transform import string_to_datetime
+
+LOGGER = singer.get_logger()
+
+# Bump when the generated code changes, to invalidate the transforms cached on disk.
+COMPILER_VERSION = 1
+
+# Returned by a compiled transform when the data does not match the schema.
+FAIL = object()
+
+# The format of the dates of the GitHub API, which are formatted by singer with microseconds.
+GITHUB_DATETIME = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})Z')
+
+def to_datetime(value):
+    """
+    Return the date-time formatted as `singer.transform.string_to_datetime` does, without parsing the
+    dates of the GitHub API with dateutil.
+    """
+    if isinstance(value, str):
+        match = GITHUB_DATETIME.fullmatch(value)
+        if match:
+            try:
+                datetime.datetime(*map(int, match.groups()))
+                return value[:-1] + '.000000Z'
+            except ValueError:
+                # Not a valid date, which singer does not parse either.
+                pass
+    return string_to_datetime(value)
+
+def get_number_lines(function):
+    """
+    Return the lines returning the data converted to a number with the function, without the thousands separators.
+    """
+    return ['try:',
+            '    return {}(data.replace(",", "") if isinstance(data, str) else data)'.format(function),
+            'except Exception:',
+            '    pass']
+
+# The lines returning the data converted to each scalar type, which fall through if it does not match.
+SCALAR_TYPE_LINES = {
+    'string': ['if data is not None:',
+               '    try:',
+               '        return str(data)',
+               '    except Exception:',
+               '        pass'],
+    'integer': get_number_lines('int'),
+    'number': get_number_lines('float'),
+    'boolean': ['if isinstance(data, str) and data.lower() == "false":',
+                '    return False',
+                'try:',
+                '    return bool(data)',
+                'except Exception:',
+                '    pass'],
+}
+
+def fallback(data, schema):
+    """
+    Transform the data with the transformer of singer, for the parts of a schema which are not compiled.
+    """
+    success, value = singer.Transformer().transform_recur(data, schema, [])
+    return value if success else FAIL
+
+class TransformCompiler:
+    """
+    Generate the source of a module with a transform function for each distinct sub schema, which applies
+    the schema as `singer.Transformer.transform_recur` does, without walking the schema for each record.
+    The identical sub schemas, e.g. the urls or the users, share the same function.
+    """
+    def __init__(self):
+        self.functions = {}
+        self.lines = []
+        self.dispatch_tables = []
+
+    def compile(self, schema):
+        """
+        Return the source of the module, where `transform` is the function of the schema.
+        """
+        root = self.get_function(schema)
+        lines = list(self.lines)
+        for name, properties in self.dispatch_tables:
+            lines.append('{} = {{{}}}'.format(name, ', '.join('{!r}: {}'.format(key, function)
+                                                              for key, function in properties.items())))
+        lines.append('transform = {}'.format(root))
+        return '\n'.join(lines) + '\n'
+
+    def get_function(self, schema):
+        """
+        Return the name of the function of the schema, which is generated on first use.
+        """
+        key = json.dumps(schema, sort_keys=True)
+        if key not in self.functions:
+            name = self.functions[key] = 't_{}'.format(len(self.functions))
+            body = self.get_body(schema)
+            self.lines.append('def {}(data):'.format(name))
+            self.lines.extend('    ' + line for line in body)
+        return self.functions[key]
+
+    def get_body(self, schema):
+        """
+        Return the lines of the function of the schema.
+        """
+        if 'anyOf' in schema:
+            body = []
+            for subschema in schema['anyOf']:
+                body += ['value = {}(data)'.format(self.get_function(subschema)),
+                         'if value is not FAIL:',
+                         '    return value']
+            return body + ['return FAIL']
+
+        if 'type' not in schema:
+            # No typing information, the data is not transformed.
+            return ['return data']
+
+        if schema.get('format') == 'singer.decimal' or 'patternProperties' in schema or \
+                ('array' in schema['type'] and 'items' not in schema):
+            return ['return fallback(data, {!r})'.format(schema)]
+
+        types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        # The null type is tried last.
+        types = [typ for typ in types if typ != 'null'] + (['null'] if 'null' in types else [])
+
+        body = []
+        if schema.get('format') == 'date-time' and types != ['null']:
+            # Any type other than null is parsed as a date-time.
+            body += ['if data is not None and data != "":',
+                     '    value = to_datetime(data)',
+                     '    if value is not None:',
+                     '        return value']
+        else:
+            for typ in types:
+                body += self.get_type_lines(typ, schema)
+        if 'null' in types:
+            body += ['if data is None or data == "":',
+                     '    return None']
+        return body + ['return FAIL']
+
+    def get_type_lines(self, typ, schema):
+        """
+        Return the lines returning the data transformed to the type, which fall through if it does not match.
+        """
+        get_lines = {'object': self.get_object_lines, 'array': self.get_array_lines}.get(typ)
+        if get_lines:
+            return get_lines(schema)
+        # An unknown type never matches.
+        return SCALAR_TYPE_LINES.get(typ, [])
+
+    def get_object_lines(self, schema):
+        """
+        Return the lines returning the data transformed to an object, with the function of each of its properties.
+        """
+        properties = schema.get('properties', {})
+        if not properties:
+            return ['if isinstance(data, dict):',
+                    '    return data']
+        functions = {key: self.get_function(subschema) for key, subschema in properties.items()}
+        name = 'd_{}'.format(len(self.dispatch_tables))
+        self.dispatch_tables.append((name, functions))
+        return ['if isinstance(data, dict):',
+                '    result = {}',
+                '    for key, value in data.items():',
+                '        function = {}.get(key)'.format(name),
+                '        if function is not None:',
+                '            value = function(value)',
+                '            if value is FAIL:',
+                '                break',
+                '            result[key] = value',
+                '    else:',
+                '        return result']
+
+    def get_array_lines(self, schema):
+        """
+        Return the lines returning the data transformed to an array, with the function of its items.
+        """
+        return ['if isinstance(data, list):',
+                '    result = [{}(row) for row in data]'.format(self.get_function(schema['items'])),
+                '    if FAIL not in result:',
+                '        return result']
+
+def get_schema_key(schema):
+    """
+    Return the key of the compiled transform of the schema, which also depends on the compiler and the python version.
+    """
+    content = json.dumps([schema, COMPILER_VERSION, importlib.util.MAGIC_NUMBER.hex()], sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def load_code(path):
+    """
+    Return the code cached on the disk, or None if it is not cached or can't be read.
+    """
+    try:
+        with open(path, 'rb') as file:
+            return marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def save_code(path, code):
+    """
+    Write the code to the disk cache, through a temporary file so a concurrent run never reads a partial file.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(file_descriptor, 'wb') as file:
+            marshal.dump(code, file)
+        os.replace(temporary_path, path)
+    except OSError as err:
+        LOGGER.warning("Unable to cache the compiled transform in %s: %s", path, err)
+
+COMPILED_TRANSFORMS = {}
+COMPILE_LOCK = threading.Lock()
+
+def get_compiled_transform(schema, cache_dir=None):
+    """
+    Return the compiled transform of the schema, which returns the transformed data or `FAIL` if the data
+    does not match the schema. The code is cached in `cache_dir`, keyed by the hash of the schema.
+    """
+    key = get_schema_key(schema)
+    with COMPILE_LOCK:
+        if key not in COMPILED_TRANSFORMS:
+            path = os.path.join(cache_dir, key + '.bin') if cache_dir else None
+            code = load_code(path) if path else None
+            if code is None:
+                code = compile(TransformCompiler().compile(schema), '<transform {}>'.format(key[:12]), 'exec')
+                if path:
+                    save_code(path, code)
+            namespace = {'FAIL': FAIL, 'to_datetime': to_datetime, 'fallback': fallback}
+            exec(code, namespace) # pylint: disable=exec-used
+            COMPILED_TRANSFORMS[key] = namespace['transform']
+        return COMPILED_TRANSFORMS[key]
+
+def is_deselected(field_metadata):
+    """
+    Return True if the field is removed from the records by `singer.Transformer.filter_data_by_metadata`.
+    """
+    return field_metadata.get('inclusion') != 'automatic' and \
+        (field_metadata.get('selected') is False or field_metadata.get('inclusion') == 'unsupported')
+
+def get_deselected_fields(mdata, nested=True):
+    """
+    Return the fields removed by `singer.Transformer.filter_data_by_metadata` for the metadata map, or None if
+    fields of nested objects are deselected and the records have to be filtered by the transformer of singer.
+    With `nested` set to False, only the fields at the first level are returned.
+    """
+    deselected_fields = set()
+    for breadcrumb, field_metadata in mdata.items():
+        if not breadcrumb or not is_deselected(field_metadata):
+            continue
+        if len(breadcrumb) != 2 or breadcrumb[0] != 'properties':
+            if nested:
+                return None
+            continue
+        deselected_fields.add(breadcrumb[1])
+    return deselected_fields
+
+def get_projected_fields(schema, mdata, internal_fields=()):
+    """
+    Return the fields kept by the projection of the records before they are transformed: the selected fields of the
+    schema and the fields read by the tap. Return None if no field is deselected or the schema does not list the
+    fields of the records, and the records are not projected.
+    """
+    types = schema.get('type', [])
+    types = types if isinstance(types, list) else [types]
+    if 'object' not in types or not schema.get('properties') or 'anyOf' in schema or 'patternProperties' in schema:
+        return None
+
+    deselected_fields = get_deselected_fields(mdata, nested=False)
+    if not deselected_fields:
+        return None
+    return (set(schema['properties']) - deselected_fields) | set(internal_fields)
@@ -0,0 +1,147 @@
+import unittest
+from unittest import mock
+from aiohttp import web
+from tap_github.client import GithubClient, BadCredentialsException
+from tap_github.async_client import AsyncGithubClient
+
+
+class MockGithubServer:
+    """Local aiohttp server returning paginated responses."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.runner = None
+        self.base_url = None
+        self.accept_headers = []
+
+    async def handle_items(self, request):
+        """Return 2 pages of records for `/items/{name}`."""
+        self.in_flight += 1
+        self.accept_headers.append(request.headers.get('Accept'))
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Give the other requests a chance to be in flight at the same time
+            await __import__('asyncio').sleep(0.01)
+            page = int(request.query.get('page', 1))
+            headers = {'X-RateLimit-Remaining': '100'}
+            if page == 1:
+                headers['Link'] = '<{}/items/{}?page=2>; rel="next"'.format(self.base_url, request.match_info['name'])
+            return web.json_response([{'name': request.match_info['name'], 'page': page}], headers=headers)
+        finally:
+            self.in_flight -= 1
+
+    async def handle_error(self, request):
+        """Return the status code given in the path."""
+        return web.json_response({'message': 'error'}, status=int(request.match_info['status']),
+                                 headers={'X-RateLimit-Remaining': '100'})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/items/{name}', self.handle_items)
+        app.router.add_get('/error/{status}', self.handle_error)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1] # pylint: disable=protected-access
+        self.base_url = 'http://127.0.0.1:{}'.format(port)
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@mock.patch("time.sleep")
+class TestAsyncGithubClient(unittest.TestCase):
+    """
+    Test the asyncio engine against a local server.
+    """
+
+    def setUp(self):
+        self.client = AsyncGithubClient({"access_token": "TOKEN", "max_in_flight_requests": 2})
+        self.server = MockGithubServer()
+        self.client.run(self.server.start())
+
+    def tearDown(self):
+        self.client.run(self.server.stop())
+        self.client.close()
+
+    def test_pages_in_order(self, mock_sleep):
+        """Verify all pages of every call are fetched and returned in the order of the calls."""
+        calls = [("items", "{}/items/{}".format(self.server.base_url, name), "items") for name in ["a", "b", "c", "d"]]
+
+        all_pages = self.client.run(self.client.get_all_pages_concurrently(calls))
+
+        self.assertEqual([[page.json() for page in pages] for pages in all_pages],
+                         [[[{"name": name, "page": 1}], [{"name": name, "page": 2}]] for name in ["a", "b", "c", "d"]])
+
+        # Verify the number of requests sent at the same time is limited
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    def test_skip_404_error(self, mock_sleep):
+        """Verify that a 404 error is skipped and the stream is recorded as not accessible."""
+        not_accessible_repos = set()
+        response = self.client.run(self.client.authed_get("", "{}/error/404".format(self.server.base_url), stream="teams",
+                                                          not_accessible_repos=not_accessible_repos))
+
+        self.assertEqual(response.json(), {})
+        self.assertEqual(not_accessible_repos, {"teams"})
+
+    def test_error_mapping(self, mock_sleep):
+        """Verify that the error codes are mapped to the same exceptions as `GithubClient.authed_get`."""
+        with self.assertRaises(BadCredentialsException) as e:
+            self.client.run(self.client.authed_get("", "{}/error/401".format(self.server.base_url)))
+
+        self.assertEqual(str(e.exception), "HTTP-error-code: 401, Error: {'message': 'error'}")
+
+@mock.patch("requests.Session.request")
+class TestPrefetchAllPages(unittest.TestCase):
+    """
+    Test `prefetch_all_pages` of `GithubClient`.
+    """
+
+    def test_prefetched_pages_served(self, mocked_request):
+        """Verify the prefetched pages are served by `authed_get_all_pages` without a blocking request."""
+        test_client = GithubClient({"access_token": "TOKEN", "max_in_flight_requests": 4})
+        server = MockGithubServer()
+        test_client.async_client.run(server.start())
+        url = "{}/items/a".format(server.base_url)
+
+        test_client.prefetch_all_pages([("items", url, "items")])
+        pages = list(test_client.authed_get_all_pages("items", url, stream="items"))
+
+        test_client.async_client.run(server.stop())
+        test_client.async_client.close()
+
+        self.assertEqual([page.json() for page in pages], [[{"name": "a", "page": 1}], [{"name": "a", "page": 2}]])
+        self.assertFalse(mocked_request.called)
+
+        # Verify the pages are released once served
+        self.assertEqual(test_client.prefetched_pages, {})
+
+    def test_session_headers(self, mocked_request):
+        """Verify the pages are prefetched with the headers of the session, and the pages not served are released."""
+        test_client = GithubClient({"access_token": "TOKEN", "max_in_flight_requests": 4})
+        server = MockGithubServer()
+        test_client.async_client.run(server.start())
+        calls = [("items", "{}/items/a".format(server.base_url), "items")]
+        test_client.session.headers.update({"Accept": "application/vnd.github.v3.star+json"})
+
+        test_client.prefetch_all_pages(calls)
+        prefetched_urls = list(test_client.prefetched_pages)
+        test_client.release_prefetched_pages(calls)
+
+        test_client.async_client.run(server.stop())
+        test_client.async_client.close()
+
+        self.assertEqual(server.accept_headers, ["application/vnd.github.v3.star+json"] * 2)
+        self.assertEqual(prefetched_urls, [calls[0][1]])
+        self.assertEqual(test_client.prefetched_pages, {})
+
+    def test_disabled_by_default(self, mocked_request):
+        """Verify `prefetch_all_pages` does nothing without `max_in_flight_requests` in the config."""
+        test_client = GithubClient({"access_token": "TOKEN"})
+        test_client.prefetch_all_pages([("items", "https://api.github.com/items", "items")])
+
+        self.assertIsNone(test_client.async_client)
+        self.assertEqual(test_client.prefetched_pages, {})
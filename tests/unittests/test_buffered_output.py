@@ -0,0 +1,198 @@
+import decimal
+import json
+import unittest
+from unittest import mock
+import singer
+from tap_github import output
+
+class MockStream:
+    """Mock of stdout, which records the writes and the flushes."""
+    def __init__(self, error = None):
+        self.calls = []
+        self.error = error
+
+    def write(self, data):
+        if self.error:
+            raise self.error
+        self.calls.append(("write", data))
+
+    def flush(self):
+        self.calls.append(("flush",))
+
+class TestSerialize(unittest.TestCase):
+    """
+    Test the serialization of the messages.
+    """
+
+    def test_orjson(self):
+        """Verify the message is serialized to the same JSON as singer does."""
+        message = singer.RecordMessage(stream="commits", record={"sha": "a", "count": 1.5},
+                                       time_extracted=singer.utils.strptime_to_utc("2022-01-01T00:00:00Z"))
+
+        line = output.serialize(message)
+
+        self.assertTrue(line.endswith(b"\n"))
+        self.assertEqual(json.loads(line), json.loads(singer.format_message(message)))
+
+    @mock.patch("tap_github.output.orjson", None)
+    def test_without_orjson(self):
+        """Verify the message is serialized with simplejson if orjson is not installed."""
+        message = singer.StateMessage(value={"bookmarks": {}})
+
+        self.assertEqual(output.serialize(message), (singer.format_message(message) + "\n").encode())
+
+    def test_decimal(self):
+        """Verify a message which orjson can't serialize is serialized with simplejson."""
+        message = singer.RecordMessage(stream="commits", record={"value": decimal.Decimal("1.10")})
+
+        self.assertEqual(output.serialize(message), (singer.format_message(message) + "\n").encode())
+
+class TestBufferedWriter(unittest.TestCase):
+    """
+    Test the writes of the messages by the writer thread.
+    """
+
+    def test_flushed_at_state(self):
+        """Verify the messages are written in a single write, flushed with the following state."""
+        stream = MockStream()
+        writer = output.BufferedWriter(stream)
+
+        writer.write(b"record-1\n")
+        writer.write(b"record-2\n")
+        writer.write(b"state\n", flush=True)
+        writer.write(b"record-3\n")
+        writer.close()
+
+        self.assertEqual(stream.calls, [("write", b"record-1\nrecord-2\nstate\n"), ("flush",),
+                                        ("write", b"record-3\n"), ("flush",)])
+
+    def test_buffer_size(self):
+        """Verify the messages are written once the buffer is full."""
+        stream = MockStream()
+        writer = output.BufferedWriter(stream, buffer_size=10)
+
+        writer.write(b"record-1\n")
+        writer.write(b"record-2\n")
+        writer.close()
+
+        self.assertEqual(stream.calls[0], ("write", b"record-1\nrecord-2\n"))
+
+    def test_write_error(self):
+        """Verify the error of the writer thread is raised to the sync."""
+        writer = output.BufferedWriter(MockStream(BrokenPipeError()), max_queue_size=1)
+
+        with self.assertRaises(BrokenPipeError):
+            for _ in range(100):
+                writer.write(b"state\n", flush=True)
+            writer.close()
+
+    @mock.patch("singer.metrics.log")
+    def test_metrics(self, mock_log):
+        """Verify the time spent writing to stdout is reported when the writer is closed."""
+        writer = output.BufferedWriter(MockStream())
+
+        writer.close()
+
+        self.assertEqual([call[0][1].metric for call in mock_log.call_args_list], ["stdout_blocked", "output_queue_wait"])
+
+@mock.patch("singer.write_record")
+@mock.patch("tap_github.output.BufferedWriter")
+class TestBufferedOutput(unittest.TestCase):
+    """
+    Test the messages are written by the writer thread only if `buffered_output` is enabled.
+    """
+
+    def test_enabled(self, mock_writer, mock_write_record):
+        """Verify the messages are queued to the writer, which is closed at the end of the sync."""
+        with output.buffered_output({"buffered_output": "true"}):
+            output.write_record("commits", {"sha": "a"})
+            output.write_state({"bookmarks": {}})
+
+        writes = mock_writer.return_value.write.call_args_list
+        self.assertEqual([json.loads(call[0][0]) for call in writes],
+                         [{"type": "RECORD", "stream": "commits", "record": {"sha": "a"}}, {"type": "STATE", "value": {"bookmarks": {}}}])
+        self.assertEqual([call[0][1] for call in writes], [False, True])
+        self.assertTrue(mock_writer.return_value.close.called)
+        self.assertFalse(mock_write_record.called)
+        self.assertIsNone(output.WRITER)
+
+    def test_disabled(self, mock_writer, mock_write_record):
+        """Verify the messages are written by singer by default."""
+        with output.buffered_output({}):
+            output.write_record("commits", {"sha": "a"})
+
+        self.assertFalse(mock_writer.called)
+        mock_write_record.assert_called_with("commits", {"sha": "a"}, time_extracted=None)
+
+@mock.patch("singer.write_schema")
+class TestSchemasOnce(unittest.TestCase):
+    """
+    Test the SCHEMA messages are written once per run.
+    """
+
+    def test_written_once(self, mock_write_schema):
+        """Verify the schema of a stream synced for several repositories is written once."""
+        with output.schemas_once():
+            for _ in range(2):
+                output.write_schema("commits", {"type": "object"}, ["sha"])
+                output.write_schema("issues", {"type": "object"}, ["id"])
+
+        self.assertEqual([call[0][0] for call in mock_write_schema.call_args_list], ["commits", "issues"])
+        self.assertIsNone(output.WRITTEN_SCHEMAS)
+
+    def test_changed_schema(self, mock_write_schema):
+        """Verify the schema is written again when it changes."""
+        with output.schemas_once():
+            output.write_schema("commits", {"type": "object"}, ["sha"])
+            output.write_schema("commits", {"type": ["null", "object"]}, ["sha"])
+            output.write_schema("commits", {"type": ["null", "object"]}, ["sha"])
+
+        self.assertEqual(mock_write_schema.call_count, 2)
+
+    def test_disabled(self, mock_write_schema):
+        """Verify the schema is written each time outside of a run."""
+        output.write_schema("commits", {"type": "object"}, ["sha"])
+        output.write_schema("commits", {"type": "object"}, ["sha"])
+
+        self.assertEqual(mock_write_schema.call_count, 2)
+
+@mock.patch("singer.write_state")
+@mock.patch("singer.write_record")
+class TestGroupedRecords(unittest.TestCase):
+    """
+    Test the records are written grouped by stream only if `group_records` is enabled.
+    """
+
+    def test_grouped(self, mock_write_record, mock_write_state):
+        """Verify the records are written by stream before the state."""
+        manager = mock.Mock()
+        manager.attach_mock(mock_write_record, "write_record")
+        manager.attach_mock(mock_write_state, "write_state")
+
+        with output.grouped_records({"group_records": "true"}):
+            output.write_record("commits", {"sha": "a"})
+            output.write_record("issues", {"id": 1})
+            output.write_record("commits", {"sha": "b"})
+            output.write_state({"bookmarks": {}})
+            output.write_record("issues", {"id": 2})
+
+        self.assertEqual(manager.mock_calls, [mock.call.write_record("commits", {"sha": "a"}, time_extracted=None),
+                                              mock.call.write_record("commits", {"sha": "b"}, time_extracted=None),
+                                              mock.call.write_record("issues", {"id": 1}, time_extracted=None),
+                                              mock.call.write_state({"bookmarks": {}}),
+                                              mock.call.write_record("issues", {"id": 2}, time_extracted=None)])
+        self.assertIsNone(output.RECORD_GROUPS)
+
+    def test_group_size(self, mock_write_record, mock_write_state):
+        """Verify the records are written once the groups are full."""
+        with output.grouped_records({"group_records": "true", "group_records_size": 2}):
+            output.write_record("commits", {"sha": "a"})
+            self.assertFalse(mock_write_record.called)
+            output.write_record("commits", {"sha": "b"})
+            self.assertEqual(mock_write_record.call_count, 2)
+
+    def test_disabled(self, mock_write_record, mock_write_state):
+        """Verify the records are written at once by default."""
+        with output.grouped_records({}):
+            output.write_record("commits", {"sha": "a"})
+            self.assertTrue(mock_write_record.called)
@@ -0,0 +1,233 @@
+import copy
+import unittest
+from unittest import mock
+from tap_github.client import GithubClient
+from tap_github.streams import Commits, IssueEvents, PullRequests, SyncContext
+
+ISSUE_EVENTS_URL = "https://api.github.com/repos/org/repo/issues/events?sort=created_at&direction=desc"
+COMMITS_URL = "https://api.github.com/repos/org/repo/commits?since=2022-01-01T00:00:00Z"
+START_DATE = "2022-01-01T00:00:00Z"
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, json_data, next_url = None):
+        self.json_data = json_data
+        self.links = {"next": {"url": next_url}} if next_url else {}
+
+    def json(self):
+        return self.json_data
+
+def get_context(stream_name, config, children = ()):
+    """Return the sync context of the selected stream and children."""
+    return SyncContext([{"tap_stream_id": stream, "schema": {}, "metadata": [{"breadcrumb": [], "metadata": {"selected": True}}]}
+                        for stream in [stream_name, *children]], config)
+
+def get_pages(pages):
+    """Return the mock of `authed_get_all_pages` yielding the pages from the url of each page."""
+    urls = [url for url, _ in pages]
+    def authed_get_all_pages(source, url, headers = {}, stream = ""):
+        for index in range(urls.index(url), len(pages)):
+            next_url = urls[index + 1] if index + 1 < len(pages) else None
+            yield MockResponse(pages[index][1], next_url)
+    return authed_get_all_pages
+
+def get_event(index, created_at):
+    """Return an issue event."""
+    return {"id": index, "created_at": created_at}
+
+def get_commit(sha, date):
+    """Return a commit."""
+    return {"sha": sha, "commit": {"committer": {"date": date}}}
+
+@mock.patch("tap_github.output.write_record")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestOrderedCheckpoints(unittest.TestCase):
+    """
+    Test the checkpoints of the streams in descending order of their replication key.
+    """
+    pages = [(ISSUE_EVENTS_URL, [get_event(3, "2022-01-03T00:00:00Z")]),
+             ("https://api.github.com/page2", [get_event(2, "2022-01-02T00:00:00Z")]),
+             ("https://api.github.com/page3", [get_event(1, "2022-01-01T12:00:00Z")])]
+
+    def test_checkpoints(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify the next page is saved with the bookmark of the stream, which is only moved at the end."""
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        states = []
+        state = {}
+
+        state = IssueEvents().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state, get_context("issue_events", {"checkpoint_pages": 2}),
+                                            "org/repo", START_DATE, ["issue_events"], ["issue_events"],
+                                            write_state = lambda state: states.append(copy.deepcopy(state)))
+
+        self.assertEqual(states, [{"bookmarks": {"org/repo": {"issue_events": {
+            "since": START_DATE,
+            "checkpoint": {"url": ISSUE_EVENTS_URL, "next": "https://api.github.com/page3", "bookmark": "2022-01-03T00:00:00Z"}}}}}])
+        self.assertEqual(state, {"bookmarks": {"org/repo": {"issue_events": {"since": "2022-01-03T00:00:00Z"}}}})
+
+    def test_resume(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify the sync resumes from the next page and ends with the bookmark of the first record synced."""
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        state = {"bookmarks": {"org/repo": {"issue_events": {
+            "since": START_DATE,
+            "checkpoint": {"url": ISSUE_EVENTS_URL, "next": "https://api.github.com/page3", "bookmark": "2022-01-03T00:00:00Z"}}}}}
+
+        state = IssueEvents().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state, get_context("issue_events", {}),
+                                            "org/repo", START_DATE, ["issue_events"], ["issue_events"])
+
+        self.assertEqual(mock_authed_get_all_pages.call_args[0][1], "https://api.github.com/page3")
+        self.assertEqual([call[0][1]["id"] for call in mock_write_record.call_args_list], [1])
+        self.assertEqual(state, {"bookmarks": {"org/repo": {"issue_events": {"since": "2022-01-03T00:00:00Z"}}}})
+
+    def test_disabled(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify no checkpoint is written by default."""
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        write_state = mock.Mock()
+
+        IssueEvents().sync_endpoint(GithubClient({"access_token": "TOKEN"}), {}, get_context("issue_events", {}),
+                                    "org/repo", START_DATE, ["issue_events"], ["issue_events"], write_state)
+
+        self.assertFalse(write_state.called)
+
+@mock.patch("tap_github.streams.datetime")
+@mock.patch("tap_github.output.write_record")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestIncrementalCheckpoints(unittest.TestCase):
+    """
+    Test the checkpoints of the streams which are not ordered by their replication key.
+    """
+    pages = [(COMMITS_URL, [get_commit("a", "2022-01-02T00:00:00Z"), get_commit("b", "2022-01-05T00:00:00Z")]),
+             ("https://api.github.com/page2", [get_commit("c", "2022-01-03T00:00:00Z")])]
+
+    def test_checkpoints(self, mock_authed_get_all_pages, mock_write_record, mock_datetime):
+        """Verify the next page is saved with the max bookmark of the pages synced."""
+        mock_datetime.today.return_value.strftime.return_value = "2022-02-01T00:00:00Z"
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        states = []
+
+        state = Commits().sync_endpoint(GithubClient({"access_token": "TOKEN"}), {}, get_context("commits", {"checkpoint_pages": 1}),
+                                        "org/repo", START_DATE, ["commits"], ["commits"],
+                                        write_state = lambda state: states.append(copy.deepcopy(state)))
+
+        self.assertEqual(states, [{"bookmarks": {"org/repo": {"commits": {
+            "since": START_DATE,
+            "checkpoint": {"url": COMMITS_URL, "next": "https://api.github.com/page2", "bookmark": "2022-01-05T00:00:00Z"}}}}}])
+        self.assertEqual(state, {"bookmarks": {"org/repo": {"commits": {"since": "2022-01-05T00:00:00Z"}}}})
+
+    def test_resume(self, mock_authed_get_all_pages, mock_write_record, mock_datetime):
+        """Verify the sync resumes from the next page with the max bookmark of the pages synced before."""
+        mock_datetime.today.return_value.strftime.return_value = "2022-02-01T00:00:00Z"
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        state = {"bookmarks": {"org/repo": {"commits": {
+            "since": START_DATE,
+            "checkpoint": {"url": COMMITS_URL, "next": "https://api.github.com/page2", "bookmark": "2022-01-05T00:00:00Z"}}}}}
+
+        state = Commits().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state, get_context("commits", {}),
+                                        "org/repo", START_DATE, ["commits"], ["commits"])
+
+        self.assertEqual([call[0][1]["sha"] for call in mock_write_record.call_args_list], ["c"])
+        self.assertEqual(state, {"bookmarks": {"org/repo": {"commits": {"since": "2022-01-05T00:00:00Z"}}}})
+
+    def test_other_url(self, mock_authed_get_all_pages, mock_write_record, mock_datetime):
+        """Verify the checkpoint of another url, e.g. once a child stream is selected, is not resumed."""
+        mock_datetime.today.return_value.strftime.return_value = "2022-02-01T00:00:00Z"
+        mock_authed_get_all_pages.side_effect = get_pages(self.pages)
+        state = {"bookmarks": {"org/repo": {"commits": {
+            "since": START_DATE,
+            "checkpoint": {"url": COMMITS_URL + "&page=1", "next": "https://api.github.com/page2", "bookmark": "2022-01-05T00:00:00Z"}}}}}
+
+        Commits().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state, get_context("commits", {}),
+                                "org/repo", START_DATE, ["commits"], ["commits"])
+
+        self.assertEqual([call[0][1]["sha"] for call in mock_write_record.call_args_list], ["a", "b", "c"])
+
+@mock.patch("tap_github.output.write_record")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestChildrenCheckpoints(unittest.TestCase):
+    """
+    Test the pull requests whose children were synced are saved, and skipped by an interrupted sync.
+    """
+    pulls_url = "https://api.github.com/repos/org/repo/pulls?state=all&sort=updated&direction=desc"
+
+    def authed_get_all_pages(self, source, url, headers = {}, stream = ""):
+        if stream == "pull_requests":
+            yield MockResponse([{"id": 11, "number": 2, "updated_at": "2022-01-03T00:00:00Z"},
+                                {"id": 10, "number": 1, "updated_at": "2022-01-02T00:00:00Z"}])
+        else:
+            yield MockResponse([{"id": 100, "submitted_at": "2022-01-02T00:00:00Z"}])
+
+    def test_synced_parents(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify each pull request is saved once its children are synced, and dropped with the bookmark at the end."""
+        mock_authed_get_all_pages.side_effect = self.authed_get_all_pages
+        states = []
+
+        state = PullRequests().sync_endpoint(GithubClient({"access_token": "TOKEN"}), {},
+                                             get_context("pull_requests", {"checkpoint_children": "true"}, ["reviews"]),
+                                             "org/repo", START_DATE, ["pull_requests", "reviews"], ["pull_requests", "reviews"],
+                                             write_state = lambda state: states.append(copy.deepcopy(state)))
+
+        self.assertEqual([state["bookmarks"]["org/repo"]["pull_requests"] for state in states],
+                         [{"since": START_DATE, "synced_parents": {"11": "2022-01-03T00:00:00Z"}},
+                          {"since": START_DATE, "synced_parents": {"11": "2022-01-03T00:00:00Z", "10": "2022-01-02T00:00:00Z"}}])
+        self.assertEqual(state["bookmarks"]["org/repo"]["pull_requests"], {"since": "2022-01-03T00:00:00Z"})
+
+    def test_resume(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify the children of a saved pull request are not synced again, unless the pull request was updated since."""
+        mock_authed_get_all_pages.side_effect = self.authed_get_all_pages
+        state = {"bookmarks": {"org/repo": {"pull_requests": {
+            "since": START_DATE, "synced_parents": {"11": "2022-01-01T00:00:00Z", "10": "2022-01-02T00:00:00Z"}}}}}
+
+        PullRequests().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state, get_context("pull_requests", {}, ["reviews"]),
+                                     "org/repo", START_DATE, ["pull_requests", "reviews"], ["pull_requests", "reviews"])
+
+        self.assertEqual([call[0][1] for call in mock_authed_get_all_pages.call_args_list[1:]],
+                         ["https://api.github.com/repos/org/repo/pulls/2/reviews"])
+
+    @mock.patch("tap_github.client.GithubClient.release_prefetched_pages")
+    @mock.patch("tap_github.client.GithubClient.prefetch_all_pages")
+    def test_prefetch_skips_synced_parents(self, mock_prefetch_all_pages, mock_release_prefetched_pages,
+                                           mock_authed_get_all_pages, mock_write_record):
+        """Verify the children of a saved pull request are not prefetched, and the prefetched pages are released after the page."""
+        mock_authed_get_all_pages.side_effect = self.authed_get_all_pages
+        client = GithubClient({"access_token": "TOKEN"})
+        client.async_client = mock.Mock()
+        state = {"bookmarks": {"org/repo": {"pull_requests": {
+            "since": START_DATE, "synced_parents": {"10": "2022-01-02T00:00:00Z"}}}}}
+
+        PullRequests().sync_endpoint(client, state, get_context("pull_requests", {}, ["reviews"]),
+                                     "org/repo", START_DATE, ["pull_requests", "reviews"], ["pull_requests", "reviews"])
+
+        calls = [("reviews", "https://api.github.com/repos/org/repo/pulls/2/reviews", "reviews")]
+        mock_prefetch_all_pages.assert_called_once_with(calls)
+        mock_release_prefetched_pages.assert_called_with(calls)
+
+    def test_deselected_parent(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify no checkpoint is written in the bookmark of a deselected parent, which is never written to drop it."""
+        def authed_get_all_pages(source, url, headers = {}, stream = ""):
+            if stream == "pull_requests":
+                yield MockResponse([{"id": 11, "number": 2, "updated_at": "2022-01-03T00:00:00Z"}], "https://api.github.com/page2")
+                yield MockResponse([{"id": 10, "number": 1, "updated_at": "2022-01-02T00:00:00Z"}])
+            else:
+                yield MockResponse([{"id": 100, "submitted_at": "2022-01-02T00:00:00Z"}])
+        mock_authed_get_all_pages.side_effect = authed_get_all_pages
+        write_state = mock.Mock()
+
+        state = PullRequests().sync_endpoint(GithubClient({"access_token": "TOKEN"}), {},
+                                             get_context("pull_requests", {"checkpoint_pages": 1}, ["reviews"]),
+                                             "org/repo", START_DATE, ["reviews"], ["pull_requests", "reviews"], write_state)
+
+        self.assertFalse(write_state.called)
+        self.assertNotIn("pull_requests", state["bookmarks"]["org/repo"])
+
+    def test_deselected_parent_synced_parents(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify the pull requests are not saved if they are not selected, and the ones saved before are dropped at the end."""
+        mock_authed_get_all_pages.side_effect = self.authed_get_all_pages
+        write_state = mock.Mock()
+        state = {"bookmarks": {"org/repo": {"pull_requests": {
+            "since": START_DATE, "synced_parents": {"11": "2022-01-01T00:00:00Z"}}}}}
+
+        state = PullRequests().sync_endpoint(GithubClient({"access_token": "TOKEN"}), state,
+                                             get_context("pull_requests", {"checkpoint_children": "true"}, ["reviews"]),
+                                             "org/repo", START_DATE, ["reviews"], ["pull_requests", "reviews"], write_state)
+
+        self.assertFalse(write_state.called)
+        self.assertEqual(state["bookmarks"]["org/repo"]["pull_requests"], {"since": START_DATE})
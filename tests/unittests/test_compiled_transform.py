@@ -0,0 +1,182 @@
+import copy
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import singer
+from singer.transform import SchemaMismatch
+from parameterized import parameterized
+from singer import metadata
+from tap_github import transform
+from tap_github.schema import get_schemas
+from tap_github.streams import StreamContext
+
+# Values of each type which are transformed by singer, including the ones which are coerced.
+VALID_VALUES = {
+    "string": ["abc", "", 12, True],
+    "date-time": ["2022-01-02T03:04:05Z", "2022-01-02T03:04:05.123+02:00", "2022-01-02"],
+    "integer": [1, "1,000", 2.7, True, "-3"],
+    "number": [1.5, "2,500.5", 3, "1e3"],
+    "boolean": [True, False, "false", "FALSE", "true", 0, 1, ""],
+}
+# Values which don't match some of the types.
+INVALID_VALUES = [None, "", "not a number", {"key": "value"}, [1, "a"], 1650000000]
+
+def get_value(schema, rnd, invalid_rate):
+    """Return a random value for the schema, which does not match it with a probability of `invalid_rate`."""
+    if "anyOf" in schema:
+        return get_value(rnd.choice(schema["anyOf"]), rnd, invalid_rate)
+    if rnd.random() < invalid_rate:
+        return copy.deepcopy(rnd.choice(INVALID_VALUES))
+
+    types = schema.get("type", ["string"])
+    types = types if isinstance(types, list) else [types]
+    if "null" in types and rnd.random() < 0.2:
+        return rnd.choice([None, ""])
+    typ = rnd.choice([typ for typ in types if typ != "null"] or ["null"])
+
+    if typ == "null":
+        return None
+    if schema.get("format") == "date-time":
+        return rnd.choice(VALID_VALUES["date-time"])
+    if typ == "object":
+        record = {key: get_value(subschema, rnd, invalid_rate)
+                  for key, subschema in schema.get("properties", {}).items() if rnd.random() < 0.8}
+        # A field which is not in the schema is removed.
+        record["unknown_field"] = "value"
+        return record
+    if typ == "array":
+        return [get_value(schema.get("items", {}), rnd, invalid_rate) for _ in range(rnd.randint(0, 3))]
+    return rnd.choice(VALID_VALUES[typ])
+
+def transform_with_singer(record, schema, mdata):
+    """Return the record transformed by singer, or the exception raised."""
+    try:
+        with singer.Transformer() as transformer:
+            return transformer.transform(record, schema, metadata=mdata)
+    except Exception as err: # pylint: disable=broad-except
+        return type(err)
+
+def transform_compiled(record, stream_context):
+    """Return the record transformed with the compiled transform, or the exception raised."""
+    try:
+        return stream_context.transform(record)
+    except Exception as err: # pylint: disable=broad-except
+        return type(err)
+
+SCHEMAS, FIELD_METADATA = get_schemas()
+
+class TestCompiledTransformEquivalence(unittest.TestCase):
+    """
+    Test the compiled transforms of the schemas of all streams transform the records as singer does.
+    """
+
+    @parameterized.expand([[stream_name] for stream_name in sorted(SCHEMAS)])
+    def test_stream(self, stream_name):
+        """Verify random records of the stream are transformed or rejected as singer does."""
+        rnd = random.Random(stream_name)
+        schema = SCHEMAS[stream_name]
+        mdata = metadata.to_map(FIELD_METADATA[stream_name])
+        # Deselect a field, which is removed from the records.
+        field = rnd.choice([breadcrumb for breadcrumb in mdata if breadcrumb and mdata[breadcrumb].get("inclusion") != "automatic"])
+        mdata[field]["selected"] = False
+        stream_context = StreamContext({"schema": schema, "metadata": metadata.to_list(mdata)}, {"compiled_transform": "true"})
+
+        for invalid_rate in [0, 0.001, 0.01, 0.1]:
+            for _ in range(20):
+                record = get_value(schema, rnd, invalid_rate)
+                expected = transform_with_singer(copy.deepcopy(record), schema, mdata)
+
+                self.assertEqual(transform_compiled(copy.deepcopy(record), stream_context), expected)
+
+class TestCompiledTransform(unittest.TestCase):
+    """
+    Test the compiled transforms of the constructs of the schemas.
+    """
+
+    @parameterized.expand([
+        ["any_of", {"anyOf": [{"type": "integer"}, {"type": "string"}]}, ["1", "a", None]],
+        ["no_type", {"description": "untyped"}, [{"a": 1}, None]],
+        ["null_first", {"type": ["null", "string"]}, ["", None, 1]],
+        ["date_time", {"type": ["null", "string"], "format": "date-time"}, ["2022-01-01", "invalid", "", 1, None]],
+        ["github_date_time", {"type": "string", "format": "date-time"},
+         ["2022-01-02T03:04:05Z", "0999-01-01T00:00:00Z", "2022-02-30T00:00:00Z", "2022-13-01T00:00:00Z", "2022-01-01T24:00:00Z"]],
+        ["date_time_not_null", {"type": "string", "format": "date-time"}, ["2022-01-01", None]],
+        ["empty_object", {"type": "object"}, [{"a": 1}, "a"]],
+        ["object_or_string", {"type": ["object", "string"], "properties": {"a": {"type": "integer"}}}, [{"a": "x"}, {"a": "1", "b": 2}]],
+        ["pattern_properties", {"type": "object", "patternProperties": {"^a": {"type": "integer"}}}, [{"a1": "1", "b": 1}]],
+        ["decimal", {"type": "string", "format": "singer.decimal"}, ["1.10", 2, None]],
+        ["array", {"type": ["null", "array"], "items": {"type": "integer"}}, [["1", 2], ["a"], "", None]],
+        ["unknown_type", {"type": ["date", "null"]}, ["2022-01-01", None]],
+    ])
+    def test_schema(self, name, schema, values):
+        """Verify the values are transformed or rejected as singer does."""
+        compiled_transform = transform.get_compiled_transform(schema)
+
+        for value in values:
+            success, expected = singer.Transformer().transform_recur(copy.deepcopy(value), copy.deepcopy(schema), [])
+
+            self.assertEqual(compiled_transform(copy.deepcopy(value)), expected if success else transform.FAIL)
+
+    def test_shared_functions(self):
+        """Verify the identical sub schemas are compiled once."""
+        source = transform.TransformCompiler().compile({"type": "object", "properties": {
+            "url": {"type": ["null", "string"]}, "html_url": {"type": ["null", "string"]}}})
+
+        self.assertEqual(source.count("def "), 2)
+
+    def test_errors_raised(self):
+        """Verify the errors of singer are raised for a record which does not match the schema."""
+        stream_context = StreamContext({"schema": {"type": "object", "properties": {"id": {"type": "integer"}}}, "metadata": []},
+                                       {"compiled_transform": "true"})
+
+        with self.assertRaises(SchemaMismatch) as err:
+            stream_context.transform({"id": "a"})
+        self.assertIn("id", str(err.exception))
+
+    @parameterized.expand([
+        ["top_level", {(): {"selected": True}, ("properties", "a"): {"selected": False},
+                       ("properties", "b"): {"selected": False, "inclusion": "automatic"},
+                       ("properties", "c"): {"inclusion": "unsupported"}}, {"a", "c"}],
+        ["nested", {("properties", "a", "properties", "b"): {"selected": False}}, None],
+    ])
+    def test_deselected_fields(self, name, mdata, expected_fields):
+        """Verify the fields removed from the records by the metadata."""
+        self.assertEqual(transform.get_deselected_fields(mdata), expected_fields)
+
+class TestCompiledTransformCache(unittest.TestCase):
+    """
+    Test the compiled transforms cached on the disk.
+    """
+    schema = {"type": "object", "properties": {"id": {"type": "integer"}, "cached": {"type": "boolean"}}}
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    @mock.patch.dict(transform.COMPILED_TRANSFORMS, clear=True)
+    def test_cached_on_disk(self):
+        """Verify the transform is compiled once and loaded from the disk by the next runs."""
+        transform.get_compiled_transform(self.schema, self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [transform.get_schema_key(self.schema) + ".bin"])
+
+        transform.COMPILED_TRANSFORMS.clear()
+        with mock.patch.object(transform.TransformCompiler, "compile") as mock_compile:
+            compiled_transform = transform.get_compiled_transform(self.schema, self.cache_dir)
+
+        self.assertFalse(mock_compile.called)
+        self.assertEqual(compiled_transform({"id": "1", "cached": "false"}), {"id": 1, "cached": False})
+
+    @mock.patch.dict(transform.COMPILED_TRANSFORMS, clear=True)
+    def test_corrupted_cache(self):
+        """Verify a corrupted file of the cache is compiled again."""
+        with open(os.path.join(self.cache_dir, transform.get_schema_key(self.schema) + ".bin"), "wb") as file:
+            file.write(b"corrupted")
+
+        compiled_transform = transform.get_compiled_transform(self.schema, self.cache_dir)
+
+        self.assertEqual(compiled_transform({"id": 2}), {"id": 2})
@@ -0,0 +1,158 @@
+import unittest
+from unittest import mock
+import singer
+from tap_github.state import ConcurrentStateManager
+from tap_github.sync import sync, get_max_concurrent_repos, get_ordered_repos_for_concurrent_sync
+from parameterized import parameterized
+
+
+def get_stream_catalog(stream_name, is_selected = False):
+    """Return catalog for stream"""
+    return {
+                "schema":{},
+                "tap_stream_id": stream_name,
+                "metadata": [
+                        {
+                            "breadcrumb": [],
+                            "metadata":{
+                                "selected": is_selected
+                            }
+                        }
+                    ],
+                "key_properties": []
+            }
+
+class TestGetMaxConcurrentRepos(unittest.TestCase):
+    """
+    Test `get_max_concurrent_repos` function of sync.
+    """
+
+    @parameterized.expand([
+        ["test_int_value", {"max_concurrent_repos": 4}, 4],
+        ["test_str_value", {"max_concurrent_repos": "4"}, 4],
+        ["test_empty_value", {"max_concurrent_repos": ""}, 1],
+        ["test_zero_value", {"max_concurrent_repos": 0}, 1],
+        ["test_no_value", {}, 1]
+    ])
+    def test_max_concurrent_repos(self, name, config, expected_value):
+        """Verify the number of workers is taken from the config and defaults to a sequential sync."""
+        self.assertEqual(get_max_concurrent_repos(config), expected_value)
+
+class TestGetOrderedReposForConcurrentSync(unittest.TestCase):
+    """
+    Test `get_ordered_repos_for_concurrent_sync` function of sync.
+    """
+    repo_list = ["org/repo1", "org/repo2", "org/repo3", "org/repo4", "org/repo5"]
+
+    def test_for_interrupted_sync(self):
+        """Verify the repositories which were in flight are synced first."""
+        final_repo_list = get_ordered_repos_for_concurrent_sync(["org/repo4", "org/repo2"], self.repo_list)
+
+        self.assertEqual(final_repo_list, ["org/repo2", "org/repo4", "org/repo1", "org/repo3", "org/repo5"])
+
+    def test_in_flight_repo_removed_from_config(self):
+        """Verify the in flight repositories which are not in the config anymore are not synced."""
+        final_repo_list = get_ordered_repos_for_concurrent_sync(["org/repo6"], self.repo_list)
+
+        self.assertEqual(final_repo_list, self.repo_list)
+
+@mock.patch("singer.write_state")
+class TestConcurrentStateManager(unittest.TestCase):
+    """
+    Test `ConcurrentStateManager` class.
+    """
+
+    def test_resume_from_sequential_state(self, mock_write_state):
+        """Verify the repository and stream of an interrupted sequential sync are resumed."""
+        state = {"currently_syncing_repo": "org/repo2", "currently_syncing": "issues",
+                 "bookmarks": {"org/repo2": {"issues": {"since": "2022-01-01T00:00:00Z"}}}}
+        state_manager = ConcurrentStateManager(state)
+
+        self.assertEqual(state_manager.get_in_flight_repos(), ["org/repo2"])
+
+        repo_state = state_manager.start_repo("org/repo2")
+
+        # Verify the worker gets a private copy of the repository's bookmarks and currently syncing stream
+        self.assertEqual(repo_state, {"currently_syncing": "issues",
+                                      "bookmarks": {"org/repo2": {"issues": {"since": "2022-01-01T00:00:00Z"}}}})
+        self.assertIsNot(repo_state["bookmarks"]["org/repo2"], state["bookmarks"]["org/repo2"])
+        self.assertNotIn("currently_syncing_repo", state)
+        self.assertNotIn("currently_syncing", state)
+
+    def test_merge_repo_states(self, mock_write_state):
+        """Verify the bookmarks of several in flight repositories are merged into the shared state."""
+        state = {"bookmarks": {"org/repo1": {"issues": {"since": "2021-01-01T00:00:00Z"}}}}
+        state_manager = ConcurrentStateManager(state)
+
+        repo1_state = state_manager.start_repo("org/repo1")
+        repo2_state = state_manager.start_repo("org/repo2")
+
+        singer.write_bookmark(repo1_state, "org/repo1", "issues", {"since": "2022-01-01T00:00:00Z"})
+        singer.set_currently_syncing(repo1_state, "issues")
+        state_manager.write_repo_state("org/repo1", repo1_state)
+
+        singer.write_bookmark(repo2_state, "org/repo2", "commits", {"since": "2022-02-01T00:00:00Z"})
+        state_manager.finish_repo("org/repo2", repo2_state)
+
+        # Verify both repositories are kept and only org/repo1 is still in flight
+        self.assertEqual(state, {
+            "currently_syncing_repos": {"org/repo1": "issues"},
+            "bookmarks": {
+                "org/repo1": {"issues": {"since": "2022-01-01T00:00:00Z"}},
+                "org/repo2": {"commits": {"since": "2022-02-01T00:00:00Z"}}
+            }
+        })
+
+        state_manager.finish()
+        self.assertNotIn("currently_syncing_repos", state)
+
+@mock.patch("singer.write_state")
+@mock.patch("tap_github.sync.write_schemas")
+@mock.patch("tap_github.streams.IncrementalStream.sync_endpoint")
+class TestConcurrentSync(unittest.TestCase):
+    """
+    Test `sync` function with `max_concurrent_repos`.
+    """
+
+    def test_all_repos_synced(self, mock_incremental, mock_write_schemas, mock_write_state):
+        """Verify every repository is synced and its bookmarks are merged into the final state."""
+        repositories = ["org/repo{}".format(i) for i in range(10)]
+
+        def sync_endpoint(client, state, catalog, repo_path, start_date, selected_stream_ids, stream_to_sync, write_state=None):
+            singer.write_bookmark(state, repo_path, "projects", {"since": "2022-01-01T00:00:00Z"})
+            return state
+
+        mock_incremental.side_effect = sync_endpoint
+        mock_catalog = {"streams": [get_stream_catalog("projects", True)]}
+
+        client = mock.Mock()
+        client.extract_repos_from_config.return_value = (repositories, set())
+        client.not_accessible_repos = set()
+
+        sync(client, {"start_date": "", "max_concurrent_repos": 3}, {}, mock_catalog)
+
+        # Verify each repository is synced once
+        self.assertEqual(sorted(call.kwargs["repo_path"] for call in mock_incremental.mock_calls), repositories)
+
+        # Verify the final state has the bookmarks of all repositories and no in flight repositories
+        final_state = mock_write_state.mock_calls[-1].args[0]
+        self.assertEqual(sorted(final_state["bookmarks"].keys()), repositories)
+        self.assertNotIn("currently_syncing_repos", final_state)
+
+    def test_worker_failure_is_raised(self, mock_incremental, mock_write_schemas, mock_write_state):
+        """Verify an exception in a worker fails the sync and keeps the failed repository in flight."""
+        mock_incremental.side_effect = Exception("worker failed")
+        mock_catalog = {"streams": [get_stream_catalog("projects", True)]}
+
+        client = mock.Mock()
+        client.extract_repos_from_config.return_value = (["org/repo1"], set())
+        client.not_accessible_repos = set()
+
+        with self.assertRaises(Exception) as e:
+            sync(client, {"start_date": "", "max_concurrent_repos": 2}, {}, mock_catalog)
+
+        self.assertEqual(str(e.exception), "worker failed")
+
+        # Verify the last written state still has the failed repository and its stream in flight
+        final_state = mock_write_state.mock_calls[-1].args[0]
+        self.assertEqual(final_state["currently_syncing_repos"], {"org/repo1": "projects"})
@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import requests_mock
+from tap_github.client import GithubClient, NotModifiedError
+
+FIRST_PAGE = "https://api.github.com/repos/org/repo/stargazers"
+SECOND_PAGE = "https://api.github.com/repos/org/repo/stargazers?page=2"
+RATE_LIMIT_HEADERS = {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "0"}
+
+def register_pages(mocker):
+    """Register 2 pages of stargazers with their ETag."""
+    mocker.get(FIRST_PAGE, json=[{"user": {"id": 1}}],
+               headers=dict(RATE_LIMIT_HEADERS, ETag='"etag-1"', Link='<{}>; rel="next"'.format(SECOND_PAGE)))
+    mocker.get(SECOND_PAGE, json=[{"user": {"id": 2}}], headers=dict(RATE_LIMIT_HEADERS, ETag='"etag-2"'))
+
+def register_not_modified(mocker):
+    """Register a 304 response for both pages."""
+    mocker.get(FIRST_PAGE, status_code=304, headers=RATE_LIMIT_HEADERS)
+    mocker.get(SECOND_PAGE, status_code=304, headers=RATE_LIMIT_HEADERS)
+
+@mock.patch("time.sleep")
+class TestETagCache(unittest.TestCase):
+    """
+    Test the conditional requests of `GithubClient` with the ETag cache.
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.config = {"access_token": "TOKEN", "etag_cache_path": os.path.join(self.cache_dir, "etag_cache.db")}
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_not_modified_served_from_cache(self, mock_sleep):
+        """Verify the ETag is sent as `If-None-Match` and a 304 response returns the cached records."""
+        test_client = GithubClient(self.config)
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            test_client.authed_get("stargazers", FIRST_PAGE)
+
+            register_not_modified(mocker)
+            response = test_client.authed_get("stargazers", FIRST_PAGE)
+
+            self.assertEqual(mocker.request_history[-1].headers["If-None-Match"], '"etag-1"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"user": {"id": 1}}])
+        self.assertEqual(response.links["next"]["url"], SECOND_PAGE)
+
+    def test_cache_keyed_by_token(self, mock_sleep):
+        """Verify the response cached for a token is not used for another token."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            GithubClient(self.config).authed_get("stargazers", FIRST_PAGE)
+            GithubClient(dict(self.config, access_token="OTHER_TOKEN")).authed_get("stargazers", FIRST_PAGE)
+
+            self.assertNotIn("If-None-Match", mocker.request_history[-1].headers)
+
+    def test_cache_keyed_by_token_sent(self, mock_sleep):
+        """Verify the response is cached for the token of the pool which requested it, not the token of the config."""
+        test_client = GithubClient(dict(self.config, access_tokens="OTHER_TOKEN"))
+        with requests_mock.Mocker() as mocker, mock.patch.object(test_client.token_pool, "get_token") as mock_get_token:
+            register_pages(mocker)
+            mock_get_token.return_value = "OTHER_TOKEN"
+            test_client.authed_get("stargazers", FIRST_PAGE)
+
+            mock_get_token.return_value = "TOKEN"
+            test_client.authed_get("stargazers", FIRST_PAGE)
+            self.assertNotIn("If-None-Match", mocker.request_history[-1].headers)
+
+            mock_get_token.return_value = "OTHER_TOKEN"
+            test_client.authed_get("stargazers", FIRST_PAGE)
+            self.assertEqual(mocker.request_history[-1].headers["If-None-Match"], '"etag-1"')
+            self.assertEqual(mocker.request_history[-1].headers["Authorization"], "token OTHER_TOKEN")
+
+    def test_since_not_cached(self, mock_sleep):
+        """Verify the responses of a url filtered with `since`, which changes with the bookmark, are not cached."""
+        url = FIRST_PAGE + "?since=2021-01-01T00:00:00Z"
+        test_client = GithubClient(self.config)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(url, json=[{"user": {"id": 1}}], headers=dict(RATE_LIMIT_HEADERS, ETag='"etag-1"'))
+            test_client.authed_get("stargazers", url)
+            test_client.authed_get("stargazers", url)
+
+            self.assertNotIn("If-None-Match", mocker.request_history[-1].headers)
+
+        self.assertFalse(test_client.etag_cache.connection.execute("SELECT 1 FROM responses").fetchone())
+
+    def test_not_modified_without_cache(self, mock_sleep):
+        """Verify a 304 response is still an error when the cache is not enabled."""
+        test_client = GithubClient({"access_token": "TOKEN"})
+        with requests_mock.Mocker() as mocker:
+            register_not_modified(mocker)
+            with self.assertRaises(NotModifiedError):
+                test_client.authed_get("stargazers", FIRST_PAGE)
+
+    def test_skip_cached_pages(self, mock_sleep):
+        """Verify the remaining pages are served from the cache without requests when the first page is not modified."""
+        test_client = GithubClient(dict(self.config, etag_cache_skip_pages="true"))
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            list(test_client.authed_get_all_pages("issues", FIRST_PAGE + "?direction=desc"))
+
+            register_not_modified(mocker)
+            pages = list(test_client.authed_get_all_pages("issues", FIRST_PAGE + "?direction=desc"))
+
+            # Verify only the first page was requested by the second sync
+            self.assertEqual([request.url for request in mocker.request_history],
+                             [FIRST_PAGE + "?direction=desc", SECOND_PAGE, FIRST_PAGE + "?direction=desc"])
+
+        self.assertEqual([page.json() for page in pages], [[{"user": {"id": 1}}], [{"user": {"id": 2}}]])
+
+    def test_all_pages_validated_if_not_newest_first(self, mock_sleep):
+        """Verify each page of a listing which can grow at its tail is requested, even if its first page is not modified."""
+        test_client = GithubClient(dict(self.config, etag_cache_skip_pages="true"))
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            list(test_client.authed_get_all_pages("stargazers", FIRST_PAGE))
+
+            register_not_modified(mocker)
+            list(test_client.authed_get_all_pages("stargazers", FIRST_PAGE))
+
+            self.assertEqual(len(mocker.request_history), 4)
+
+    def test_all_pages_validated_by_default(self, mock_sleep):
+        """Verify each page is requested with its validator when skipping the pages is not enabled."""
+        test_client = GithubClient(self.config)
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            list(test_client.authed_get_all_pages("stargazers", FIRST_PAGE))
+
+            register_not_modified(mocker)
+            pages = list(test_client.authed_get_all_pages("stargazers", FIRST_PAGE))
+
+            self.assertEqual(len(mocker.request_history), 4)
+            self.assertEqual(mocker.request_history[-1].headers["If-None-Match"], '"etag-2"')
+
+        self.assertEqual([page.json() for page in pages], [[{"user": {"id": 1}}], [{"user": {"id": 2}}]])
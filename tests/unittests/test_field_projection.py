@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+import singer
+from singer import metadata
+from parameterized import parameterized
+from tap_github.client import GithubClient
+from tap_github.schema import get_schemas
+from tap_github.streams import StreamContext, PullRequests
+from tap_github.transform import get_projected_fields
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, json_data):
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+def get_stream_catalog(schema, deselected_fields, stream_name = "pull_requests"):
+    """Return the catalog of the stream with the given fields deselected."""
+    mdata = [{"breadcrumb": [], "metadata": {"selected": True}}]
+    mdata += [{"breadcrumb": ["properties", field], "metadata": {"selected": False}} for field in deselected_fields]
+    return {"tap_stream_id": stream_name, "schema": schema, "metadata": mdata}
+
+SCHEMA = {"type": ["null", "object"], "properties": {"id": {"type": "integer"}, "number": {"type": "integer"},
+                                                     "title": {"type": "string"}, "head": {"type": "object"},
+                                                     "updated_at": {"type": "string"}}}
+
+class TestProjectedFields(unittest.TestCase):
+    """
+    Test the fields kept by the projection of the records.
+    """
+
+    @parameterized.expand([
+        ["nothing_deselected", SCHEMA, [], None],
+        ["untyped_schema", {}, ["title"], None],
+        ["deselected", SCHEMA, ["title", "head"], {"id", "number", "updated_at"}],
+    ])
+    def test_projected_fields(self, name, schema, deselected_fields, expected_fields):
+        """Verify the projected fields for the schema and the deselected fields."""
+        mdata = metadata.to_map(get_stream_catalog(schema, deselected_fields)["metadata"])
+
+        self.assertEqual(get_projected_fields(schema, mdata), expected_fields)
+
+    def test_internal_fields(self):
+        """Verify the fields read by the tap are kept for the pull requests."""
+        self.assertEqual(PullRequests().get_internal_fields(), {"id", "number", "updated_at", "head"})
+
+    @parameterized.expand([["compiled", {"compiled_transform": "true"}], ["singer", {}]])
+    def test_deselected_internal_field(self, name, config):
+        """Verify a deselected field read by the tap is kept in the record, but not written."""
+        stream_context = StreamContext(get_stream_catalog(SCHEMA, ["title", "head"]), config, PullRequests().get_internal_fields())
+
+        record = stream_context.project({"id": 1, "number": 2, "title": "a", "head": {"sha": "b"}, "url": "c"})
+        rec = stream_context.transform(record)
+
+        self.assertEqual(record, {"id": 1, "number": 2, "head": {"sha": "b"}})
+        self.assertEqual(rec, {"id": 1, "number": 2})
+
+    def test_same_records(self):
+        """Verify the projected records of a real schema are transformed as singer does with the whole record."""
+        schemas, field_metadata = get_schemas()
+        mdata = metadata.to_map(field_metadata["pull_requests"])
+        for breadcrumb in mdata:
+            if breadcrumb and breadcrumb[1] not in ("title", "user", "merged_at"):
+                mdata[breadcrumb]["selected"] = False
+        stream_catalog = {"schema": schemas["pull_requests"], "metadata": metadata.to_list(mdata)}
+        record = {"id": 1, "number": 2, "title": "a", "user": {"login": "b", "id": 3}, "merged_at": None, "state": "open",
+                  "updated_at": "2022-01-01T00:00:00Z", "head": {"sha": "c"}, "_links": {"self": {"href": "d"}}}
+        stream_context = StreamContext(stream_catalog, {}, PullRequests().get_internal_fields())
+
+        with singer.Transformer() as transformer:
+            expected = transformer.transform(dict(record), schemas["pull_requests"], metadata=mdata)
+        self.assertEqual(stream_context.transform(stream_context.project(dict(record))), expected)
+        self.assertEqual(set(expected), {"id", "number", "title", "user", "merged_at", "updated_at"})
+
+@mock.patch("singer.write_record")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestProjectionSync(unittest.TestCase):
+    """
+    Test the sync of the pull requests and their children with deselected fields.
+    """
+
+    def test_children_synced(self, mock_authed_get_all_pages, mock_write_record):
+        """Verify the children are synced from the fields of the parent which are not selected."""
+        def authed_get_all_pages(source, url, headers = {}, stream = ""):
+            if stream == "pull_requests":
+                yield MockResponse([{"id": 10, "number": 1, "title": "a", "head": {"sha": "b"}, "updated_at": "2022-01-02T00:00:00Z"}])
+            elif stream == "reviews":
+                yield MockResponse([{"id": 100, "body": "c", "submitted_at": "2022-01-02T00:00:00Z"}])
+        mock_authed_get_all_pages.side_effect = authed_get_all_pages
+        review_schema = {"type": "object", "properties": {"id": {"type": "integer"}, "pr_id": {"type": "integer"},
+                                                          "body": {"type": "string"}, "submitted_at": {"type": "string"}}}
+        catalog = [get_stream_catalog(SCHEMA, ["title", "number", "head"]),
+                   get_stream_catalog(review_schema, ["body"], "reviews")]
+
+        PullRequests().sync_endpoint(GithubClient({"access_token": "TOKEN"}), {}, catalog, "org/repo", "2022-01-01T00:00:00Z",
+                                     ["pull_requests", "reviews"], ["pull_requests", "reviews"])
+
+        self.assertEqual(mock_authed_get_all_pages.call_args_list[1][0][1], "https://api.github.com/repos/org/repo/pulls/1/reviews")
+        self.assertEqual([call[0][1] for call in mock_write_record.call_args_list],
+                         [{"id": 10, "updated_at": "2022-01-02T00:00:00Z"},
+                          {"id": 100, "pr_id": 10, "submitted_at": "2022-01-02T00:00:00Z"}])
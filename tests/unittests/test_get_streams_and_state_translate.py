@@ -104,6 +104,14 @@ class TestTranslateState(unittest.TestCase):
         final_state = translate_state(older_format_state, self.catalog, ["org/test-repo3", "org/test-repo4"])
         self.assertEqual(expected_state, dict(final_state))
 
+    def test_currently_syncing_repos_without_bookmarks(self):
+        """Verify that `translate_state` keeps the repositories in flight of an interrupted run without any bookmark yet."""
+        state = {
+            "currently_syncing_repos": {"org/test-repo": "comments", "org/test-repo2": None}
+        }
+        final_state = translate_state(state, self.catalog, ["org/test-repo", "org/test-repo2"])
+        self.assertEqual(state, dict(final_state))
+
 class TestGetStreamsToSync(unittest.TestCase):
     """
     Testcase for `get_stream_to_sync` in sync
@@ -0,0 +1,286 @@
+import json
+import unittest
+from unittest import mock
+import requests
+from graphql import build_schema, parse, validate
+from parameterized import parameterized
+from tap_github import graphql
+from tap_github.client import GithubClient, GraphQLError
+from tap_github.streams import PullRequests
+
+# The subset of the schema of the GitHub GraphQL API queried by the tap, with the same types, interfaces and unions.
+# Docs: https://docs.github.com/en/graphql/overview/public-schema
+SCHEMA = build_schema('''
+    scalar DateTime
+    scalar GitObjectID
+    scalar GitTimestamp
+    scalar HTML
+    scalar URI
+
+    enum CommentAuthorAssociation { COLLABORATOR CONTRIBUTOR FIRST_TIMER FIRST_TIME_CONTRIBUTOR MANNEQUIN MEMBER NONE OWNER }
+    enum DiffSide { LEFT RIGHT }
+    enum GitSignatureState { VALID INVALID MALFORMED_SIG UNKNOWN_KEY BAD_EMAIL UNVERIFIED_EMAIL NO_USER UNKNOWN_SIG_TYPE UNSIGNED }
+    enum IssueOrderField { COMMENTS CREATED_AT UPDATED_AT }
+    enum LockReason { OFF_TOPIC RESOLVED SPAM TOO_HEATED }
+    enum MilestoneState { CLOSED OPEN }
+    enum OrderDirection { ASC DESC }
+    enum PullRequestMergeMethod { MERGE REBASE SQUASH }
+    enum PullRequestReviewState { APPROVED CHANGES_REQUESTED COMMENTED DISMISSED PENDING }
+    enum PullRequestState { CLOSED MERGED OPEN }
+    enum ReactionContent { CONFUSED EYES HEART HOORAY LAUGH ROCKET THUMBS_DOWN THUMBS_UP }
+    enum TeamPrivacy { SECRET VISIBLE }
+
+    input IssueOrder { field: IssueOrderField! direction: OrderDirection! }
+
+    interface Node { id: ID! }
+    interface Actor { avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! }
+    interface RepositoryOwner { id: ID! avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! }
+    interface GitSignature { isValid: Boolean! payload: String! signature: String! state: GitSignatureState! }
+
+    type User implements Node & Actor & RepositoryOwner {
+        id: ID! databaseId: Int avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! isSiteAdmin: Boolean!
+    }
+    type Bot implements Node & Actor { id: ID! databaseId: Int avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! }
+    type Organization implements Node & Actor & RepositoryOwner {
+        id: ID! databaseId: Int avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI!
+    }
+    type Mannequin implements Node & Actor { id: ID! databaseId: Int avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! }
+    type EnterpriseUserAccount implements Node & Actor { id: ID! avatarUrl(size: Int): URI! login: String! resourcePath: URI! url: URI! }
+    type Team implements Node { id: ID! databaseId: Int name: String! slug: String! description: String privacy: TeamPrivacy! url: URI! }
+    union RequestedReviewer = Bot | Mannequin | Team | User
+
+    type PageInfo { endCursor: String hasNextPage: Boolean! hasPreviousPage: Boolean! startCursor: String }
+    type Label implements Node { id: ID! name: String! description: String color: String! isDefault: Boolean! }
+    type LabelConnection { nodes: [Label] pageInfo: PageInfo! totalCount: Int! }
+    type UserConnection { nodes: [User] pageInfo: PageInfo! totalCount: Int! }
+    type ReviewRequest implements Node { id: ID! requestedReviewer: RequestedReviewer }
+    type ReviewRequestConnection { nodes: [ReviewRequest] pageInfo: PageInfo! totalCount: Int! }
+    type Milestone implements Node {
+        id: ID! number: Int! title: String! description: String state: MilestoneState! dueOn: DateTime createdAt: DateTime!
+        updatedAt: DateTime! closedAt: DateTime url: URI! creator: Actor
+    }
+    type AutoMergeRequest { enabledBy: Actor mergeMethod: PullRequestMergeMethod! commitHeadline: String commitBody: String }
+
+    type GitActor { avatarUrl(size: Int): URI! date: GitTimestamp email: String name: String user: User }
+    type Tree implements Node { id: ID! oid: GitObjectID! }
+    type CommitCommentConnection { pageInfo: PageInfo! totalCount: Int! }
+    type CommitConnection { nodes: [Commit] pageInfo: PageInfo! totalCount: Int! }
+    type Commit implements Node {
+        id: ID! oid: GitObjectID! url: URI! message: String! author: GitActor committer: GitActor tree: Tree!
+        comments(first: Int, after: String): CommitCommentConnection! signature: GitSignature
+        parents(first: Int, after: String): CommitConnection!
+    }
+    type PullRequestCommit implements Node { id: ID! commit: Commit! }
+    type PullRequestCommitConnection { nodes: [PullRequestCommit] pageInfo: PageInfo! totalCount: Int! }
+
+    type ReactorConnection { totalCount: Int! }
+    type ReactionGroup { content: ReactionContent! reactors(first: Int, after: String): ReactorConnection! }
+    type PullRequestReview implements Node {
+        id: ID! databaseId: Int body: String! bodyHTML: HTML! bodyText: String! state: PullRequestReviewState! submittedAt: DateTime
+        url: URI! authorAssociation: CommentAuthorAssociation! author: Actor commit: Commit
+    }
+    type PullRequestReviewConnection { nodes: [PullRequestReview] pageInfo: PageInfo! totalCount: Int! }
+    type PullRequestReviewComment implements Node {
+        id: ID! databaseId: Int body: String! bodyHTML: HTML! bodyText: String! path: String! diffHunk: String! position: Int
+        originalPosition: Int! line: Int originalLine: Int startLine: Int originalStartLine: Int createdAt: DateTime!
+        updatedAt: DateTime! url: URI! authorAssociation: CommentAuthorAssociation! author: Actor commit: Commit
+        originalCommit: Commit replyTo: PullRequestReviewComment pullRequestReview: PullRequestReview reactionGroups: [ReactionGroup!]
+    }
+    type PullRequestReviewCommentConnection { nodes: [PullRequestReviewComment] pageInfo: PageInfo! totalCount: Int! }
+    type PullRequestReviewThread implements Node {
+        id: ID! diffSide: DiffSide! startDiffSide: DiffSide comments(first: Int, after: String): PullRequestReviewCommentConnection!
+    }
+    type PullRequestReviewThreadConnection { nodes: [PullRequestReviewThread] pageInfo: PageInfo! totalCount: Int! }
+
+    type PullRequest implements Node {
+        id: ID! databaseId: Int number: Int! state: PullRequestState! locked: Boolean! title: String! body: String! url: URI!
+        isDraft: Boolean! createdAt: DateTime! updatedAt: DateTime! closedAt: DateTime mergedAt: DateTime
+        authorAssociation: CommentAuthorAssociation! activeLockReason: LockReason author: Actor mergeCommit: Commit
+        headRefName: String! headRefOid: GitObjectID! headRepositoryOwner: RepositoryOwner baseRefName: String!
+        baseRefOid: GitObjectID! baseRepository: Repository labels(first: Int, after: String): LabelConnection
+        assignees(first: Int, after: String): UserConnection! milestone: Milestone
+        reviewRequests(first: Int, after: String): ReviewRequestConnection autoMergeRequest: AutoMergeRequest
+        reviews(first: Int, after: String): PullRequestReviewConnection
+        reviewThreads(first: Int, after: String): PullRequestReviewThreadConnection!
+        commits(first: Int, after: String): PullRequestCommitConnection!
+    }
+    type PullRequestConnection { nodes: [PullRequest] pageInfo: PageInfo! totalCount: Int! }
+    type Repository implements Node {
+        id: ID! owner: RepositoryOwner! pullRequests(first: Int, after: String, orderBy: IssueOrder): PullRequestConnection!
+    }
+
+    type Query { node(id: ID!): Node repository(owner: String!, name: String!): Repository }
+''')
+
+def get_connection(nodes, end_cursor = None):
+    """Return a GraphQL connection with the given nodes, and a next page if `end_cursor` is given."""
+    return {"pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor}, "nodes": nodes}
+
+def get_pull_request(number, updated_at, reviews):
+    """Return a pull request node with the given reviews connection."""
+    return {
+        "id": "PR_{}".format(number), "databaseId": number * 10, "number": number, "state": "MERGED",
+        "url": "https://github.com/org/repo/pull/{}".format(number),
+        "createdAt": "2021-01-01T00:00:00Z", "updatedAt": updated_at,
+        "author": {"__typename": "Bot", "login": "dependabot", "id": "BOT_1", "databaseId": 1},
+        "labels": get_connection([]), "assignees": get_connection([]), "reviewRequests": get_connection([]),
+        "reviews": reviews,
+    }
+
+def get_review(review_id, submitted_at):
+    """Return a review node."""
+    return {"id": "R_{}".format(review_id), "databaseId": review_id, "state": "APPROVED", "submittedAt": submitted_at}
+
+def get_response(status_code, response_json):
+    """Return a response of the GraphQL API."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers['X-RateLimit-Remaining'] = '100'
+    response._content = json.dumps(response_json).encode()
+    return response
+
+class TestGraphQLQuery(unittest.TestCase):
+    """
+    Test the queries and the mapping of the GraphQL nodes to the REST records.
+    """
+
+    def test_query_of_selected_children(self):
+        """Verify the query fetches only the connections of the selected children."""
+        query = graphql.get_pull_requests_query(['reviews'], 25)
+
+        self.assertIn("pullRequests(first: 25, after: $cursor, orderBy: {field: UPDATED_AT, direction: DESC})", query)
+        self.assertIn("reviews(first: 50)", query)
+        self.assertNotIn("reviewThreads", query)
+        self.assertNotIn("commits(", query)
+
+    @parameterized.expand([
+        ["github", "https://api.github.com", "https://api.github.com/graphql"],
+        ["enterprise", "https://github.example.com/api/v3", "https://github.example.com/api/graphql"],
+    ])
+    def test_graphql_url(self, name, base_url, expected_url):
+        """Verify the url of the GraphQL API for github and github enterprise."""
+        self.assertEqual(graphql.get_graphql_url(base_url), expected_url)
+
+    def test_pull_request_record(self):
+        """Verify the pull request node is mapped to the REST representation."""
+        record = graphql.to_pull_request(get_pull_request(1, "2021-01-02T00:00:00Z", None), "https://api.github.com", "org/repo")
+
+        self.assertEqual(record["id"], 10)
+        self.assertEqual(record["state"], "closed")
+        self.assertEqual(record["url"], "https://api.github.com/repos/org/repo/pulls/1")
+        self.assertEqual(record["user"]["login"], "dependabot[bot]")
+        self.assertEqual(record["user"]["type"], "Bot")
+
+    def test_pr_commit_dates_in_utc(self):
+        """Verify the dates of the author and the committer, which keep the offset of the commit, are converted to UTC."""
+        node = {"oid": "abc", "author": {"name": "a", "email": "a@example.com", "date": "2021-01-02T01:00:00+02:00"},
+                "committer": {"name": "c", "email": "c@example.com", "date": "2021-01-01T20:00:00-05:00"}, "parents": {"nodes": []}}
+
+        record = graphql.to_pr_commit(node, "https://api.github.com", "https://api.github.com/repos/org/repo")
+
+        self.assertEqual(record["commit"]["author"]["date"], "2021-01-01T23:00:00Z")
+        self.assertEqual(record["commit"]["committer"]["date"], "2021-01-02T01:00:00Z")
+
+class TestGraphQLSchema(unittest.TestCase):
+    """
+    Test the queries are valid against the schema of the GraphQL API.
+    """
+
+    @parameterized.expand([
+        ["no_children", []],
+        ["all_children", ["reviews", "review_comments", "pr_commits"]],
+    ])
+    def test_pull_requests_query(self, name, children):
+        """Verify the query of the pull requests and their children is valid."""
+        self.assertEqual(validate(SCHEMA, parse(graphql.get_pull_requests_query(children, 25))), [])
+
+    @parameterized.expand([
+        ["reviews", "PullRequest", "reviews", graphql.REVIEW_FIELDS],
+        ["review_threads", "PullRequest", "reviewThreads", graphql.get_review_thread_fields(graphql.MAX_PAGE_SIZE)],
+        ["pr_commits", "PullRequest", "commits", graphql.COMMIT_FIELDS],
+        ["review_comments", "PullRequestReviewThread", "comments", graphql.REVIEW_COMMENT_FIELDS],
+    ])
+    def test_nodes_query(self, name, type_name, field, selection):
+        """Verify the queries of the pages of the connections after the first one are valid."""
+        self.assertEqual(validate(SCHEMA, parse(graphql.get_nodes_query(type_name, field, selection))), [])
+
+@mock.patch("singer.write_record")
+@mock.patch("tap_github.streams.get_schema", return_value = {"schema": {}, "metadata": []})
+@mock.patch("tap_github.client.GithubClient.authed_graphql")
+class TestGraphQLPullRequests(unittest.TestCase):
+    """
+    Test the sync of the pull requests and their children over the GraphQL API.
+    """
+    config = {"access_token": "TOKEN", "graphql_pull_requests": "true"}
+
+    def test_sync_with_overflowing_reviews(self, mock_authed_graphql, mock_get_schema, mock_write_record):
+        """Verify the reviews beyond the first page are fetched with the id of the pull request."""
+        pull_requests = [get_pull_request(2, "2021-01-03T00:00:00Z", get_connection([get_review(1, "2021-01-03T00:00:00Z")], "cursor-1")),
+                         get_pull_request(1, "2021-01-02T00:00:00Z", get_connection([]))]
+        mock_authed_graphql.side_effect = [
+            {"repository": {"pullRequests": get_connection(pull_requests)}},
+            {"node": {"reviews": get_connection([get_review(2, "2021-01-03T00:00:00Z")])}},
+        ]
+
+        state = PullRequests().sync_endpoint(GithubClient(self.config), {}, {}, "org/repo", "2021-01-01T00:00:00Z",
+                                             ["pull_requests", "reviews"], ["pull_requests", "reviews"])
+
+        # Verify the second page of reviews is requested for the first pull request
+        self.assertEqual(mock_authed_graphql.call_args_list[1][0][2], {"id": "PR_2", "cursor": "cursor-1"})
+
+        written = [(call[0][0], call[0][1]["id"]) for call in mock_write_record.call_args_list]
+        self.assertEqual(written, [("pull_requests", 20), ("reviews", 1), ("reviews", 2), ("pull_requests", 10)])
+        self.assertEqual(mock_write_record.call_args_list[1][0][1]["pr_id"], 20)
+
+        self.assertEqual(state, {"bookmarks": {"org/repo": {"pull_requests": {"since": "2021-01-03T00:00:00Z"},
+                                                            "reviews": {"since": "2021-01-03T00:00:00Z"}}}})
+
+    def test_sync_stops_at_bookmark(self, mock_authed_graphql, mock_get_schema, mock_write_record):
+        """Verify the pages of pull requests updated before the bookmark are not fetched."""
+        mock_authed_graphql.side_effect = [
+            {"repository": {"pullRequests": get_connection([get_pull_request(2, "2021-01-03T00:00:00Z", None),
+                                                            get_pull_request(1, "2021-01-01T00:00:00Z", None)], "cursor-1")}},
+        ]
+        state = {"bookmarks": {"org/repo": {"pull_requests": {"since": "2021-01-02T00:00:00Z"}}}}
+
+        PullRequests().sync_endpoint(GithubClient(self.config), state, {}, "org/repo", "2020-01-01T00:00:00Z",
+                                     ["pull_requests"], ["pull_requests"])
+
+        self.assertEqual(mock_authed_graphql.call_count, 1)
+        self.assertEqual(mock_write_record.call_count, 1)
+
+@mock.patch("time.sleep")
+@mock.patch("requests.Session.request")
+class TestAuthedGraphQL(unittest.TestCase):
+    """
+    Test the errors of `GithubClient.authed_graphql`.
+    """
+
+    def test_rate_limited_retry(self, mocked_request, mocked_sleep):
+        """Verify a rate limited query is retried."""
+        mocked_request.side_effect = [get_response(200, {"errors": [{"type": "RATE_LIMITED", "message": "limited"}]}),
+                                      get_response(200, {"data": {"viewer": {"login": "user"}}})]
+
+        data = GithubClient({"access_token": "TOKEN"}).authed_graphql("", "query { viewer { login } }", {})
+
+        self.assertEqual(data, {"viewer": {"login": "user"}})
+        self.assertEqual(mocked_request.call_args[1]["method"], "post")
+        self.assertEqual(mocked_request.call_args[1]["url"], "https://api.github.com/graphql")
+
+    def test_query_error(self, mocked_request, mocked_sleep):
+        """Verify the errors of a query are raised."""
+        mocked_request.return_value = get_response(200, {"errors": [{"message": "Field 'foo' doesn't exist"}]})
+
+        with self.assertRaises(GraphQLError):
+            GithubClient({"access_token": "TOKEN"}).authed_graphql("", "query { foo }", {})
+
+    def test_not_found_skipped(self, mocked_request, mocked_sleep):
+        """Verify a not found repository is recorded as not accessible, as for a 404 error."""
+        mocked_request.return_value = get_response(200, {"data": {"repository": None},
+                                                         "errors": [{"type": "NOT_FOUND", "message": "Not found"}]})
+        test_client = GithubClient({"access_token": "TOKEN"})
+
+        data = test_client.authed_graphql("", "query { repository }", {}, stream="pull_requests")
+
+        self.assertEqual(data, {"repository": None})
+        self.assertEqual(test_client.not_accessible_repos, {"pull_requests"})
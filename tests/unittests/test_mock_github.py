@@ -0,0 +1,105 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import requests
+from tap_github.client import GithubClient
+from tap_github.streams import PullRequests, SyncContext
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from benchmarks.mock_github import MockGithub # pylint: disable=wrong-import-position
+
+START_DATE = "2021-01-01T00:00:00Z"
+
+class TestMockGithub(unittest.TestCase):
+    """
+    Test the tap against the local stand-in for the API of GitHub used by the benchmarks.
+    """
+
+    def setUp(self):
+        self.mock_github = MockGithub(orgs = 1, repos = 2, volumes = {"stargazers": 250, "pull_requests": 3, "reviews": 2})
+        self.base_url = self.mock_github.start()
+
+    def tearDown(self):
+        self.mock_github.stop()
+
+    def get_client(self, **config):
+        """Return a client of the stand-in server."""
+        return GithubClient(dict({"access_token": "TOKEN", "base_url": self.base_url}, **config))
+
+    def test_pagination(self):
+        """Verify the records of a listing are paginated with the `Link` header."""
+        client = self.get_client()
+
+        pages = list(client.authed_get_all_pages("stargazers", self.base_url + "/repos/org0/repo1/stargazers?per_page=100"))
+
+        self.assertEqual([len(response.json()) for response in pages], [100, 100, 50])
+        self.assertEqual(len({record["user"]["id"] for response in pages for record in response.json()}), 250)
+
+    def test_rate_limit_headers(self):
+        """Verify the budget of the token is decremented by each request."""
+        client = self.get_client()
+
+        first = client.authed_get("labels", self.base_url + "/repos/org0/repo0/labels")
+        second = client.authed_get("labels", self.base_url + "/repos/org0/repo0/labels")
+
+        self.assertEqual(int(first.headers["X-RateLimit-Remaining"]) - int(second.headers["X-RateLimit-Remaining"]), 1)
+
+    def test_rate_limit_exceeded(self):
+        """Verify a request beyond the budget of the token is rejected."""
+        self.mock_github.rate_limit = 1
+
+        first = requests.get(self.base_url + "/repos/org0/repo0/labels", headers = {"Authorization": "token OTHER"})
+        second = requests.get(self.base_url + "/repos/org0/repo0/labels", headers = {"Authorization": "token OTHER"})
+
+        self.assertEqual((first.status_code, first.headers["X-RateLimit-Remaining"]), (200, "0"))
+        self.assertEqual(second.status_code, 403)
+
+    def test_not_modified(self):
+        """Verify a conditional request of an unchanged listing is answered with a 304."""
+        cache_dir = tempfile.mkdtemp()
+        try:
+            client = self.get_client(etag_cache_path = os.path.join(cache_dir, "etags.db"))
+            url = self.base_url + "/repos/org0/repo0/labels"
+
+            first = client.authed_get("labels", url).json()
+            second = client.authed_get("labels", url).json()
+        finally:
+            shutil.rmtree(cache_dir)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_github.stats["not_modified"], 1)
+
+    def test_not_found(self):
+        """Verify an unknown repository is not found."""
+        client = self.get_client()
+
+        client.authed_get("labels", self.base_url + "/repos/org0/repo9/labels", stream = "labels")
+
+        self.assertEqual(client.not_accessible_repos, {"labels"})
+
+    @mock.patch("time.sleep")
+    def test_secondary_rate_limit(self, mock_sleep):
+        """Verify the injected secondary rate limits are retried by the tap."""
+        self.mock_github.secondary_rate_limit_rate = 0.5
+        client = self.get_client()
+
+        pages = list(client.authed_get_all_pages("stargazers", self.base_url + "/repos/org0/repo0/stargazers?per_page=100"))
+
+        self.assertEqual(sum(len(response.json()) for response in pages), 250)
+        self.assertGreater(self.mock_github.stats["secondary_rate_limits"], 0)
+
+    @mock.patch("tap_github.output.write_record")
+    def test_sync(self, mock_write_record):
+        """Verify the pull requests and their reviews are synced."""
+        context = SyncContext([{"tap_stream_id": stream, "schema": {}, "metadata": [{"breadcrumb": [], "metadata": {"selected": True}}]}
+                               for stream in ["pull_requests", "reviews"]], {})
+
+        state = PullRequests().sync_endpoint(self.get_client(), {}, context, "org0/repo0", START_DATE,
+                                             ["pull_requests", "reviews"], ["pull_requests", "reviews"])
+
+        streams = [call[0][0] for call in mock_write_record.call_args_list]
+        self.assertEqual((streams.count("pull_requests"), streams.count("reviews")), (3, 6))
+        self.assertEqual(state["bookmarks"]["org0/repo0"]["pull_requests"]["since"], "2022-01-01T00:02:00Z")
@@ -0,0 +1,145 @@
+import threading
+import unittest
+from unittest import mock
+from tap_github.client import GithubClient, set_query_param, get_page_number
+
+URL = "https://api.github.com/repos/org/repo/stargazers"
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, url, links = None):
+        self.url = url
+        self.links = {rel: {"url": link} for rel, link in (links or {}).items()}
+
+def get_authed_get(last_page, barrier = None, error_page = None):
+    """Return the mock of `authed_get` for a listing of numbered pages, waiting for the concurrent requests at the barrier."""
+    def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+        page = get_page_number(url) or 1
+        if barrier and page > 1:
+            barrier.wait()
+        if page == error_page:
+            raise RuntimeError("page {}".format(page))
+        links = {"last": set_query_param(url, "page", last_page)}
+        if page < last_page:
+            links["next"] = set_query_param(url, "page", page + 1)
+        return MockResponse(url, links)
+    return authed_get
+
+class TestQueryParams(unittest.TestCase):
+    """
+    Test the query parameters of the urls of the pages.
+    """
+
+    def test_set_query_param(self):
+        """Verify the parameter is added or replaced."""
+        self.assertEqual(set_query_param(URL + "?since=2022-01-01T00:00:00Z", "per_page", 100),
+                         URL + "?since=2022-01-01T00:00:00Z&per_page=100")
+        self.assertEqual(set_query_param(URL + "?per_page=100&page=2", "page", 5), URL + "?per_page=100&page=5")
+
+    def test_get_page_number(self):
+        """Verify the page number of a numbered page only."""
+        self.assertEqual(get_page_number(URL + "?per_page=100&page=40"), 40)
+        self.assertIsNone(get_page_number(URL + "?after=Y3Vyc29y"))
+        self.assertIsNone(get_page_number(None))
+
+@mock.patch("tap_github.client.GithubClient.authed_get")
+class TestParallelPages(unittest.TestCase):
+    """
+    Test the pages are fetched concurrently once the last page is known, if `parallel_pages` is set.
+    """
+
+    def test_concurrent_pages(self, mock_authed_get):
+        """Verify the remaining pages are fetched concurrently with the maximum page size, and yielded in order."""
+        mock_authed_get.side_effect = get_authed_get(4, barrier = threading.Barrier(3, timeout = 5))
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 3})
+
+        pages = list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+
+        self.assertEqual([response.url for response in pages],
+                         [URL + "?per_page=100"] + [URL + "?per_page=100&page={}".format(page) for page in range(2, 5)])
+
+    def test_new_pages(self, mock_authed_get):
+        """Verify the pages added to the listing while it is fetched are fetched from the `next` link of the last page."""
+        def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+            # The listing had 3 pages when the first page was fetched, and 4 pages since.
+            page = get_page_number(url) or 1
+            links = {"last": set_query_param(url, "page", 3 if page == 1 else 4)}
+            if page < 4:
+                links["next"] = set_query_param(url, "page", page + 1)
+            return MockResponse(url, links)
+        mock_authed_get.side_effect = authed_get
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 2})
+
+        pages = list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+
+        self.assertEqual([get_page_number(response.url) or 1 for response in pages], [1, 2, 3, 4])
+
+    def test_resumed_page(self, mock_authed_get):
+        """Verify the page size of a resumed page is kept, so the numbers of the next pages are offsets of the same size."""
+        mock_authed_get.side_effect = get_authed_get(5)
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 2})
+
+        pages = list(client.authed_get_all_pages_in_parallel("stargazers", URL + "?page=3", stream = "stargazers"))
+
+        self.assertEqual([response.url for response in pages], [URL + "?page=3", URL + "?page=4", URL + "?page=5"])
+
+    def test_read_ahead(self, mock_authed_get):
+        """Verify the pages are read ahead if `read_ahead_pages` is set."""
+        mock_authed_get.side_effect = get_authed_get(3)
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 2, "read_ahead_pages": 2})
+
+        with mock.patch.object(client, "read_ahead", side_effect = lambda pages, max_pages: pages) as mock_read_ahead:
+            pages = list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(mock_read_ahead.call_args[0][1], 2)
+
+    def test_cursor_pages(self, mock_authed_get):
+        """Verify the pages which are not numbered are fetched one after the other."""
+        mock_authed_get.side_effect = [MockResponse(URL, {"next": URL + "?after=a"}), MockResponse(URL + "?after=a")]
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 3})
+
+        pages = list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+
+        self.assertEqual([response.url for response in pages], [URL, URL + "?after=a"])
+
+    def test_error(self, mock_authed_get):
+        """Verify the error of a request is raised after the pages before it are yielded."""
+        mock_authed_get.side_effect = get_authed_get(5, error_page = 3)
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 2})
+        yielded_pages = []
+
+        with self.assertRaises(RuntimeError):
+            for response in client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"):
+                yielded_pages.append(get_page_number(response.url) or 1)
+
+        self.assertEqual(yielded_pages, [1, 2])
+
+    def test_shared_threads(self, mock_authed_get):
+        """Verify the listings share the threads of the client, which are stopped with the client."""
+        threads = set()
+        def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+            if get_page_number(url):
+                threads.add(threading.current_thread())
+            return get_authed_get(4)(source, url)
+        mock_authed_get.side_effect = authed_get
+        client = GithubClient({"access_token": "TOKEN", "parallel_pages": 2})
+
+        for _ in range(3):
+            list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+        client.__exit__(None, None, None)
+
+        self.assertLessEqual(len(threads), 2)
+        self.assertTrue(all(thread.name.startswith("tap-github-page") for thread in threads))
+        with self.assertRaises(RuntimeError):
+            client.page_executor.submit(print)
+
+    @mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+    def test_disabled(self, mock_authed_get_all_pages, mock_authed_get):
+        """Verify the pages are fetched one after the other by default."""
+        mock_authed_get_all_pages.return_value = iter([MockResponse(URL)])
+        client = GithubClient({"access_token": "TOKEN"})
+
+        list(client.authed_get_all_pages_in_parallel("stargazers", URL, stream = "stargazers"))
+
+        mock_authed_get_all_pages.assert_called_with("stargazers", URL, {}, stream = "stargazers")
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from tap_github.cache import PRHeadCache
+from tap_github.client import GithubClient
+from tap_github.streams import PullRequests
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, json_data):
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+def get_commit(sha):
+    """Return a commit of a pull request."""
+    return {"sha": sha, "commit": {"committer": {"date": "2022-01-02T00:00:00Z"}}}
+
+PULL_REQUEST = {"id": 10, "number": 1, "head": {"sha": "sha-3"}}
+START_DATE = "2022-01-01T00:00:00Z"
+STATE = {"bookmarks": {"org/repo": {"pr_commits": {"since": START_DATE}}}}
+
+@mock.patch("singer.write_record")
+@mock.patch("tap_github.streams.get_schema", return_value = {"schema": {}, "metadata": []})
+@mock.patch("tap_github.client.GithubClient.authed_get")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestPRCommitsCache(unittest.TestCase):
+    """
+    Test the sync of the commits of a pull request with the index of the pull request heads.
+    """
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.client = GithubClient({"access_token": "TOKEN", "pr_commits_cache_path": os.path.join(self.cache_dir, "pr_heads.db")})
+
+    def tearDown(self):
+        self.client.pr_head_cache.close()
+        shutil.rmtree(self.cache_dir)
+
+    def sync_pr_commits(self, state = STATE):
+        """Sync the commits of the pull request."""
+        return PullRequests().get_child_records(self.client, {}, "pr_commits", (1,), "org/repo", state, START_DATE,
+                                                None, ["pr_commits"], ["pr_commits"], parent_record = dict(PULL_REQUEST))
+
+    def test_not_indexed(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify all commits of a pull request which is not indexed are fetched and its head is indexed."""
+        mock_authed_all_pages.return_value = [MockResponse([get_commit("sha-1"), get_commit("sha-2"), get_commit("sha-3")])]
+
+        self.assertEqual(self.sync_pr_commits(), 3)
+
+        self.assertEqual(mock_write_record.call_count, 3)
+        self.assertEqual(self.client.pr_head_cache.get_head("org/repo", 1, START_DATE), ("sha-3", 3))
+
+    def test_unchanged_head(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify the commits are not fetched if the head of the pull request is unchanged."""
+        self.client.pr_head_cache.set_head("org/repo", 1, "sha-3", 3, START_DATE)
+
+        self.sync_pr_commits()
+
+        self.assertFalse(mock_authed_all_pages.called)
+        self.assertFalse(mock_authed_get.called)
+        self.assertFalse(mock_write_record.called)
+
+    def test_no_bookmark(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify the cache is ignored without a bookmark of the pr_commits, e.g. after a reset of the state."""
+        self.client.pr_head_cache.set_head("org/repo", 1, "sha-3", 3, START_DATE)
+        mock_authed_all_pages.return_value = [MockResponse([get_commit("sha-1"), get_commit("sha-2"), get_commit("sha-3")])]
+
+        self.assertEqual(self.sync_pr_commits({}), 3)
+        self.assertEqual(mock_write_record.call_count, 3)
+
+    def test_bookmark_before_cached_head(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify a head cached from a later bookmark is ignored, e.g. once the bookmark was moved back."""
+        self.client.pr_head_cache.set_head("org/repo", 1, "sha-3", 3, "2022-02-01T00:00:00Z")
+        mock_authed_all_pages.return_value = [MockResponse([get_commit("sha-1"), get_commit("sha-2"), get_commit("sha-3")])]
+
+        self.assertEqual(self.sync_pr_commits(), 3)
+        self.assertEqual(mock_write_record.call_count, 3)
+        self.assertEqual(self.client.pr_head_cache.get_head("org/repo", 1, START_DATE), ("sha-3", 3))
+
+    def test_head_moved_forward(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify only the new commits are fetched with the compare API if the head moved forward."""
+        self.client.pr_head_cache.set_head("org/repo", 1, "sha-1", 1, START_DATE)
+        mock_authed_get.return_value = MockResponse({"status": "ahead", "total_commits": 2, "commits": [get_commit("sha-2"), get_commit("sha-3")]})
+
+        self.assertEqual(self.sync_pr_commits(), 3)
+
+        mock_authed_get.assert_called_with("pr_commits", "https://api.github.com/repos/org/repo/compare/sha-1...sha-3",
+                                           stream = "pr_commits", should_skip_404 = False)
+        self.assertFalse(mock_authed_all_pages.called)
+        self.assertEqual([call[0][1]["id"] for call in mock_write_record.call_args_list], ["10-sha-2", "10-sha-3"])
+
+    def test_force_push(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify all commits are fetched if the head diverged from the cached head."""
+        self.client.pr_head_cache.set_head("org/repo", 1, "sha-0", 1, START_DATE)
+        mock_authed_get.return_value = MockResponse({"status": "diverged", "total_commits": 1, "commits": [get_commit("sha-3")]})
+        mock_authed_all_pages.return_value = [MockResponse([get_commit("sha-1"), get_commit("sha-3")])]
+
+        self.assertEqual(self.sync_pr_commits(), 2)
+        self.assertEqual(mock_write_record.call_count, 2)
+
+class TestPRHeadCache(unittest.TestCase):
+    """
+    Test the persistence of `PRHeadCache`.
+    """
+
+    def test_heads_saved_per_repo(self):
+        """Verify the heads are written to the disk only once saved for their repository."""
+        cache_dir = tempfile.mkdtemp()
+        path = os.path.join(cache_dir, "pr_heads.db")
+        cache = PRHeadCache(path)
+        cache.set_head("org/repo", 1, "sha-1", 1, START_DATE)
+        cache.set_head("org/other", 1, "sha-2", 2, START_DATE)
+        cache.save("org/repo")
+        cache.close()
+
+        cache = PRHeadCache(path)
+        self.assertEqual(cache.get_head("org/repo", 1, START_DATE), ("sha-1", 1))
+        self.assertIsNone(cache.get_head("org/other", 1, START_DATE))
+        cache.close()
+        shutil.rmtree(cache_dir)
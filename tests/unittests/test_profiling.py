@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from tap_github import profiling
+
+def busy(seconds):
+    """Keep the thread running for the given seconds."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+class TestProfileArg(unittest.TestCase):
+    """
+    Test the `--profile` option is removed from the arguments parsed by singer.
+    """
+
+    def test_directory(self):
+        """Verify the directory following the option is returned."""
+        argv = ["tap-github", "--profile", "out", "--config", "config.json"]
+
+        self.assertEqual(profiling.pop_profile_arg(argv), "out")
+        self.assertEqual(argv, ["tap-github", "--config", "config.json"])
+
+    def test_default_directory(self):
+        """Verify the default directory is returned when the option is followed by another option."""
+        argv = ["tap-github", "--profile", "--config", "config.json"]
+
+        self.assertEqual(profiling.pop_profile_arg(argv), profiling.DEFAULT_PROFILE_DIR)
+        self.assertEqual(argv, ["tap-github", "--config", "config.json"])
+
+    def test_no_option(self):
+        """Verify the run is not profiled without the option."""
+        argv = ["tap-github", "--config", "config.json"]
+
+        self.assertIsNone(profiling.pop_profile_arg(argv))
+        self.assertEqual(argv, ["tap-github", "--config", "config.json"])
+
+class TestProfiled(unittest.TestCase):
+    """
+    Test the samples and the memory are labelled with the repository and the stream, and written at the end of the run.
+    """
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.profile_dir)
+
+    def read(self, name):
+        """Return the content of a file of the profile."""
+        with open(os.path.join(self.profile_dir, name)) as profile_file:
+            return profile_file.read()
+
+    def test_labelled_samples(self):
+        """Verify the stacks are folded under the label of the thread, with the labels of the children first."""
+        with profiling.profiled(self.profile_dir, {"profile_interval": 0.001}):
+            with profiling.label("org/repo", "pull_requests"):
+                busy(0.1)
+                with profiling.label("org/repo", "reviews"):
+                    busy(0.1)
+
+        stacks = [line.rsplit(" ", 1)[0] for line in self.read("profile.folded").splitlines()]
+        self.assertTrue(any(stack.startswith("org/repo:pull_requests;") and "busy (test_profiling.py" in stack for stack in stacks))
+        self.assertTrue(any(stack.startswith("org/repo:reviews;") for stack in stacks))
+        self.assertIn("org/repo:reviews", self.read("summary.txt"))
+        self.assertIsNone(profiling.PROFILER)
+
+    def test_memory(self):
+        """Verify the peak of memory within a label includes the peak of its children."""
+        with profiling.profiled(self.profile_dir, {}):
+            profiler = profiling.PROFILER
+            with profiling.label("org/repo", "pull_requests"):
+                with profiling.label("org/repo", "reviews"):
+                    data = bytearray(10 * 1024 ** 2)
+                    del data
+
+        self.assertGreaterEqual(profiler.label_stats["org/repo:reviews"]["peak_bytes"], 10 * 1024 ** 2)
+        self.assertGreaterEqual(profiler.label_stats["org/repo:pull_requests"]["peak_bytes"], 10 * 1024 ** 2)
+        self.assertIn("Top allocations still held", self.read("summary.txt"))
+
+    def test_memory_without_reset_peak(self):
+        """Verify the memory is recorded by the labels before Python 3.9, which can't reset the peak."""
+        mock_tracemalloc = mock.Mock(spec = ["get_traced_memory"])
+        mock_tracemalloc.get_traced_memory.side_effect = [(100, 500), (300, 600)]
+        profiler = profiling.Profiler()
+
+        with mock.patch.object(profiling, "tracemalloc", mock_tracemalloc):
+            profiler.enter("org/repo:commits")
+            profiler.exit()
+
+        self.assertEqual(profiler.label_stats["org/repo:commits"], {"calls": 1, "peak_bytes": 600, "allocated_bytes": 200})
+
+    def test_memory_of_concurrent_repos(self):
+        """Verify the peak is not reset by the labels of concurrent repositories, and only the peak of the run is reported."""
+        with mock.patch.object(profiling.tracemalloc, "reset_peak", create=True) as mock_reset_peak:
+            with profiling.profiled(self.profile_dir, {"max_concurrent_repos": 2}):
+                profiler = profiling.PROFILER
+                with profiling.label("org/repo", "commits"):
+                    data = bytearray(10 * 1024 ** 2)
+                    del data
+
+        mock_reset_peak.assert_not_called()
+        self.assertEqual(profiler.label_stats["org/repo:commits"]["peak_bytes"], 0)
+        self.assertGreaterEqual(profiler.peak_bytes, 10 * 1024 ** 2)
+        summary = self.read("summary.txt")
+        self.assertIn("Peak of traced memory of the run", summary)
+        self.assertNotIn("Top labels by peak of traced memory", summary)
+
+    def test_memory_disabled(self):
+        """Verify the memory is not traced if `profile_memory` is disabled."""
+        with profiling.profiled(self.profile_dir, {"profile_memory": "false"}):
+            with profiling.label("org/repo", "commits"):
+                busy(0.02)
+
+        self.assertNotIn("traced memory", self.read("summary.txt"))
+
+    def test_written_on_error(self):
+        """Verify the profile is written even if the run failed."""
+        with self.assertRaises(RuntimeError):
+            with profiling.profiled(self.profile_dir, {}):
+                raise RuntimeError("failed")
+
+        self.assertTrue(os.path.exists(os.path.join(self.profile_dir, "profile.folded")))
+
+    def test_not_profiled(self):
+        """Verify the labels are ignored when the run is not profiled."""
+        with profiling.profiled(None, {}):
+            with profiling.label("org/repo", "commits"):
+                self.assertIsNone(profiling.PROFILER)
@@ -0,0 +1,124 @@
+import time
+import unittest
+from unittest import mock
+from tap_github.client import GithubClient
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, page, next_url = None):
+        self.page = page
+        self.links = {"next": {"url": next_url}} if next_url else {}
+
+def get_authed_get(page_count, error_page = None):
+    """Return the mock of `authed_get` for the pages `https://api.github.com/page<n>`."""
+    def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+        page = int(url.rsplit("page", 1)[1])
+        if page == error_page:
+            raise RuntimeError("page {}".format(page))
+        next_url = "https://api.github.com/page{}".format(page + 1) if page < page_count else None
+        return MockResponse(page, next_url)
+    return authed_get
+
+def wait_for_calls(mock_authed_get, call_count):
+    """Wait until the background thread made the given number of requests."""
+    deadline = time.monotonic() + 5
+    while mock_authed_get.call_count < call_count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+@mock.patch("tap_github.client.GithubClient.authed_get")
+class TestReadAhead(unittest.TestCase):
+    """
+    Test the pages are fetched ahead by a background thread if `read_ahead_pages` is set.
+    """
+
+    def test_same_pages(self, mock_authed_get):
+        """Verify all the pages are yielded in order."""
+        mock_authed_get.side_effect = get_authed_get(5)
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 2})
+
+        pages = client.authed_get_all_pages("commits", "https://api.github.com/page1")
+
+        self.assertEqual([response.page for response in pages], [1, 2, 3, 4, 5])
+
+    def test_bounded_read_ahead(self, mock_authed_get):
+        """Verify the pages are fetched ahead of the page being processed, up to the number of pages to read ahead."""
+        mock_authed_get.side_effect = get_authed_get(10)
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 2})
+
+        pages = client.authed_get_all_pages("commits", "https://api.github.com/page1")
+        self.assertEqual(next(pages).page, 1)
+        wait_for_calls(mock_authed_get, 4)
+        time.sleep(0.05)
+
+        # The first page, 2 buffered pages and the page waiting for the buffer.
+        self.assertEqual(mock_authed_get.call_count, 4)
+        pages.close()
+
+    def test_stopped(self, mock_authed_get):
+        """Verify no more pages are fetched once the caller stopped reading the pages."""
+        mock_authed_get.side_effect = get_authed_get(100)
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 1})
+
+        pages = client.authed_get_all_pages("commits", "https://api.github.com/page1")
+        next(pages)
+        pages.close()
+        time.sleep(1.5)
+        call_count = mock_authed_get.call_count
+        time.sleep(0.05)
+
+        self.assertLessEqual(call_count, 4)
+        self.assertEqual(mock_authed_get.call_count, call_count)
+
+    def test_error(self, mock_authed_get):
+        """Verify the error of a request is raised after the pages before it are yielded."""
+        mock_authed_get.side_effect = get_authed_get(5, error_page = 3)
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 2})
+        yielded_pages = []
+
+        with self.assertRaises(RuntimeError):
+            for response in client.authed_get_all_pages("commits", "https://api.github.com/page1"):
+                yielded_pages.append(response.page)
+
+        self.assertEqual(yielded_pages, [1, 2])
+
+    def test_not_accessible_stream(self, mock_authed_get):
+        """Verify a stream found not accessible by the background thread is reported to the thread of the caller."""
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 2})
+        def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+            client.not_accessible_repos.add(stream)
+            return MockResponse(1)
+        mock_authed_get.side_effect = authed_get
+
+        list(client.authed_get_all_pages("commits", "https://api.github.com/page1", stream = "commits"))
+
+        self.assertEqual(client.not_accessible_repos, {"commits"})
+
+    def test_session_closed(self, mock_authed_get):
+        """Verify the session of the background thread is closed once the pages are fetched."""
+        client = GithubClient({"access_token": "TOKEN", "read_ahead_pages": 2})
+        sessions = []
+        def authed_get(source, url, headers = {}, stream = "", should_skip_404 = True):
+            sessions.append(client.session)
+            return get_authed_get(3)(source, url)
+        mock_authed_get.side_effect = authed_get
+
+        with mock.patch("requests.Session.close") as mock_close:
+            list(client.authed_get_all_pages("commits", "https://api.github.com/page1"))
+            deadline = time.monotonic() + 5
+            while sessions[0] in client.sessions and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(len(set(sessions)), 1)
+        self.assertNotIn(sessions[0], client.sessions)
+        self.assertEqual(mock_close.call_count, 1)
+
+    def test_disabled(self, mock_authed_get):
+        """Verify the pages are fetched by the caller by default."""
+        mock_authed_get.side_effect = get_authed_get(3)
+        client = GithubClient({"access_token": "TOKEN"})
+
+        pages = client.authed_get_all_pages("commits", "https://api.github.com/page1")
+        next(pages)
+        time.sleep(0.05)
+
+        self.assertEqual(mock_authed_get.call_count, 1)
@@ -0,0 +1,133 @@
+import unittest
+from unittest import mock
+from parameterized import parameterized
+from tap_github.client import GithubClient
+from tap_github.sync import get_idle_streams, translate_state, sync
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, json_data):
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+def get_activity(pushed_at, archived = False):
+    """Return the activity of a repository."""
+    return {"pushed_at": pushed_at, "updated_at": "2022-01-01T00:00:00Z", "archived": archived}
+
+def get_stream_catalog(stream_name, is_selected = False):
+    """Return catalog for stream"""
+    return {"schema": {}, "tap_stream_id": stream_name, "key_properties": [],
+            "metadata": [{"breadcrumb": [], "metadata": {"selected": is_selected}}]}
+
+class TestIdleStreams(unittest.TestCase):
+    """
+    Test the streams skipped for the repositories without any change.
+    """
+    streams_to_sync = {"commits", "issues", "stargazers"}
+    repo_bookmarks = {stream: {"since": "2022-01-01T00:00:00Z"} for stream in streams_to_sync}
+
+    @parameterized.expand([
+        ["never_synced", None, get_activity("2022-01-02T00:00:00Z"), set()],
+        ["not_listed", get_activity("2022-01-02T00:00:00Z"), None, set()],
+        ["pushed", get_activity("2022-01-01T00:00:00Z"), get_activity("2022-01-02T00:00:00Z"), set()],
+        ["not_pushed", get_activity("2022-01-02T00:00:00Z"), get_activity("2022-01-02T00:00:00Z"), {"commits"}],
+        ["archived_since_last_sync", get_activity("2022-01-02T00:00:00Z"), get_activity("2022-01-02T00:00:00Z", True), {"commits"}],
+        ["frozen", get_activity("2022-01-02T00:00:00Z", True), get_activity("2022-01-02T00:00:00Z", True), {"commits", "issues", "stargazers"}],
+    ])
+    def test_idle_streams(self, name, saved_activity, activity, expected_streams):
+        """Verify the idle streams for the saved and current activity of the repository."""
+        self.assertEqual(get_idle_streams(saved_activity, activity, self.streams_to_sync, self.repo_bookmarks), expected_streams)
+
+    @parameterized.expand([
+        ["not_pushed", get_activity("2022-01-02T00:00:00Z"), set()],
+        ["frozen", get_activity("2022-01-02T00:00:00Z", True), {"issues"}],
+    ])
+    def test_streams_without_bookmark(self, name, activity, expected_streams):
+        """Verify the streams without a bookmark for the repository, e.g. newly selected, are not idle."""
+        repo_bookmarks = {"issues": {"since": "2022-01-01T00:00:00Z"}}
+
+        self.assertEqual(get_idle_streams(activity, activity, self.streams_to_sync, repo_bookmarks), expected_streams)
+
+    def test_activity_kept_by_translate_state(self):
+        """Verify the activity is kept when the state has no bookmarks."""
+        state = {"repo_activity": {"org/repo": get_activity("2022-01-02T00:00:00Z")}}
+
+        new_state = translate_state(state, {"streams": [get_stream_catalog("stargazers")]}, ["org/repo"])
+
+        self.assertEqual(new_state["repo_activity"], state["repo_activity"])
+
+@mock.patch("tap_github.sync.do_sync")
+class TestChangeDetectionSync(unittest.TestCase):
+    """
+    Test the sync of the repositories with the change detection.
+    """
+
+    def get_client(self, config):
+        """Return a mocked client which listed an idle archived repository and a pushed repository."""
+        client = mock.Mock()
+        client.config = config
+        client.extract_repos_from_config.return_value = (["org/archived", "org/pushed"], set())
+        client.not_accessible_repos = set()
+        client.repo_activity = {"org/archived": get_activity("2022-01-01T00:00:00Z", True),
+                                "org/pushed": get_activity("2022-01-03T00:00:00Z")}
+        return client
+
+    def get_state(self):
+        """Return the state saved at the end of the last sync."""
+        return {"bookmarks": {"org/archived": {"commits": {"since": "2022-01-01T00:00:00Z"}},
+                              "org/pushed": {"commits": {"since": "2022-01-01T00:00:00Z"}}},
+                "repo_activity": {"org/archived": get_activity("2022-01-01T00:00:00Z", True),
+                                  "org/pushed": get_activity("2022-01-02T00:00:00Z")}}
+
+    @mock.patch("tap_github.output.write_state")
+    def test_idle_repository_skipped(self, mock_write_state, mock_do_sync):
+        """Verify the streams of the frozen repository are skipped and the activity of the synced repositories is saved."""
+        client = self.get_client({"repo_change_detection": "true"})
+        catalog = {"streams": [get_stream_catalog("commits", True)]}
+
+        sync(client, {"start_date": "2021-01-01T00:00:00Z"}, self.get_state(), catalog)
+
+        self.assertEqual([(call[0][1], call[0][6]) for call in mock_do_sync.call_args_list],
+                         [(set(), "org/archived"), ({"commits"}, "org/pushed")])
+        self.assertEqual(mock_write_state.call_args[0][0]["repo_activity"]["org/pushed"], get_activity("2022-01-03T00:00:00Z"))
+
+    @mock.patch("tap_github.output.write_state")
+    def test_disabled_by_default(self, mock_write_state, mock_do_sync):
+        """Verify all streams are synced without `repo_change_detection` in the config."""
+        client = self.get_client({})
+        catalog = {"streams": [get_stream_catalog("commits", True)]}
+
+        sync(client, {"start_date": "2021-01-01T00:00:00Z"}, self.get_state(), catalog)
+
+        self.assertEqual([call[0][1] for call in mock_do_sync.call_args_list], [{"commits"}, {"commits"}])
+
+    @mock.patch("tap_github.output.write_state")
+    def test_concurrent_sync(self, mock_write_state, mock_do_sync):
+        """Verify the idle streams are skipped and the activity is saved when the repositories are synced concurrently."""
+        client = self.get_client({"repo_change_detection": "true", "max_concurrent_repos": 2})
+        catalog = {"streams": [get_stream_catalog("commits", True)]}
+
+        sync(client, {"start_date": "2021-01-01T00:00:00Z", "max_concurrent_repos": 2}, self.get_state(), catalog)
+
+        synced_streams = {call[0][6]: call[0][1] for call in mock_do_sync.call_args_list}
+        self.assertEqual(synced_streams, {"org/archived": set(), "org/pushed": {"commits"}})
+        self.assertEqual(mock_write_state.call_args[0][0]["repo_activity"]["org/pushed"], get_activity("2022-01-03T00:00:00Z"))
+
+@mock.patch("tap_github.client.GithubClient.verify_repo_access")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestRepoActivity(unittest.TestCase):
+    """
+    Test the activity of the repositories listed by `get_all_repos`.
+    """
+
+    def test_activity_collected(self, mocked_authed_get_all_pages, mocked_verify_repo_access):
+        """Verify the activity of each repository of the organization is collected."""
+        mocked_authed_get_all_pages.return_value = [MockResponse([
+            {"full_name": "org/repo", "pushed_at": "2022-01-02T00:00:00Z", "updated_at": "2022-01-01T00:00:00Z", "archived": True}])]
+        test_client = GithubClient({"access_token": "TOKEN"})
+
+        test_client.get_all_repos(["org/*"])
+
+        self.assertEqual(test_client.repo_activity, {"org/repo": get_activity("2022-01-02T00:00:00Z", True)})
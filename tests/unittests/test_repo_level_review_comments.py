@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+from tap_github.client import GithubClient
+from tap_github.streams import ReviewComments, PullRequestIndex
+from tap_github.sync import get_stream_to_sync, get_repo_level_streams, do_sync
+
+class MockResponse():
+    """Mock response object class."""
+    def __init__(self, json_data):
+        self.json_data = json_data
+
+    def json(self):
+        return self.json_data
+
+def get_stream_catalog(stream_name, is_selected = False):
+    """Return catalog for stream"""
+    return {"schema": {}, "tap_stream_id": stream_name, "key_properties": [],
+            "metadata": [{"breadcrumb": [], "metadata": {"selected": is_selected}}]}
+
+def get_review_comment(comment_id, pr_number, updated_at):
+    """Return a review comment of the repository level listing."""
+    return {"id": comment_id, "updated_at": updated_at,
+            "pull_request_url": "https://api.github.com/repos/org/repo/pulls/{}".format(pr_number)}
+
+class TestRepoLevelStreams(unittest.TestCase):
+    """
+    Test the selection of the streams synced at the repository level.
+    """
+
+    def test_disabled_by_default(self):
+        """Verify no stream is synced at the repository level without the config."""
+        self.assertEqual(get_repo_level_streams({}), [])
+
+    def test_parent_not_synced(self):
+        """Verify the pull requests are not synced if only the repository level review comments are selected."""
+        catalog = {"streams": [get_stream_catalog("pull_requests"), get_stream_catalog("review_comments", True)]}
+
+        self.assertEqual(get_stream_to_sync(catalog, ["review_comments"]), ["review_comments"])
+        self.assertEqual(get_stream_to_sync(catalog), ["pull_requests", "review_comments"])
+
+    @mock.patch("tap_github.sync.write_schemas")
+    @mock.patch("tap_github.streams.ReviewComments.sync_endpoint")
+    @mock.patch("tap_github.streams.PullRequests.sync_endpoint")
+    def test_review_comments_not_synced_with_parent(self, mock_pull_requests, mock_review_comments, mock_write_schemas):
+        """Verify the review comments are synced on their own and not as a child of the pull requests."""
+        client = mock.Mock()
+        client.config = {"review_comments_repo_level": "true"}
+        catalog = {"streams": []}
+
+        do_sync(catalog, ["pull_requests", "review_comments"], ["pull_requests", "review_comments"], client, "", {}, "org/repo",
+                write_state=mock.Mock())
+
+        self.assertEqual(mock_pull_requests.call_args[1]["stream_to_sync"], ["pull_requests"])
+        self.assertEqual(mock_pull_requests.call_args[1]["selected_stream_ids"], ["pull_requests"])
+        self.assertEqual(mock_review_comments.call_args[1]["stream_to_sync"], ["pull_requests", "review_comments"])
+
+@mock.patch("singer.write_record")
+@mock.patch("tap_github.streams.get_schema", return_value = {"schema": {}, "metadata": []})
+@mock.patch("tap_github.client.GithubClient.authed_get")
+@mock.patch("tap_github.client.GithubClient.authed_get_all_pages")
+class TestRepoLevelReviewComments(unittest.TestCase):
+    """
+    Test the sync of the review comments from the repository level endpoint.
+    """
+    config = {"access_token": "TOKEN", "review_comments_repo_level": "true"}
+
+    def test_sync_with_pr_id(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify the review comments are listed since the bookmark and the `pr_id` is resolved from the pull requests listing."""
+        comments = [get_review_comment(1, 2, "2022-01-03T00:00:00Z"), get_review_comment(2, 1, "2022-01-02T00:00:00Z")]
+        pull_requests = [MockResponse([{"number": 2, "id": 20}]), MockResponse([{"number": 1, "id": 10}]), MockResponse([{"number": 0, "id": 0}])]
+        pages_fetched = []
+
+        def authed_get_all_pages(source, url, headers = {}, stream = ""):
+            if stream == "review_comments":
+                yield MockResponse(comments)
+            else:
+                for page in pull_requests:
+                    pages_fetched.append(page)
+                    yield page
+        mock_authed_all_pages.side_effect = authed_get_all_pages
+        state = {"bookmarks": {"org/repo": {"review_comments": {"since": "2022-01-01T00:00:00Z"}}}}
+
+        ReviewComments().sync_endpoint(GithubClient(self.config), state, {}, "org/repo", "2021-01-01T00:00:00Z",
+                                       ["review_comments"], ["review_comments"])
+
+        self.assertEqual(mock_authed_all_pages.call_args_list[0][0][1],
+                         "https://api.github.com/repos/org/repo/pulls/comments?sort=updated&direction=desc&since=2022-01-01T00:00:00Z")
+        self.assertEqual([call[0][1]["pr_id"] for call in mock_write_record.call_args_list], [20, 10])
+
+        # Verify the pull requests are listed only until the pull requests of the comments are found
+        self.assertEqual(len(pages_fetched), 2)
+        self.assertFalse(mock_authed_get.called)
+
+    def test_unlisted_pull_request(self, mock_authed_all_pages, mock_authed_get, mock_get_schema, mock_write_record):
+        """Verify the pull request is requested if it is not in the listing."""
+        mock_authed_all_pages.return_value = iter([MockResponse([{"number": 2, "id": 20}])])
+        mock_authed_get.return_value = MockResponse({"number": 5, "id": 50})
+
+        pull_request_index = PullRequestIndex(GithubClient(self.config), "org/repo")
+
+        self.assertEqual(pull_request_index.get_id(5), 50)
+        mock_authed_get.assert_called_with("pull_requests", "https://api.github.com/repos/org/repo/pulls/5", stream = "pull_requests")
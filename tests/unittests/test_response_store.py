@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import requests_mock
+from tap_github.client import GithubClient, GithubException
+
+FIRST_PAGE = "https://api.github.com/repos/org/repo/stargazers"
+SECOND_PAGE = "https://api.github.com/repos/org/repo/stargazers?page=2"
+NOT_FOUND = "https://api.github.com/repos/org/repo/collaborators"
+RATE_LIMIT_HEADERS = {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "0"}
+
+def register_pages(mocker, user_id = 1):
+    """Register 2 pages of stargazers and a not accessible listing."""
+    mocker.get(FIRST_PAGE, json=[{"user": {"id": user_id}}],
+               headers=dict(RATE_LIMIT_HEADERS, Link='<{}>; rel="next"'.format(SECOND_PAGE)))
+    mocker.get(SECOND_PAGE, json=[{"user": {"id": user_id + 1}}], headers=RATE_LIMIT_HEADERS)
+    mocker.get(NOT_FOUND, status_code=404, json={"message": "Not Found"}, headers=RATE_LIMIT_HEADERS)
+
+@mock.patch("time.sleep")
+class TestResponseStore(unittest.TestCase):
+    """
+    Test the responses of `GithubClient` are recorded and replayed with the response store.
+    """
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.store_dir, "responses.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def get_client(self, mode):
+        """Return a client with the response store in the mode."""
+        return GithubClient({"access_token": "TOKEN", "response_store_path": self.store_path, "response_store_mode": mode})
+
+    def test_replay(self, mock_sleep):
+        """Verify the recorded pages are replayed without any request."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            recorded_pages = [response.json() for response in self.get_client("record").authed_get_all_pages("stargazers", FIRST_PAGE)]
+
+        with requests_mock.Mocker() as mocker:
+            replayed_pages = [response.json() for response in self.get_client("replay").authed_get_all_pages("stargazers", FIRST_PAGE)]
+
+            self.assertEqual(mocker.call_count, 0)
+        self.assertEqual(replayed_pages, recorded_pages)
+        self.assertEqual(replayed_pages, [[{"user": {"id": 1}}], [{"user": {"id": 2}}]])
+
+    def test_replay_not_found(self, mock_sleep):
+        """Verify a recorded 404 response is replayed as a not accessible stream."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            self.get_client("record").authed_get("collaborators", NOT_FOUND, stream="collaborators")
+
+        client = self.get_client("replay")
+        response = client.authed_get("collaborators", NOT_FOUND, stream="collaborators")
+
+        self.assertEqual(response.json(), {})
+        self.assertEqual(client.not_accessible_repos, {"collaborators"})
+
+    def test_replay_not_recorded(self, mock_sleep):
+        """Verify a request which was not recorded is an error when the store is replayed."""
+        with requests_mock.Mocker() as mocker:
+            with self.assertRaises(GithubException):
+                self.get_client("replay").authed_get("stargazers", FIRST_PAGE)
+
+            self.assertEqual(mocker.call_count, 0)
+
+    def test_record(self, mock_sleep):
+        """Verify every response is requested and stored again when the store is recorded."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            self.get_client("record").authed_get("stargazers", FIRST_PAGE)
+
+            register_pages(mocker, user_id = 10)
+            response = self.get_client("record").authed_get("stargazers", FIRST_PAGE)
+
+            self.assertEqual(mocker.call_count, 2)
+        self.assertEqual(response.json(), [{"user": {"id": 10}}])
+        self.assertEqual(self.get_client("replay").authed_get("stargazers", FIRST_PAGE).json(), [{"user": {"id": 10}}])
+
+    def test_refresh(self, mock_sleep):
+        """Verify every response is requested and stored again when the store is refreshed, as when it is recorded."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            self.get_client("record").authed_get("stargazers", FIRST_PAGE)
+
+            register_pages(mocker, user_id = 10)
+            self.get_client("refresh").authed_get("stargazers", FIRST_PAGE)
+
+            self.assertEqual(mocker.call_count, 2)
+        self.assertEqual(self.get_client("replay").authed_get("stargazers", FIRST_PAGE).json(), [{"user": {"id": 10}}])
+
+    def test_record_missing(self, mock_sleep):
+        """Verify the recorded responses are served, and only the other ones are requested."""
+        with requests_mock.Mocker() as mocker:
+            register_pages(mocker)
+            self.get_client("record").authed_get("stargazers", FIRST_PAGE)
+
+            register_pages(mocker, user_id = 10)
+            pages = [response.json() for response in self.get_client("record_missing").authed_get_all_pages("stargazers", FIRST_PAGE)]
+
+            self.assertEqual([request.url for request in mocker.request_history], [FIRST_PAGE, SECOND_PAGE])
+        self.assertEqual(pages, [[{"user": {"id": 1}}], [{"user": {"id": 11}}]])
+
+    def test_invalid_mode(self, mock_sleep):
+        """Verify an unknown mode is rejected."""
+        with self.assertRaises(ValueError):
+            self.get_client("replace")
@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+import requests
+from parameterized import parameterized
+from tap_github.client import GithubClient, SecondaryRateLimitExceeded, AuthException, TooManyRequests, raise_for_error
+from tap_github.rate_limit import SecondaryRateLimitCoolDown
+
+def get_response(status_code, json=None, headers=None):
+    """Return a mocked response with the given status code, json and headers."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(dict({'X-RateLimit-Remaining': '100'}, **(headers or {})))
+    response._content = str(json or {}).replace("'", '"').encode()
+    return response
+
+class TestSecondaryRateLimitError(unittest.TestCase):
+    """
+    Test the detection of secondary rate limit errors in `raise_for_error`.
+    """
+
+    @parameterized.expand([
+        ["403_retry_after", 403, {}, {'Retry-After': '30'}, 30],
+        ["429_retry_after", 429, {}, {'Retry-After': '5'}, 5],
+        ["403_secondary_message", 403, {'message': 'You have exceeded a secondary rate limit.'}, {}, 60],
+        ["403_abuse_message", 403, {'message': 'You have triggered an abuse detection mechanism.'}, {}, 60],
+    ])
+    def test_secondary_rate_limit(self, name, status_code, json, headers, expected_retry_after):
+        """Verify a secondary rate limit error is raised with the seconds to wait."""
+        with self.assertRaises(SecondaryRateLimitExceeded) as e:
+            raise_for_error(get_response(status_code, json, headers), "", "", mock.Mock(), True)
+
+        self.assertEqual(e.exception.retry_after, expected_retry_after)
+
+    @parameterized.expand([
+        ["403", 403, AuthException],
+        ["429", 429, TooManyRequests],
+    ])
+    def test_other_errors(self, name, status_code, expected_exception):
+        """Verify 403 and 429 errors without `Retry-After` or secondary rate limit message keep their exception."""
+        with self.assertRaises(expected_exception):
+            raise_for_error(get_response(status_code, {'message': 'error'}), "", "", mock.Mock(), True)
+
+@mock.patch("time.time", return_value=1000)
+class TestSecondaryRateLimitCoolDown(unittest.TestCase):
+    """
+    Test the request slots of `SecondaryRateLimitCoolDown`.
+    """
+
+    def test_no_delay_by_default(self, mock_time):
+        """Verify the requests are not delayed without secondary rate limit error."""
+        cool_down = SecondaryRateLimitCoolDown(cool_down_seconds=300)
+
+        self.assertEqual([cool_down.get_delay() for _ in range(3)], [0, 0, 0])
+
+    def test_delay_during_cool_down(self, mock_time):
+        """Verify the requests wait for `Retry-After` and are then spaced by the request interval."""
+        cool_down = SecondaryRateLimitCoolDown(cool_down_seconds=300, request_interval=1)
+        cool_down.trigger(10)
+
+        self.assertEqual([cool_down.get_delay() for _ in range(3)], [10, 11, 12])
+
+    def test_no_delay_after_cool_down(self, mock_time):
+        """Verify the requests are not delayed once the cool down is over."""
+        cool_down = SecondaryRateLimitCoolDown(cool_down_seconds=300)
+        cool_down.trigger(10)
+        mock_time.return_value = 1000 + 10 + 300
+
+        self.assertEqual(cool_down.get_delay(), 0)
+
+@mock.patch("time.sleep")
+@mock.patch("requests.Session.request")
+class TestSecondaryRateLimitRetry(unittest.TestCase):
+    """
+    Test the retry of `GithubClient.authed_get` after a secondary rate limit error.
+    """
+
+    def test_retry_after_wait(self, mocked_request, mocked_sleep):
+        """Verify the request is retried after sleeping for `Retry-After`."""
+        mocked_request.side_effect = [get_response(403, {'message': 'secondary rate limit'}, {'Retry-After': '30'}),
+                                      get_response(200, {'id': 1})]
+        test_client = GithubClient({'access_token': 'TOKEN'})
+
+        with mock.patch("time.time", return_value=1000):
+            response = test_client.authed_get("", "https://api.github.com/repos/org/repo")
+
+        self.assertEqual(response.json(), {'id': 1})
+        self.assertEqual(mocked_request.call_count, 2)
+        mocked_sleep.assert_any_call(30)
+
+    def test_max_tries(self, mocked_request, mocked_sleep):
+        """Verify the error is raised after 5 tries."""
+        mocked_request.return_value = get_response(429, {}, {'Retry-After': '1'})
+        test_client = GithubClient({'access_token': 'TOKEN'})
+
+        with self.assertRaises(SecondaryRateLimitExceeded):
+            test_client.authed_get("", "https://api.github.com/repos/org/repo")
+
+        self.assertEqual(mocked_request.call_count, 5)
@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from tap_github import output
+from tap_github.state import StateWriter, load_state, throttled_state
+
+def get_states(stdout):
+    """Return the value of the STATE messages written to stdout."""
+    messages = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    return [message["value"] for message in messages if message["type"] == "STATE"]
+
+@mock.patch("singer.write_record")
+@mock.patch("sys.stdout", new_callable=io.StringIO)
+class TestThrottledState(unittest.TestCase):
+    """
+    Test the STATE messages are coalesced within `throttled_state`.
+    """
+
+    def test_interval_records(self, mock_stdout, mock_write_record):
+        """Verify the state is written once enough records were written since the previous one."""
+        with throttled_state({"state_interval_records": 3}):
+            output.write_state({"bookmarks": {"org/repo": 1}})
+            output.write_record("commits", {"sha": "a"})
+            output.write_record("commits", {"sha": "b"})
+            output.write_state({"bookmarks": {"org/repo": 2}})
+            output.write_record("commits", {"sha": "c"})
+            output.write_state({"bookmarks": {"org/repo": 3}})
+
+        self.assertEqual(get_states(mock_stdout), [{"bookmarks": {"org/repo": 1}}, {"bookmarks": {"org/repo": 3}}])
+        self.assertIsNone(output.STATE_WRITER)
+
+    @mock.patch("tap_github.state.time.monotonic")
+    def test_interval_seconds(self, mock_monotonic, mock_stdout, mock_write_record):
+        """Verify the state is written once the interval elapsed since the previous one."""
+        mock_monotonic.side_effect = [0, 10, 30, 30]
+        with throttled_state({"state_interval_seconds": 30}):
+            output.write_state({"bookmarks": {"org/repo": 1}})
+            output.write_state({"bookmarks": {"org/repo": 2}})
+            output.write_state({"bookmarks": {"org/repo": 3}})
+
+        self.assertEqual(get_states(mock_stdout), [{"bookmarks": {"org/repo": 1}}, {"bookmarks": {"org/repo": 3}}])
+
+    def test_last_state_written(self, mock_stdout, mock_write_record):
+        """Verify the last coalesced state is written at the end of the sync."""
+        with throttled_state({"state_interval_records": 100}):
+            output.write_state({"bookmarks": {"org/repo": 1}})
+            output.write_state({"bookmarks": {"org/repo": 2}})
+
+        self.assertEqual(get_states(mock_stdout), [{"bookmarks": {"org/repo": 1}}, {"bookmarks": {"org/repo": 2}}])
+
+    def test_failed_sync(self, mock_stdout, mock_write_record):
+        """Verify the last coalesced state is not written if the sync failed, as it may be ahead of the records."""
+        state = {"bookmarks": {"org/repo": 1}}
+        with self.assertRaises(RuntimeError):
+            with throttled_state({"state_interval_records": 100}):
+                output.write_state(state)
+                output.write_state(state)
+                state["bookmarks"]["org/repo"] = 2
+                raise RuntimeError()
+
+        self.assertEqual(get_states(mock_stdout), [{"bookmarks": {"org/repo": 1}}])
+
+    @mock.patch("singer.write_state")
+    def test_disabled(self, mock_write_state, mock_stdout, mock_write_record):
+        """Verify every state is written by singer by default."""
+        with throttled_state({}):
+            output.write_state({"bookmarks": {}})
+            output.write_state({"bookmarks": {}})
+
+        self.assertEqual(mock_write_state.call_count, 2)
+
+@mock.patch("sys.stdout", new_callable=io.StringIO)
+class TestStateWriter(unittest.TestCase):
+    """
+    Test the serialization of the state by entry.
+    """
+
+    def test_same_state(self, mock_stdout):
+        """Verify the STATE messages are the states written, as the entries change."""
+        states = [
+            {"currently_syncing": None, "bookmarks": {"org/repo1": {"issues": {"since": "2022-01-01T00:00:00Z"}}}},
+            {"currently_syncing": "issues", "bookmarks": {"org/repo1": {"issues": {"since": "2022-01-02T00:00:00Z"}},
+                                                          "org/repo2": {"commits": {"since": "2022-01-01T00:00:00Z"}}}},
+            {"bookmarks": {"org/repo2": {"commits": {"since": "2022-01-01T00:00:00Z"}}}, "repo_activity": {}},
+            {"bookmarks": {}, "repo_activity": {"org/repo2": {"pushed_at": "2022-01-03T00:00:00Z"}}},
+        ]
+        state_writer = StateWriter()
+        for state in states:
+            state_writer.write(state)
+
+        self.assertEqual(get_states(mock_stdout), states)
+
+    def test_changed_entries(self, mock_stdout):
+        """Verify only the entries which changed are serialized again."""
+        state = {"currently_syncing": None, "bookmarks": {"org/repo1": {"issues": 1}, "org/repo2": {"issues": 1}}}
+        state_writer = StateWriter()
+        state_writer.update(state)
+
+        state["bookmarks"]["org/repo2"]["issues"] = 2
+        del state["currently_syncing"]
+        changed, removed = state_writer.update(state)
+
+        self.assertEqual(changed, [("bookmarks", "org/repo2")])
+        self.assertEqual(removed, [("currently_syncing", None)])
+
+    def test_state_db(self, mock_stdout):
+        """Verify the state is saved in the SQLite file with its changes, and loaded back."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "state.db")
+            state = {"currently_syncing": "issues", "bookmarks": {"org/repo1": {"issues": 1}, "org/repo2": {"issues": 1}}}
+            state_writer = StateWriter(db_path=db_path)
+            state_writer.write(state)
+
+            state["bookmarks"]["org/repo1"]["issues"] = 2
+            del state["bookmarks"]["org/repo2"]
+            state["currently_syncing"] = None
+            state_writer.write(state)
+            state_writer.close()
+
+            self.assertEqual(load_state(db_path), state)
@@ -0,0 +1,87 @@
+import threading
+import unittest
+from unittest import mock
+from tap_github.streams import SyncContext, StreamContext, get_sync_context, Commits
+
+def get_stream_catalog(stream_name):
+    """Return catalog for stream with an unselected field."""
+    return {"schema": {"type": "object", "properties": {"id": {"type": "integer"}, "name": {"type": ["null", "string"]}}},
+            "tap_stream_id": stream_name,
+            "metadata": [{"breadcrumb": [], "metadata": {"selected": True}},
+                         {"breadcrumb": ["properties", "name"], "metadata": {"selected": False}}]}
+
+class TestSyncContext(unittest.TestCase):
+    """
+    Test the runtime context built once per sync.
+    """
+
+    @mock.patch("tap_github.streams.get_schema", side_effect = lambda catalog, stream_id: catalog[0])
+    def test_stream_context_built_once(self, mock_get_schema):
+        """Verify the context of a stream is built on first use only."""
+        context = SyncContext([get_stream_catalog("commits")])
+
+        self.assertIs(context.get_stream("commits"), context.get_stream("commits"))
+        self.assertEqual(mock_get_schema.call_count, 1)
+
+    def test_stream_object_shared(self):
+        """Verify the instance of a stream is shared."""
+        context = SyncContext([])
+
+        self.assertIsInstance(context.get_stream_object("commits"), Commits)
+        self.assertIs(context.get_stream_object("commits"), context.get_stream_object("commits"))
+
+    def test_get_sync_context(self):
+        """Verify the sync context is built only for a catalog."""
+        context = SyncContext([])
+
+        self.assertIs(get_sync_context(context), context)
+        self.assertIsInstance(get_sync_context([]), SyncContext)
+
+class TestStreamContext(unittest.TestCase):
+    """
+    Test the transformation of the records with the context of a stream.
+    """
+
+    def test_transform(self):
+        """Verify the records are transformed with the schema and the metadata of the stream."""
+        stream_context = StreamContext(get_stream_catalog("commits"))
+
+        self.assertEqual(stream_context.transform({"id": "1", "name": "a"}), {"id": 1})
+        self.assertEqual(stream_context.transform({"id": 2, "name": "b"}), {"id": 2})
+
+    def test_errors_not_kept(self):
+        """Verify a record is transformed after a record which failed the transformation."""
+        stream_context = StreamContext(get_stream_catalog("commits"))
+
+        with self.assertRaises(Exception):
+            stream_context.transform({"id": "a"})
+        self.assertEqual(stream_context.transform({"id": 1}), {"id": 1})
+
+    def test_transformer_per_thread(self):
+        """Verify the records of a thread are transformed with the same transformer, and each thread has its own."""
+        stream_context = StreamContext(get_stream_catalog("commits"))
+        transformers = []
+
+        def transform():
+            for index in range(2):
+                stream_context.transform({"id": index})
+                transformers.append(stream_context.thread_local.transformer)
+
+        thread = threading.Thread(target=transform)
+        thread.start()
+        thread.join()
+        transform()
+
+        self.assertIs(transformers[0], transformers[1])
+        self.assertIs(transformers[2], transformers[3])
+        self.assertIsNot(transformers[0], transformers[2])
+
+    @mock.patch("singer.Transformer.log_warning")
+    def test_transformers_exited(self, mock_log_warning):
+        """Verify the transformers are exited once with the sync context, so the removed and filtered paths are logged."""
+        with SyncContext([get_stream_catalog("commits")]) as context:
+            context.get_stream("commits").transform({"id": 1, "name": "a"})
+            context.get_stream("commits").transform({"id": 2, "name": "b"})
+            self.assertFalse(mock_log_warning.called)
+
+        self.assertEqual(mock_log_warning.call_count, 1)
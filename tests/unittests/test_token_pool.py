@@ -0,0 +1,141 @@
+import time
+import unittest
+from unittest import mock
+import requests_mock
+from tap_github.client import GithubClient, RateLimitExceeded
+from tap_github.rate_limit import TokenPool
+
+URL = "https://api.github.com/repos/org/repo/commits"
+
+class TestTokenPool(unittest.TestCase):
+    """
+    Test `TokenPool` class.
+    """
+
+    def test_token_with_most_headroom(self):
+        """Verify the token with the most remaining requests is chosen."""
+        token_pool = TokenPool(["token1", "token2", "token3"])
+        reset = int(time.time()) + 600
+        token_pool.update("token1", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(reset)})
+        token_pool.update("token2", {"X-RateLimit-Remaining": "300", "X-RateLimit-Reset": str(reset)})
+        token_pool.update("token3", {"X-RateLimit-Remaining": "20", "X-RateLimit-Reset": str(reset)})
+
+        self.assertEqual(token_pool.get_token(), "token2")
+
+    def test_unknown_budget_preferred(self):
+        """Verify a token which was not used yet is chosen before the ones with a known budget."""
+        token_pool = TokenPool(["token1", "token2"])
+        token_pool.update("token1", {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": str(int(time.time()) + 600)})
+
+        self.assertEqual(token_pool.get_token(), "token2")
+
+    def test_reset_window(self):
+        """Verify an exhausted token is available again once its rate limit window is reset."""
+        token_pool = TokenPool(["token1", "token2"])
+        token_pool.update("token1", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) - 1)})
+        token_pool.update("token2", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(int(time.time()) + 600)})
+
+        self.assertEqual(token_pool.get_token(), "token1")
+        self.assertIsNone(token_pool.get_sleep_seconds())
+
+    def test_sleep_when_all_exhausted(self):
+        """Verify the sleep time is the earliest reset of the tokens when all of them are exhausted."""
+        token_pool = TokenPool(["token1", "token2"])
+        now = int(time.time())
+        token_pool.update("token1", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(now + 300)})
+        self.assertIsNone(token_pool.get_sleep_seconds())
+
+        token_pool.update("token2", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(now + 120)})
+        self.assertIn(token_pool.get_sleep_seconds(), [119, 120])
+
+@mock.patch("time.sleep")
+class TestClientTokenRotation(unittest.TestCase):
+    """
+    Test the token rotation of `authed_get`.
+    """
+
+    def test_tokens_from_config(self, mock_sleep):
+        """Verify the pool contains `access_token` and the space delimited `access_tokens` without duplicates."""
+        test_client = GithubClient({"access_token": "token1", "access_tokens": "token2 token1  token3"})
+
+        self.assertEqual(test_client.token_pool.tokens, ["token1", "token2", "token3"])
+
+    def test_rotate_on_exhausted_token(self, mock_sleep):
+        """Verify the next request uses another token once a token is exhausted, without sleeping."""
+        test_client = GithubClient({"access_token": "token1", "access_tokens": ["token2"]})
+        reset = str(int(time.time()) + 600)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, [{"json": [], "headers": {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}},
+                             {"json": [], "headers": {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": reset}},
+                             {"json": [], "headers": {"X-RateLimit-Remaining": "4998", "X-RateLimit-Reset": reset}}])
+            for _ in range(3):
+                test_client.authed_get("commits", URL)
+
+            self.assertEqual([request.headers["authorization"] for request in mocker.request_history],
+                             ["token token1", "token token2", "token token2"])
+
+        self.assertFalse(mock_sleep.called)
+
+    def test_all_tokens_exhausted(self, mock_sleep):
+        """Verify `RateLimitExceeded` is raised when every token is exhausted for longer than `max_sleep_seconds`."""
+        test_client = GithubClient({"access_token": "token1", "access_tokens": ["token2"], "max_sleep_seconds": 60})
+        reset = str(int(time.time()) + 600)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, json=[], headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+            test_client.authed_get("commits", URL)
+
+            with self.assertRaises(RateLimitExceeded):
+                test_client.authed_get("commits", URL)
+
+class TestRateLimitPacing(unittest.TestCase):
+    """
+    Test the pacing and the reserve of `TokenPool`.
+    """
+
+    def test_no_pacing_by_default(self):
+        """Verify the requests are not delayed when pacing is not enabled."""
+        token_pool = TokenPool(["token1"])
+        token_pool.update("token1", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(int(time.time()) + 3600)})
+
+        self.assertEqual([token_pool.get_pacing_delay("token1") for _ in range(20)], [0] * 20)
+
+    def test_pacing_after_burst(self):
+        """Verify the requests are spread over the rate limit window once the burst is spent."""
+        token_pool = TokenPool(["token1"], pacing=True, burst=2)
+        token_pool.update("token1", {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": str(int(time.time()) + 1000)})
+
+        delays = [token_pool.get_pacing_delay("token1") for _ in range(4)]
+
+        # Verify the burst is sent right away, then each request waits for the refill at 100 requests per 1000 seconds
+        self.assertEqual(delays[:2], [0, 0])
+        self.assertAlmostEqual(delays[2], 10, delta=0.5)
+        self.assertAlmostEqual(delays[3], 20, delta=0.5)
+
+    def test_reserve_kept(self):
+        """Verify a token is considered exhausted once only the reserve is remaining."""
+        token_pool = TokenPool(["token1", "token2"], reserve=100)
+        now = int(time.time())
+        token_pool.update("token1", {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": str(now + 300)})
+        token_pool.update("token2", {"X-RateLimit-Remaining": "150", "X-RateLimit-Reset": str(now + 600)})
+
+        self.assertEqual(token_pool.get_token(), "token2")
+        self.assertIsNone(token_pool.get_sleep_seconds())
+
+        token_pool.update("token2", {"X-RateLimit-Remaining": "99", "X-RateLimit-Reset": str(now + 600)})
+        self.assertIn(token_pool.get_sleep_seconds(), [299, 300])
+
+    @mock.patch("time.sleep")
+    def test_rate_limit_read_at_startup(self, mock_sleep):
+        """Verify the budget of each token is read from `/rate_limit` when pacing is enabled."""
+        reset = int(time.time()) + 1000
+        with requests_mock.Mocker() as mocker:
+            mocker.get("https://api.github.com/rate_limit", [
+                {"json": {"resources": {"core": {"limit": 5000, "remaining": 100, "used": 4900, "reset": reset}}}},
+                {"json": {"resources": {"core": {"limit": 5000, "remaining": 4000, "used": 1000, "reset": reset}}}}])
+            test_client = GithubClient({"access_token": "token1", "access_tokens": "token2", "rate_limit_pacing": "true"})
+
+            self.assertEqual([request.headers["authorization"] for request in mocker.request_history], ["token token1", "token token2"])
+
+        self.assertEqual(test_client.token_pool.budgets["token1"].remaining, 100)
+        self.assertEqual(test_client.token_pool.budgets["token2"].used, 1000)
+        self.assertEqual(test_client.token_pool.get_token(), "token2")